@@ -1,16 +1,41 @@
 import os
+import asyncio
+import logging
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from dotenv import load_dotenv
-from pydantic_ai import RunContext
+from redis.exceptions import LockNotOwnedError
 
 from core.agents import AgentDeps
 from core.api import AgentsAPIView
-from core.agents import OrchestratorAgent
-from core.database.mongo import DatabaseHandler
+from core.agents import agent_cache, HistorySummarizerAgent
+from core.agents.history_summarizer_agent import HISTORY_SUMMARY_THRESHOLD, summary_backlog
+from core.database.mongo.database_handler import utc_now
+from core.database.mongo.history_archive import (
+    HISTORY_ARCHIVE_ENABLED,
+    HISTORY_ARCHIVE_INTERVAL,
+    archive_cutoff,
+    check_archive_dependencies,
+)
+from core.database.mongo import (
+    MONGODB_ASYNC_HISTORY,
+    DatabaseHandler,
+    AsyncDatabaseHandler,
+    close_mongo_clients,
+    close_async_mongo_clients,
+    ensure_history_indexes,
+    history_write_buffer,
+)
+from core.database.redis import TaskEventPublisher, get_redis_client
+from core.services.artificial_intelligence import check_embedding_backend, warm_up_embedding_model
+from core.services.ingestion import INGESTION_JOB_TYPE, IngestionPipeline
+from core.database.vector_store import get_vector_store
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
 
 celery = Celery(
@@ -19,19 +44,128 @@ celery = Celery(
     backend=os.getenv("REDIS_URL"),
 )
 
-@celery.task
-def execute_agent_task(message, user_id, agent_id, ctx: RunContext[AgentDeps]):
+# Checked on import, so the worker and beat refuse to start: Celery only logs errors raised by signal handlers
+check_archive_dependencies()
+check_embedding_backend()
+
+if HISTORY_ARCHIVE_ENABLED:
+    celery.conf.beat_schedule = {
+        "archive-history": {
+            "task": "celery_worker.archive_history_task",
+            "schedule": HISTORY_ARCHIVE_INTERVAL,
+        },
+    }
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    ensure_history_indexes()
+    warm_up_embedding_model()
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    history_write_buffer.close()
+    close_mongo_clients()
+
+    # Async clients belong to the task loop, so they are closed on it
+    if _event_loop is not None and not _event_loop.is_closed():
+        run_async(close_async_mongo_clients())
+
+_event_loop: asyncio.AbstractEventLoop | None = None
+
+def run_async(coroutine):
+    # Cached agents keep their model HTTP clients between tasks, so every task of
+    # a worker process has to run on the same event loop
+    global _event_loop
+
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+
+    return _event_loop.run_until_complete(coroutine)
+
+def release_lock(lock):
+    # A run that outlives the lock timeout no longer owns it, another run may hold it now
+    try:
+        lock.release()
+    except LockNotOwnedError:
+        logger.warning(f"Lock {lock.name} expired before the task finished")
+
+@celery.task(bind=True)
+def execute_agent_task(self, message, user_id, agent_id, conversation_id=None):
+    publisher = TaskEventPublisher(self.request.id)
+
     try:
         agent = AgentsAPIView().get_agent(agent_id, user_id)
 
         deps = AgentDeps(
-            db=DatabaseHandler(MONGO_HISTORY_COLLECTION),
+            db=AsyncDatabaseHandler(MONGO_HISTORY_COLLECTION) if MONGODB_ASYNC_HISTORY else DatabaseHandler(MONGO_HISTORY_COLLECTION),
             user_id=str(user_id),
-            agent_id=str(agent_id)
+            agent_id=str(agent_id),
+            conversation_id=conversation_id
+        )
+
+        agent = agent_cache.get_or_build(agent)
+        response = run_async(
+            agent.execute_stream(message, is_tool_agent=False, deps=deps, on_delta=publisher.publish_delta)
         )
+        result = {"message": response}
+        publisher.publish("completed", result=result)
+        return result
+    except Exception as e:
+        publisher.publish("failed", result={"message": "Agent cannot process your request."})
+        return {"error": str(e)}
+
+@celery.task
+def summarize_history_task(user_id, agent_id, conversation_id=None):
+    # Only one summarization per conversation at a time, later triggers are no-ops
+    lock = get_redis_client().lock(f"history-summary:{user_id}:{agent_id}:{conversation_id or ''}", timeout=600)
+    if not lock.acquire(blocking=False):
+        return {"folded_turns": 0}
+
+    try:
+        # Most triggers find nothing to fold, so the agent is only loaded and built when there is work
+        _, _, _, pending_turns = summary_backlog(DatabaseHandler(MONGO_HISTORY_COLLECTION), user_id, agent_id, conversation_id)
+        if pending_turns <= HISTORY_SUMMARY_THRESHOLD:
+            return {"folded_turns": 0}
+
+        agent = AgentsAPIView().get_agent(agent_id, user_id)
+        folded_turns = HistorySummarizerAgent(agent).summarize_history(user_id, agent_id, conversation_id)
+        return {"folded_turns": folded_turns}
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        release_lock(lock)
+
+@celery.task
+def archive_history_task():
+    # A slow run must not overlap with the next scheduled one
+    lock = get_redis_client().lock("history-archive", timeout=HISTORY_ARCHIVE_INTERVAL)
+    if not lock.acquire(blocking=False):
+        return {"archived_turns": 0}
+
+    try:
+        archived_turns = DatabaseHandler(MONGO_HISTORY_COLLECTION).archive_history(archive_cutoff(utc_now()))
+        return {"archived_turns": archived_turns}
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        release_lock(lock)
+
+@celery.task(bind=True)
+def ingest_documents_task(self, agent_id, user_id, file_path, source_id):
+    job = {"job_type": INGESTION_JOB_TYPE, "agent_id": str(agent_id), "user_id": str(user_id)}
 
-        agent = OrchestratorAgent(agent)
-        response = agent.execute(message, is_tool_agent=False, deps=deps)
-        return {"message": response}
+    def report_progress(progress):
+        self.update_state(state="PROGRESS", meta={**job, **progress})
+
+    try:
+        agent = AgentsAPIView().get_agent(agent_id, user_id)
+        result = IngestionPipeline(get_vector_store(agent)).ingest(
+            file_path, source_id, metadata={"source": source_id}, on_progress=report_progress
+        )
+        return {**job, **result}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {**job, "source_id": source_id, "error": str(e)}
+    finally:
+        # The upload is only kept until it is indexed
+        if os.path.exists(file_path):
+            os.remove(file_path)
@@ -1,8 +1,13 @@
 from core.agents.base_agent import AgentDeps, BaseAgent
 from core.agents.agent_orchestrator import OrchestratorAgent
+from core.agents.cache import AgentCache, agent_cache
+from core.agents.history_summarizer_agent import HistorySummarizerAgent
 
 __all__ = [
     "OrchestratorAgent",
     "AgentDeps",
-    "BaseAgent"
+    "BaseAgent",
+    "AgentCache",
+    "agent_cache",
+    "HistorySummarizerAgent"
 ]
\ No newline at end of file
@@ -54,10 +54,10 @@ class OrchestratorAgent(BaseAgent):
 
         USER_PROMPT: {self.agent_obj.system_prompt}"""
 
-    def web_search_tool(self, ctx: RunContext[AgentDeps], query: str):
+    async def web_search_tool(self, ctx: RunContext[AgentDeps], query: str):
         logger.info("Calling WebSearch Tool")
-        return self.search_worker_agent.execute(query, is_tool_agent=True, deps=ctx.deps)
+        return await self.search_worker_agent.execute_async(query, is_tool_agent=True, deps=ctx.deps)
     
-    def document_handler_tool(self, ctx: RunContext[AgentDeps], query: str):
+    async def document_handler_tool(self, ctx: RunContext[AgentDeps], query: str):
         logger.info("Calling Document Handler Tool")
-        return self.document_handler_agent.execute(query, is_tool_agent=True, deps=ctx.deps)
+        return await self.document_handler_agent.execute_async(query, is_tool_agent=True, deps=ctx.deps)
@@ -1,30 +1,35 @@
-
 import os
+import asyncio
 import logging
 
+from typing import Callable
 from dotenv import load_dotenv
 from dataclasses import dataclass
 
 from pydantic_ai import Agent
 from pydantic_ai.tools import Tool
+from pydantic_ai.messages import ModelMessage
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.ollama import OllamaProvider
 from pydantic_ai.providers.openai import OpenAIProvider
 
 from database.models.agent import AgentModel
-from core.database.mongo import DatabaseHandler
+from core.database.mongo import MONGODB_ASYNC_HISTORY, DatabaseHandler, AsyncDatabaseHandler
+from core.agents.history_window import HISTORY_TOKEN_BUDGET, window_history
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
+HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "false").lower() == "true"
 
 @dataclass
 class AgentDeps:
-    db: DatabaseHandler
+    db: DatabaseHandler | AsyncDatabaseHandler
     user_id: str
     agent_id: str
+    conversation_id: str | None = None
 
 class BaseAgent:
     def __init__(self):
@@ -33,7 +38,9 @@ class BaseAgent:
         self.openai_model_name = os.getenv("OPENAI_MODEL")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.agent = None
+        self.system_prompt = None
         self.database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+        self.async_database_handler = AsyncDatabaseHandler(MONGO_HISTORY_COLLECTION) if MONGODB_ASYNC_HISTORY else None
     
     def get_ollama_model(self):
         logger.info(f"Getting ollama model: {self.ollama_model_name}")
@@ -57,6 +64,7 @@ class BaseAgent:
         else:
             model = self.get_ollama_model()
 
+        self.system_prompt = system_prompt
         self.agent = Agent(
             model, 
             tools=tools,
@@ -65,23 +73,155 @@ class BaseAgent:
         )
         return self.agent
     
+    def load_history(self, is_tool_agent: bool = False, conversation_id: str | None = None):
+        if is_tool_agent:
+            logger.info("No history loaded")
+            return []
+
+        logger.info("Loading agent history")
+        agent_history = self.database_handler.load_history_json(
+            self.agent_obj.user_id, self.agent_obj.id, conversation_id=conversation_id
+        )
+        return self.window_agent_history(agent_history)
+
+    async def load_history_async(self, is_tool_agent: bool = False, conversation_id: str | None = None):
+        if not self.async_database_handler:
+            return await asyncio.to_thread(self.load_history, is_tool_agent, conversation_id)
+
+        if is_tool_agent:
+            logger.info("No history loaded")
+            return []
+
+        logger.info("Loading agent history")
+        agent_history = await self.async_database_handler.load_history_json(
+            self.agent_obj.user_id, self.agent_obj.id, conversation_id=conversation_id
+        )
+        return self.window_agent_history(agent_history)
+
+    def window_agent_history(self, agent_history: list[ModelMessage]):
+        logger.info(f"Retrieved {len(agent_history)} messages from history")
+
+        history_window = window_history(
+            agent_history,
+            token_budget=self.agent_obj.history_token_budget or HISTORY_TOKEN_BUDGET,
+            system_prompt=self.system_prompt
+        )
+        logger.info(
+            f"History window kept {history_window.kept_tokens} tokens, "
+            f"dropped {history_window.dropped_tokens} tokens ({history_window.dropped_messages} messages)"
+        )
+        return history_window.messages
+
+    def save_history(
+        self,
+        user_input: str,
+        agent_response: str,
+        messages: list[ModelMessage] | None = None,
+        is_tool_agent: bool = False,
+        conversation_id: str | None = None
+    ):
+        if not is_tool_agent:
+            self.database_handler.insert_history(
+                user_input,
+                agent_response,
+                self.agent_obj.user_id,
+                self.agent_obj.id,
+                messages=messages,
+                conversation_id=conversation_id
+            )
+            self.schedule_history_summary(conversation_id)
+
+    async def save_history_async(
+        self,
+        user_input: str,
+        agent_response: str,
+        messages: list[ModelMessage] | None = None,
+        is_tool_agent: bool = False,
+        conversation_id: str | None = None
+    ):
+        if not self.async_database_handler:
+            return await asyncio.to_thread(
+                self.save_history, user_input, agent_response, messages, is_tool_agent, conversation_id
+            )
+
+        if not is_tool_agent:
+            await self.async_database_handler.insert_history(
+                user_input,
+                agent_response,
+                self.agent_obj.user_id,
+                self.agent_obj.id,
+                messages=messages,
+                conversation_id=conversation_id
+            )
+            # Enqueuing on the Celery broker is still blocking
+            if HISTORY_SUMMARY_ENABLED:
+                await asyncio.to_thread(self.schedule_history_summary, conversation_id)
+
+    def schedule_history_summary(self, conversation_id: str | None = None):
+        if not HISTORY_SUMMARY_ENABLED:
+            return
+
+        from celery_worker import summarize_history_task
+
+        try:
+            summarize_history_task.delay(str(self.agent_obj.user_id), str(self.agent_obj.id), conversation_id)
+        except Exception as e:
+            logger.error(f"Error to schedule history summary: {e}")
+
     def execute(self, user_input: str, deps: AgentDeps, is_tool_agent: bool = False):
         try:
             logger.info(f"Executing agent: {self.agent}")
 
-            if not is_tool_agent:
-                logger.info("Loading agent history")
-                agent_history = self.database_handler.load_history_json(self.agent_obj.user_id, self.agent_obj.id)
-                logger.info(f"Retrieved {len(agent_history)} messages from history")
-            else:
-                logger.info("No history loaded")
-                agent_history = []
+            agent_history = self.load_history(is_tool_agent, deps.conversation_id)
 
             response = self.agent.run_sync(user_input, message_history=agent_history, deps=deps)
             agent_response = response.output
 
-            if not is_tool_agent:
-                self.database_handler.insert_history(user_input, agent_response, self.agent_obj.user_id, self.agent_obj.id)
+            self.save_history(user_input, agent_response, response.new_messages(), is_tool_agent, deps.conversation_id)
+
+            return agent_response
+        except Exception as e:
+            logger.error(f"Error to execute agent: {e}")
+            raise e
+
+    async def execute_async(self, user_input: str, deps: AgentDeps, is_tool_agent: bool = False):
+        try:
+            logger.info(f"Executing agent asynchronously: {self.agent}")
+
+            agent_history = await self.load_history_async(is_tool_agent, deps.conversation_id)
+
+            response = await self.agent.run(user_input, message_history=agent_history, deps=deps)
+            agent_response = response.output
+
+            await self.save_history_async(
+                user_input, agent_response, response.new_messages(), is_tool_agent, deps.conversation_id
+            )
+
+            return agent_response
+        except Exception as e:
+            logger.error(f"Error to execute agent: {e}")
+            raise e
+
+    async def execute_stream(
+        self,
+        user_input: str,
+        deps: AgentDeps,
+        on_delta: Callable[[str], None],
+        is_tool_agent: bool = False
+    ):
+        try:
+            logger.info(f"Executing agent with streaming: {self.agent}")
+
+            agent_history = await self.load_history_async(is_tool_agent, deps.conversation_id)
+
+            async with self.agent.run_stream(user_input, message_history=agent_history, deps=deps) as response:
+                async for delta in response.stream_text(delta=True):
+                    on_delta(delta)
+
+                agent_response = await response.get_output()
+                new_messages = response.new_messages()
+
+            await self.save_history_async(user_input, agent_response, new_messages, is_tool_agent, deps.conversation_id)
 
             return agent_response
         except Exception as e:
@@ -0,0 +1,99 @@
+import os
+import logging
+import threading
+
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from database.models.agent import AgentModel
+from core.agents.agent_orchestrator import OrchestratorAgent
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+AGENT_CACHE_MAX_SIZE = int(os.getenv("AGENT_CACHE_MAX_SIZE", 128))
+
+
+class AgentCache:
+    """
+    Process-wide LRU cache of built OrchestratorAgent graphs.
+
+    Entries are keyed by (agent_id, updated_at, provider), so an agent updated
+    from another process is rebuilt on its next execution even if the local
+    entry was never invalidated explicitly.
+    """
+
+    def __init__(self, max_size: int = AGENT_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, OrchestratorAgent] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def build_key(agent_obj: AgentModel) -> tuple:
+        updated_at = agent_obj.updated_at.isoformat() if agent_obj.updated_at else None
+        return (str(agent_obj.id), updated_at, agent_obj.provider)
+
+    def get_or_build(self, agent_obj: AgentModel) -> OrchestratorAgent:
+        key = self.build_key(agent_obj)
+
+        with self._lock:
+            agent = self._entries.get(key)
+            if agent is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return agent
+            self.misses += 1
+
+        logger.info(f"Agent cache miss, building agent: {agent_obj.id}")
+        agent = OrchestratorAgent(agent_obj)
+
+        with self._lock:
+            # Another thread may have built the same agent while we were building ours
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+            self._entries[key] = agent
+            while len(self._entries) > self.max_size:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Agent cache evicted agent: {evicted_key[0]}")
+
+        return agent
+
+    def invalidate(self, agent_id: str):
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == str(agent_id)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+        if keys:
+            logger.info(f"Agent cache invalidated agent: {agent_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+agent_cache = AgentCache()
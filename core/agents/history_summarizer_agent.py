@@ -0,0 +1,104 @@
+import os
+import logging
+
+from datetime import datetime
+from dotenv import load_dotenv
+
+from core.agents import BaseAgent
+from database.models.agent import AgentModel
+from core.database.mongo.database_handler import HISTORY_PAGE_PROJECTION, DatabaseHandler
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+HISTORY_SUMMARY_THRESHOLD = int(os.getenv("HISTORY_SUMMARY_THRESHOLD", 40))
+HISTORY_SUMMARY_KEEP_TURNS = int(os.getenv("HISTORY_SUMMARY_KEEP_TURNS", 10))
+HISTORY_SUMMARY_BATCH_TURNS = int(os.getenv("HISTORY_SUMMARY_BATCH_TURNS", 50))
+
+def summary_backlog(
+    database_handler: DatabaseHandler,
+    user_id: str,
+    agent_id: str,
+    conversation_id: str | None = None
+) -> tuple[str, datetime | None, str | None, int]:
+    """
+    Returns the stored summary, the (created_at, runId) position it covers and
+    how many turns came after it.
+    """
+    stored_summary = database_handler.load_summary(user_id, agent_id, conversation_id) or {}
+    since, since_run_id = stored_summary.get("summarized_until"), stored_summary.get("summarized_until_run_id")
+    pending_turns = database_handler.count_history(
+        user_id, agent_id, since=since, conversation_id=conversation_id, since_run_id=since_run_id
+    )
+    return stored_summary.get("summary", ""), since, since_run_id, pending_turns
+
+class HistorySummarizerAgent(BaseAgent):
+    def __init__(self, agent_obj: AgentModel):
+        super().__init__()
+        self.agent_obj = agent_obj
+        self.agent = self.build_agent(
+            self.agent_obj,
+            tools=[],
+            system_prompt="""You are a Conversation Summarizer Agent. You maintain a rolling summary of a conversation between a user and an AI assistant.
+
+## INPUT:
+- **CURRENT_SUMMARY:** The summary of the conversation so far (may be empty)
+- **NEW_TURNS:** Older conversation turns that must be folded into the summary
+
+## OUTPUT:
+Return ONLY the updated summary, nothing else. No explanations, no additional text.
+
+## SUMMARY RULES:
+- Keep every fact, decision, preference and open task the user mentioned
+- Keep names, dates, numbers, file names and URLs exactly as written
+- Drop greetings, filler and repeated information
+- Write in the same language as the conversation
+- Use short bullet points grouped by topic
+- Keep the summary under 400 words"""
+        )
+
+    def _build_prompt(self, summary: str, turns: list[dict]) -> str:
+        new_turns = "\n\n".join(
+            f"USER: {turn.get('input')}\nASSISTANT: {turn.get('output')}" for turn in turns
+        )
+        return f"**CURRENT_SUMMARY:**\n{summary or '(empty)'}\n\n**NEW_TURNS:**\n{new_turns}"
+
+    def summarize_history(self, user_id: str, agent_id: str, conversation_id: str | None = None) -> int:
+        """
+        Folds the turns beyond the threshold into the stored rolling summary,
+        keeping the newest turns out of it. Returns the number of folded turns.
+        """
+        summary, since, since_run_id, pending_turns = summary_backlog(self.database_handler, user_id, agent_id, conversation_id)
+        if pending_turns <= HISTORY_SUMMARY_THRESHOLD:
+            return 0
+
+        logger.info(f"Summarizing history for agent {agent_id}: {pending_turns} pending turns")
+
+        folded_turns = 0
+        turns_to_fold = pending_turns - HISTORY_SUMMARY_KEEP_TURNS
+
+        while turns_to_fold > 0:
+            turns = self.database_handler.find_history(
+                user_id,
+                agent_id,
+                limit=min(turns_to_fold, HISTORY_SUMMARY_BATCH_TURNS),
+                since=since,
+                since_run_id=since_run_id,
+                ascending=True,
+                projection=HISTORY_PAGE_PROJECTION,
+                conversation_id=conversation_id
+            )
+
+            if not turns or not turns[-1].get("created_at"):
+                break
+
+            summary = self.agent.run_sync(self._build_prompt(summary, turns)).output
+            # A batch can end between turns sharing a created_at, the runId says where
+            since, since_run_id = turns[-1]["created_at"], turns[-1]["runId"]
+            self.database_handler.save_summary(user_id, agent_id, summary, since, len(turns), conversation_id, since_run_id)
+
+            folded_turns += len(turns)
+            turns_to_fold -= len(turns)
+
+        return folded_turns
@@ -0,0 +1,148 @@
+import os
+import math
+import logging
+
+from dataclasses import dataclass, replace
+
+from dotenv import load_dotenv
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    SystemPromptPart,
+    ToolCallPart,
+    UserPromptPart,
+)
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 4000))
+
+# Rough average for English text on BPE tokenizers, good enough to budget a prompt
+# without loading the provider tokenizer on the request path
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class HistoryWindow:
+    messages: list[ModelMessage]
+    kept_tokens: int
+    dropped_tokens: int
+    dropped_messages: int
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(message: ModelMessage) -> int:
+    tokens = 0
+
+    for part in message.parts:
+        if isinstance(part, ToolCallPart):
+            text = part.tool_name + part.args_as_json_str()
+        else:
+            content = getattr(part, "content", "")
+            text = content if isinstance(content, str) else str(content)
+
+        tokens += estimate_tokens(text)
+
+    return tokens
+
+
+def split_turns(messages: list[ModelMessage]) -> list[list[ModelMessage]]:
+    """
+    Groups the messages by turn: a turn starts at each user prompt and holds the
+    tool calls and responses that followed it, so they are never split apart.
+    """
+    turns = []
+
+    for message in messages:
+        starts_turn = isinstance(message, ModelRequest) and any(
+            isinstance(part, UserPromptPart) for part in message.parts
+        )
+
+        if starts_turn or not turns:
+            turns.append([])
+
+        turns[-1].append(message)
+
+    return turns
+
+
+def _pop_system_parts(messages: list[ModelMessage]) -> tuple[list[SystemPromptPart], list[ModelMessage]]:
+    system_parts = []
+    remaining = []
+
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            parts = [part for part in message.parts if not isinstance(part, SystemPromptPart)]
+            system_parts.extend(part for part in message.parts if isinstance(part, SystemPromptPart))
+
+            if not parts:
+                continue
+            if len(parts) != len(message.parts):
+                message = replace(message, parts=parts)
+
+        remaining.append(message)
+
+    return system_parts, remaining
+
+
+def window_history(
+    messages: list[ModelMessage],
+    token_budget: int | None = HISTORY_TOKEN_BUDGET,
+    system_prompt: str | None = None
+) -> HistoryWindow:
+    """
+    Trims the history to the token budget, keeping the system prompt and the
+    newest turns. The newest turn is always kept even if it alone exceeds the budget.
+    """
+    if not messages:
+        return HistoryWindow(messages=[], kept_tokens=0, dropped_tokens=0, dropped_messages=0)
+
+    system_parts, messages = _pop_system_parts(messages)
+
+    # pydantic-ai does not add the system prompt when a message history is given,
+    # so it has to be part of the window, ahead of any stored summary
+    if system_prompt:
+        system_parts = [SystemPromptPart(content=system_prompt), *system_parts]
+
+    system_tokens = sum(estimate_tokens(part.content) for part in system_parts)
+    kept_tokens = system_tokens
+    kept_turns = []
+    dropped_tokens = 0
+    dropped_messages = 0
+
+    turns = split_turns(messages)
+
+    for index, turn in enumerate(reversed(turns)):
+        turn_tokens = sum(estimate_message_tokens(message) for message in turn)
+
+        if kept_turns and token_budget and kept_tokens + turn_tokens > token_budget:
+            older_turns = turns[:len(turns) - index]
+            dropped_messages = sum(len(older_turn) for older_turn in older_turns)
+            dropped_tokens = sum(
+                estimate_message_tokens(message) for older_turn in older_turns for message in older_turn
+            )
+            break
+
+        kept_turns.insert(0, turn)
+        kept_tokens += turn_tokens
+
+    windowed_messages = [message for turn in kept_turns for message in turn]
+
+    if system_parts:
+        first_message = windowed_messages[0] if windowed_messages else None
+        if isinstance(first_message, ModelRequest):
+            windowed_messages[0] = replace(first_message, parts=[*system_parts, *first_message.parts])
+        else:
+            windowed_messages.insert(0, ModelRequest(parts=system_parts))
+
+    return HistoryWindow(
+        messages=windowed_messages,
+        kept_tokens=kept_tokens,
+        dropped_tokens=dropped_tokens,
+        dropped_messages=dropped_messages,
+    )
@@ -1,23 +1,32 @@
+import os
 import uuid
+import shutil
 import logging
 from datetime import datetime
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
+from celery.result import AsyncResult
 from sqlmodel import Session, select
 
 from database.config import engine
 from database.models.agent import AgentModel
-from core.database.opensearch import OpenSearchHandler
+from core.agents import agent_cache
+from core.database.mongo import DatabaseHandler
+from core.database.mongo.database_handler import CONVERSATION_CLOSED, parse_history_cursor
+from core.database.mongo.history_codec import encode_export_line
+from core.database.vector_store import create_vector_store, get_vector_store
+from core.services.ingestion import INGESTION_JOB_TYPE, SUPPORTED_EXTENSIONS
 
 logger = logging.Logger(__name__)
-class AgentsAPIView:
-    def __init__(self):
-        index = f"agentic-{str(uuid.uuid4())}"
-        self.opensearch_handler = OpenSearchHandler(index_name=index)
 
-    def create_agent(self, agent: AgentModel, user_id: str):
+MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
+INGESTION_UPLOAD_PATH = os.getenv("INGESTION_UPLOAD_PATH", "uploads")
+INGESTION_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class AgentsAPIView:
+    def create_agent(self, agent: AgentModel, user_id: str, vector_store: str | None = None):
         logger.info("Creating agent")
         try:
-            index_name = self.opensearch_handler.create_index()
+            index_name = create_vector_store(vector_store)
 
             agent.opensearch_index = index_name
             agent.user_id = user_id
@@ -87,6 +96,7 @@ class AgentsAPIView:
                 session.add(agent_db)
                 session.commit()
                 session.refresh(agent_db)
+                agent_cache.invalidate(agent_id)
                 return agent_db
             
         except HTTPException as e:
@@ -108,14 +118,180 @@ class AgentsAPIView:
                 if str(agent_db.user_id) != str(user_id):
                     raise HTTPException(status_code=403, detail="Forbidden")
 
-                self.opensearch_handler.delete_index(agent_db.opensearch_index)
+                get_vector_store(agent_db).delete_agent_documents()
                 
                 session.delete(agent_db)
                 session.commit()
+                agent_cache.invalidate(agent_id)
 
         except HTTPException as e:
             raise e
         except Exception as e:
             logger.error(f"Error to delete agent: {e}")
             session.rollback()
-            raise HTTPException(status_code=500, detail=f"Error to delete agent {agent_id}: {e}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error to delete agent {agent_id}: {e}")
+
+    def get_agent_history(
+        self,
+        agent_id: str,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        conversation_id: str | None = None,
+        include_archived: bool = False
+    ):
+        logger.info(f"Getting history of agent: {agent_id}")
+        self.get_agent(agent_id, user_id)
+
+        try:
+            cursor_date, cursor_run_id = parse_history_cursor(cursor) if cursor else (None, None)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+        try:
+            database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+            return database_handler.get_history_page(
+                user_id,
+                agent_id,
+                limit=limit,
+                cursor=cursor_date,
+                conversation_id=conversation_id,
+                include_archived=include_archived,
+                cursor_run_id=cursor_run_id
+            )
+        except Exception as e:
+            logger.error(f"Error to get agent history: {e}")
+            raise HTTPException(status_code=500, detail=f"Error to get history of agent {agent_id}: {e}")
+
+    def export_agent_history(
+        self,
+        agent_id: str,
+        user_id: str,
+        batch_size: int,
+        conversation_id: str | None = None,
+        include_archived: bool = False,
+        include_messages: bool = False,
+        default_conversation: bool = False
+    ):
+        logger.info(f"Exporting history of agent: {agent_id}")
+        # Checked before the response starts, a streaming response cannot turn into a 404
+        self.get_agent(agent_id, user_id)
+
+        database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+        history = database_handler.iter_history(
+            user_id,
+            agent_id,
+            conversation_id=conversation_id,
+            batch_size=batch_size,
+            include_archived=include_archived,
+            default_conversation=default_conversation
+        )
+
+        def export_lines():
+            lines = []
+            for document in history:
+                lines.append(encode_export_line(document, include_messages))
+                # One chunk per batch instead of one write per line
+                if len(lines) >= batch_size:
+                    yield b"".join(lines)
+                    lines = []
+
+            if lines:
+                yield b"".join(lines)
+
+        return export_lines()
+
+    def list_conversations(
+        self,
+        agent_id: str,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None
+    ):
+        logger.info(f"Listing conversations of agent: {agent_id}")
+        self.get_agent(agent_id, user_id)
+
+        try:
+            cursor_date = datetime.fromisoformat(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid conversations cursor")
+
+        try:
+            database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+            return database_handler.list_conversations(user_id, agent_id, limit=limit, cursor=cursor_date, status=status)
+        except Exception as e:
+            logger.error(f"Error to list conversations: {e}")
+            raise HTTPException(status_code=500, detail=f"Error to list conversations of agent {agent_id}: {e}")
+
+    def close_conversation(self, agent_id: str, user_id: str, conversation_id: str):
+        logger.info(f"Closing conversation {conversation_id} of agent: {agent_id}")
+        self.get_agent(agent_id, user_id)
+
+        try:
+            database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+            conversation = database_handler.close_conversation(user_id, agent_id, conversation_id)
+        except Exception as e:
+            logger.error(f"Error to close conversation: {e}")
+            raise HTTPException(status_code=500, detail=f"Error to close conversation {conversation_id}: {e}")
+
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        return conversation
+
+    def ensure_conversation_open(self, agent_id: str, user_id: str, conversation_id: str | None = None):
+        if not conversation_id:
+            return
+
+        database_handler = DatabaseHandler(MONGO_HISTORY_COLLECTION)
+        conversation = database_handler.get_conversation(user_id, agent_id, conversation_id)
+
+        if conversation and conversation.get("status") == CONVERSATION_CLOSED:
+            raise HTTPException(status_code=409, detail="Conversation is closed")
+
+    def upload_agent_document(self, agent_id: str, user_id: str, file: UploadFile):
+        logger.info(f"Uploading document {file.filename} to agent: {agent_id}")
+        from celery_worker import ingest_documents_task
+
+        self.get_agent(agent_id, user_id)
+
+        source_id = os.path.basename(file.filename or "")
+        extension = os.path.splitext(source_id)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported document type: {extension or source_id}")
+
+        os.makedirs(INGESTION_UPLOAD_PATH, exist_ok=True)
+        file_path = os.path.join(INGESTION_UPLOAD_PATH, f"{uuid.uuid4()}{extension}")
+
+        try:
+            # Copied in fixed-size chunks, the upload is never fully in memory
+            with open(file_path, "wb") as upload:
+                shutil.copyfileobj(file.file, upload, INGESTION_UPLOAD_CHUNK_SIZE)
+
+            task = ingest_documents_task.delay(agent_id, str(user_id), file_path, source_id)
+            return {"job_id": task.id, "source_id": source_id, "status": "queued"}
+        except Exception as e:
+            logger.error(f"Error to upload document: {e}")
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise HTTPException(status_code=500, detail=f"Error to upload document to agent {agent_id}: {e}")
+
+    def get_ingestion_job(self, job_id: str, user_id: str):
+        logger.info(f"Getting ingestion job: {job_id}")
+        task_result = AsyncResult(job_id)
+
+        # Unknown ids are PENDING too, nothing is stored for them yet
+        if task_result.state == "PENDING":
+            return {"job_id": job_id, "status": "queued"}
+
+        # Any task id can be sent here, only the user's own ingestion jobs are shown
+        info = task_result.info if isinstance(task_result.info, dict) else {}
+        if info.get("job_type") != INGESTION_JOB_TYPE or info.get("user_id") != str(user_id):
+            raise HTTPException(status_code=404, detail="Ingestion job not found")
+
+        if task_result.state == "PROGRESS":
+            return {"job_id": job_id, "status": "in progress", "progress": info}
+
+        status = "failed" if info.get("error") else "completed"
+        return {"job_id": job_id, "status": status, "result": info}
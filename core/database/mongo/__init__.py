@@ -1,5 +1,17 @@
-from core.database.mongo.database_handler import DatabaseHandler
+from core.database.mongo.client import get_mongo_client, close_mongo_clients, get_async_mongo_client, close_async_mongo_clients
+from core.database.mongo.database_handler import DatabaseHandler, ensure_history_indexes
+from core.database.mongo.history_buffer import HistoryWriteBuffer, history_write_buffer
+from core.database.mongo.async_database_handler import MONGODB_ASYNC_HISTORY, AsyncDatabaseHandler
 
 __all__ = [
-    "DatabaseHandler"
+    "DatabaseHandler",
+    "ensure_history_indexes",
+    "AsyncDatabaseHandler",
+    "MONGODB_ASYNC_HISTORY",
+    "get_mongo_client",
+    "close_mongo_clients",
+    "get_async_mongo_client",
+    "close_async_mongo_clients",
+    "HistoryWriteBuffer",
+    "history_write_buffer"
 ]
\ No newline at end of file
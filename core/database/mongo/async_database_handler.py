@@ -0,0 +1,271 @@
+import os
+import logging
+
+from dotenv import load_dotenv
+from datetime import datetime
+from pydantic_ai.messages import ModelMessage
+
+from core.database.mongo.client import get_async_mongo_client
+from core.database.mongo.history_archive import archive_blocks_query, archive_blocks_sort, archived_block_turns
+from core.database.mongo.database_handler import (
+    DATABASE_NAME,
+    MONGODB_HISTORY_MAX_TURNS,
+    HISTORY_PROJECTION,
+    HISTORY_PAGE_PROJECTION,
+    SUMMARY_PROJECTION,
+    build_history_document,
+    build_history_messages,
+    build_history_page,
+    conversation_scope,
+    conversation_upsert,
+    history_collection_names,
+    history_query,
+    history_since_summary,
+    history_sort,
+    merge_pending_history,
+    summary_update,
+    use_history_cache,
+    with_pending_history,
+)
+from core.database.redis.history_cache import REDIS_HISTORY_CACHE_ENABLED, REDIS_HISTORY_CACHE_MAX_TURNS, AsyncHistoryCache
+
+load_dotenv()
+
+MONGODB_ASYNC_HISTORY = os.getenv("MONGODB_ASYNC_HISTORY", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseHandler:
+    """
+    DatabaseHandler on the asyncio Mongo driver, for the agent paths that run on
+    an event loop. Same documents and contract as DatabaseHandler, awaited.
+    Turns are written directly since the insert no longer blocks the loop.
+    The indexes are only created by the startup hooks of the API and the
+    workers (ensure_history_indexes), as create_index would block the loop.
+    """
+
+    def __init__(self, collection):
+        logger.info(f"Starting async Mongo Database for collection {collection}")
+        self.collection = collection
+        self.client = get_async_mongo_client()
+        self.database = self.client[DATABASE_NAME]
+        self.collection_obj = self.database[self.collection]
+        self.summary_collection, self.conversation_collection, self.archive_collection = history_collection_names(self.collection)
+        self.summary_collection_obj = self.database[self.summary_collection]
+        self.conversation_collection_obj = self.database[self.conversation_collection]
+        self.archive_collection_obj = self.database[self.archive_collection]
+        self.history_cache = AsyncHistoryCache() if REDIS_HISTORY_CACHE_ENABLED else None
+
+    async def insert_history(
+        self,
+        input: str,
+        output: str,
+        user_id: str,
+        agent_id: str,
+        messages: list[ModelMessage] | None = None,
+        conversation_id: str | None = None
+    ):
+        logger.info(f"Inserting history for agent {agent_id}")
+        try:
+            document = build_history_document(input, output, user_id, agent_id, messages, conversation_id)
+            await self.collection_obj.insert_one(document)
+
+            if conversation_id:
+                await self.conversation_collection_obj.update_one(*conversation_upsert(document), upsert=True)
+
+            if self.history_cache:
+                await self.history_cache.append(user_id, agent_id, document, conversation_id)
+        except Exception as e:
+            logger.error(f"Error to insert history do agent: {e}")
+            raise e
+
+    async def find_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = None,
+        since: datetime | None = None,
+        before: datetime | None = None,
+        ascending: bool = False,
+        include_pending: bool = False,
+        projection: dict = HISTORY_PROJECTION,
+        conversation_id: str | None = None,
+        include_archived: bool = False,
+        before_run_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> list[dict]:
+        query = history_query(
+            user_id, agent_id, since=since, before=before, conversation_id=conversation_id,
+            before_run_id=before_run_id, since_run_id=since_run_id
+        )
+
+        history = self.collection_obj.find(query, projection).sort(history_sort(ascending))
+
+        if limit:
+            history = history.limit(limit)
+
+        history = await history.to_list()
+
+        # Sync handlers of this process may still hold buffered turns
+        if include_pending:
+            history = with_pending_history(
+                self.collection_obj, history, projection, user_id, agent_id, limit=limit, since=since,
+                before=before, ascending=ascending, conversation_id=conversation_id, before_run_id=before_run_id,
+                since_run_id=since_run_id
+            )
+
+        if include_archived:
+            archived = await self.find_archived_history(
+                user_id, agent_id, limit=limit, since=since, before=before,
+                ascending=ascending, conversation_id=conversation_id, before_run_id=before_run_id,
+                since_run_id=since_run_id
+            )
+            history = merge_pending_history(history, archived, projection, ascending=ascending, limit=limit)
+
+        return history
+
+    async def find_archived_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = None,
+        since: datetime | None = None,
+        before: datetime | None = None,
+        ascending: bool = False,
+        conversation_id: str | None = None,
+        before_run_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> list[dict]:
+        blocks = self.archive_collection_obj.find(
+            archive_blocks_query(
+                conversation_scope(user_id, agent_id, conversation_id), since=since, before=before,
+                before_run_id=before_run_id, since_run_id=since_run_id
+            )
+        ).sort(*archive_blocks_sort(ascending))
+
+        turns = []
+        async for block in blocks:
+            turns.extend(archived_block_turns(
+                block, since=since, before=before, ascending=ascending, before_run_id=before_run_id, since_run_id=since_run_id
+            ))
+
+            if limit and len(turns) >= limit:
+                await blocks.close()
+                return turns[:limit]
+
+        return turns
+
+    async def load_history_json(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = MONGODB_HISTORY_MAX_TURNS,
+        since: datetime | None = None,
+        include_summary: bool = True,
+        conversation_id: str | None = None,
+        include_archived: bool = False
+    ):
+        logger.info(f"Getting history for agent {agent_id}")
+        try:
+            use_cache = use_history_cache(self.history_cache, limit, since, include_summary, include_archived)
+            cached_window = await self.history_cache.load(user_id, agent_id, limit, conversation_id) if use_cache else None
+
+            if cached_window:
+                summary, history = cached_window
+            else:
+                cache_version = await self.history_cache.get_version(user_id, agent_id, conversation_id) if use_cache else None
+                summary = await self.load_summary(user_id, agent_id, conversation_id) if include_summary else None
+                since, since_run_id = history_since_summary(summary, since)
+
+                history = await self.find_history(
+                    user_id,
+                    agent_id,
+                    limit=REDIS_HISTORY_CACHE_MAX_TURNS if use_cache else limit,
+                    since=since,
+                    since_run_id=since_run_id,
+                    include_pending=True,
+                    conversation_id=conversation_id,
+                    include_archived=include_archived
+                )
+
+                if use_cache:
+                    await self.history_cache.populate(user_id, agent_id, cache_version, summary, history, conversation_id)
+                    history = history[:limit]
+
+            return build_history_messages(summary, history)
+
+        except Exception as e:
+            logger.error(f"Error to insert history do agent: {e}")
+            raise e
+
+    async def count_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        since: datetime | None = None,
+        conversation_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> int:
+        return await self.collection_obj.count_documents(
+            history_query(user_id, agent_id, since=since, conversation_id=conversation_id, since_run_id=since_run_id)
+        )
+
+    async def load_summary(self, user_id: str, agent_id: str, conversation_id: str | None = None) -> dict | None:
+        return await self.summary_collection_obj.find_one(
+            conversation_scope(user_id, agent_id, conversation_id),
+            SUMMARY_PROJECTION
+        )
+
+    async def save_summary(
+        self,
+        user_id: str,
+        agent_id: str,
+        summary: str,
+        summarized_until: datetime,
+        summarized_turns: int,
+        conversation_id: str | None = None,
+        summarized_until_run_id: str | None = None
+    ):
+        logger.info(f"Saving history summary for agent {agent_id}")
+        try:
+            await self.summary_collection_obj.update_one(
+                conversation_scope(user_id, agent_id, conversation_id),
+                summary_update(summary, summarized_until, summarized_turns, summarized_until_run_id),
+                upsert=True
+            )
+
+            if self.history_cache:
+                await self.history_cache.invalidate(user_id, agent_id, conversation_id)
+        except Exception as e:
+            logger.error(f"Error to save history summary: {e}")
+            raise e
+
+    async def get_history_page(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int,
+        cursor: datetime | None = None,
+        conversation_id: str | None = None,
+        include_archived: bool = False,
+        cursor_run_id: str | None = None
+    ) -> dict:
+        logger.info(f"Getting history page for agent {agent_id}")
+        try:
+            history = await self.find_history(
+                user_id,
+                agent_id,
+                limit=limit,
+                before=cursor,
+                include_pending=True,
+                projection=HISTORY_PAGE_PROJECTION,
+                conversation_id=conversation_id,
+                include_archived=include_archived,
+                before_run_id=cursor_run_id
+            )
+
+            return build_history_page(history, limit)
+
+        except Exception as e:
+            logger.error(f"Error to get history page: {e}")
+            raise e
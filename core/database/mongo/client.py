@@ -0,0 +1,96 @@
+import os
+import logging
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, AsyncMongoClient
+
+load_dotenv()
+
+DATABASE_URL_CONNECTION = os.getenv("MONGODB_STRING_CONNECTION")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 50))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 0))
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_clients: dict[str, MongoClient] = {}
+_async_clients: dict[str, AsyncMongoClient] = {}
+
+
+def _client_options() -> dict:
+    return {
+        "serverSelectionTimeoutMS": 30000,
+        "connectTimeoutMS": 30000,
+        "socketTimeoutMS": 30000,
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "retryWrites": True
+    }
+
+
+def get_mongo_client(connection_string: str | None = None) -> MongoClient:
+    """
+    Returns the process-wide MongoClient for the connection string, so every
+    DatabaseHandler shares the same connection pool and monitor threads.
+    """
+    connection_string = connection_string or DATABASE_URL_CONNECTION
+
+    client = _clients.get(connection_string)
+    if client is None:
+        with _lock:
+            client = _clients.get(connection_string)
+            if client is None:
+                logger.info("Starting Mongo client")
+                client = MongoClient(connection_string, **_client_options())
+                _clients[connection_string] = client
+
+    return client
+
+
+def get_async_mongo_client(connection_string: str | None = None) -> AsyncMongoClient:
+    """
+    Returns the process-wide AsyncMongoClient for the connection string. The
+    client is bound to the event loop that first uses it, which is the app loop
+    in the API and the persistent task loop in the Celery workers.
+    """
+    connection_string = connection_string or DATABASE_URL_CONNECTION
+
+    client = _async_clients.get(connection_string)
+    if client is None:
+        with _lock:
+            client = _async_clients.get(connection_string)
+            if client is None:
+                logger.info("Starting async Mongo client")
+                client = AsyncMongoClient(connection_string, **_client_options())
+                _async_clients[connection_string] = client
+
+    return client
+
+
+def close_mongo_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def close_async_mongo_clients():
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+
+    for client in clients:
+        await client.close()
+
+
+def _reset_after_fork():
+    # MongoClient is not fork-safe: the child (e.g. a Celery prefork worker) must
+    # open its own clients instead of reusing the parent's sockets and threads
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+    _async_clients.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
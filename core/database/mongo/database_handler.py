@@ -1,76 +1,727 @@
 import os
 import uuid
 import logging
+import threading
 
+from typing import Iterator
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
 from pydantic_ai.messages import (
+    ModelMessage,
     ModelRequest,
-    ModelResponse,
-    TextPart,
-    UserPromptPart,
+    SystemPromptPart,
 )
 
+from core.database.mongo.client import get_mongo_client
+from core.database.mongo.history_codec import HISTORY_MESSAGES_FORMAT, decode_history, encode_messages
+from core.database.mongo.history_buffer import MONGODB_HISTORY_WRITE_BEHIND, history_write_buffer
+from core.database.mongo.history_archive import (
+    ARCHIVE_INDEX_KEYS,
+    HISTORY_ARCHIVE_BLOCK_TURNS,
+    HISTORY_ARCHIVE_HOT_TURNS,
+    archive_blocks_query,
+    archive_blocks_sort,
+    archived_block_turns,
+    build_archive_block,
+    select_archived_turns,
+)
+from core.database.redis.history_cache import REDIS_HISTORY_CACHE_ENABLED, REDIS_HISTORY_CACHE_MAX_TURNS, HistoryCache
+
 load_dotenv()
 
-DATABASE_URL_CONNECTION = os.getenv("MONGODB_STRING_CONNECTION")
 DATABASE_NAME = os.getenv("MONGODB_DATABASE_NAME")
+MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
+MONGODB_HISTORY_MAX_TURNS = int(os.getenv("MONGODB_HISTORY_MAX_TURNS", 50))
+HISTORY_EXPORT_BATCH_SIZE = int(os.getenv("HISTORY_EXPORT_BATCH_SIZE", 500))
+
+HISTORY_SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+HISTORY_PAGE_PROJECTION = {"_id": 0, "runId": 1, "input": 1, "output": 1, "created_at": 1}
+HISTORY_PROJECTION = {**HISTORY_PAGE_PROJECTION, "messages": 1, "messages_format": 1, "message_count": 1}
+HISTORY_EXPORT_PROJECTION = {**HISTORY_PROJECTION, "conversation_id": 1}
 
 logger = logging.getLogger(__name__)
 
+_indexes_lock = threading.Lock()
+_indexed_collections: set[str] = set()
+
+HISTORY_INDEX_KEYS = [
+    ("user_id", ASCENDING), ("agent_id", ASCENDING), ("conversation_id", ASCENDING), ("created_at", DESCENDING), ("runId", DESCENDING)
+]
+HISTORY_INDEX_NAME = "user_agent_conversation_created_at_run"
+HISTORY_CURSOR_SEPARATOR = "_"
+SUMMARY_INDEX_KEYS = [("user_id", ASCENDING), ("agent_id", ASCENDING), ("conversation_id", ASCENDING)]
+CONVERSATION_KEYS = [("user_id", ASCENDING), ("agent_id", ASCENDING), ("conversation_id", ASCENDING)]
+CONVERSATION_INDEX_KEYS = [("user_id", ASCENDING), ("agent_id", ASCENDING), ("last_message_at", DESCENDING)]
+SUMMARY_PROJECTION = {"_id": 0, "summary": 1, "summarized_until": 1, "summarized_until_run_id": 1, "summarized_turns": 1}
+CONVERSATION_PROJECTION = {"_id": 0, "conversation_id": 1, "status": 1, "turns": 1, "created_at": 1, "last_message_at": 1, "closed_at": 1}
+
+CONVERSATION_OPEN = "open"
+CONVERSATION_CLOSED = "closed"
+
+def utc_now() -> datetime:
+    # pymongo returns naive UTC datetimes, so new documents use the same form. Mongo
+    # keeps milliseconds, so buffered turns get the created_at they will be stored with
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def build_history_document(
+    input: str,
+    output: str,
+    user_id: str,
+    agent_id: str,
+    messages: list[ModelMessage] | None = None,
+    conversation_id: str | None = None
+) -> dict:
+    document = {
+        "runId": str(uuid.uuid4()),
+        "agent_id": str(agent_id),
+        "user_id": str(user_id),
+        "conversation_id": conversation_id,
+        "input": input, 
+        "output": output,
+        "created_at": utc_now()
+    }
+
+    if messages:
+        document["messages"], document["message_count"] = encode_messages(messages)
+        document["messages_format"] = HISTORY_MESSAGES_FORMAT
+
+    return document
+
+def conversation_scope(user_id: str, agent_id: str, conversation_id: str | None = None) -> dict:
+    # Turns sent without a conversation_id (and the ones stored before it existed)
+    # form the default conversation, matched by the missing/null field
+    return {
+        "agent_id": str(agent_id),
+        "user_id": str(user_id),
+        "conversation_id": conversation_id
+    }
+
+def history_query(
+    user_id: str,
+    agent_id: str,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    conversation_id: str | None = None,
+    before_run_id: str | None = None,
+    since_run_id: str | None = None
+) -> dict:
+    query = conversation_scope(user_id, agent_id, conversation_id)
+
+    if since or before:
+        # Turns sharing the since/before created_at are ordered by runId when it is given
+        query["created_at"] = {}
+        excluded = []
+        if since and since_run_id:
+            query["created_at"]["$gte"] = since
+            excluded.append({"created_at": since, "runId": {"$lte": since_run_id}})
+        elif since:
+            query["created_at"]["$gt"] = since
+        if before and before_run_id:
+            query["created_at"]["$lte"] = before
+            excluded.append({"created_at": before, "runId": {"$gte": before_run_id}})
+        elif before:
+            query["created_at"]["$lt"] = before
+        if excluded:
+            query["$nor"] = excluded
+
+    return query
+
+def history_sort(ascending: bool = False) -> list[tuple[str, int]]:
+    direction = ASCENDING if ascending else DESCENDING
+    return [("created_at", direction), ("runId", direction)]
+
+def parse_history_cursor(cursor: str) -> tuple[datetime, str | None]:
+    # Cursors from before runId was added hold only the created_at
+    created_at, _, run_id = cursor.partition(HISTORY_CURSOR_SEPARATOR)
+    return datetime.fromisoformat(created_at), run_id or None
+
+def merge_pending_history(
+    history: list[dict],
+    pending: list[dict],
+    projection: dict,
+    ascending: bool = False,
+    limit: int | None = None
+) -> list[dict]:
+    if not pending:
+        return history
+
+    stored_runs = {message.get("runId") for message in history}
+    history = history + [
+        {key: message.get(key) for key in projection if key != "_id" and key in message}
+        for message in pending if message.get("runId") not in stored_runs
+    ]
+    history.sort(key=lambda message: (message.get("created_at") or datetime.min, message.get("runId") or ""), reverse=not ascending)
+    return history[:limit] if limit else history
+
+def with_pending_history(
+    collection_obj,
+    history: list[dict],
+    projection: dict,
+    user_id: str,
+    agent_id: str,
+    limit: int | None = None,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    ascending: bool = False,
+    conversation_id: str | None = None,
+    before_run_id: str | None = None,
+    since_run_id: str | None = None
+) -> list[dict]:
+    # Only the turns buffered by this process are visible, see HistoryWriteBuffer.pending
+    if not MONGODB_HISTORY_WRITE_BEHIND:
+        return history
+
+    pending = history_write_buffer.pending(
+        collection_obj, user_id, agent_id, since=since, before=before, conversation_id=conversation_id,
+        before_run_id=before_run_id, since_run_id=since_run_id
+    )
+    return merge_pending_history(history, pending, projection, ascending=ascending, limit=limit)
+
+def use_history_cache(
+    history_cache,
+    limit: int | None,
+    since: datetime | None,
+    include_summary: bool,
+    include_archived: bool
+) -> bool:
+    # The cache holds the newest turns after the summary, so only that window is served from it
+    return bool(
+        history_cache and include_summary and since is None and not include_archived
+        and limit and limit <= REDIS_HISTORY_CACHE_MAX_TURNS
+    )
+
+def history_since_summary(summary: dict | None, since: datetime | None = None) -> tuple[datetime | None, str | None]:
+    # Turns folded into the summary are not loaded again. The summary ends at a
+    # (created_at, runId) position, so turns sharing its created_at are kept
+    if not summary or not summary.get("summarized_until"):
+        return since, None
+    if since and since >= summary["summarized_until"]:
+        return since, None
+    return summary["summarized_until"], summary.get("summarized_until_run_id")
+
+def build_history_messages(summary: dict | None, history: list[dict]) -> list[ModelMessage]:
+    loaded_messages = []
+
+    if summary:
+        loaded_messages.append(
+            ModelRequest(parts=[SystemPromptPart(content=f"{HISTORY_SUMMARY_PREFIX}{summary.get('summary')}")]),
+        )
+
+    loaded_messages.extend(decode_history(list(reversed(history))))
+
+    return loaded_messages
+
+def conversation_touch(created_at: datetime) -> dict:
+    return {
+        "$setOnInsert": {"status": CONVERSATION_OPEN, "created_at": created_at},
+        "$set": {"last_message_at": created_at},
+        "$inc": {"turns": 1}
+    }
+
+def conversation_upsert(document: dict) -> tuple[dict, dict]:
+    # Filter and update that count a new turn in its conversation
+    return (
+        conversation_scope(document["user_id"], document["agent_id"], document["conversation_id"]),
+        conversation_touch(document["created_at"])
+    )
+
+def conversations_query(
+    user_id: str,
+    agent_id: str,
+    status: str | None = None,
+    before: datetime | None = None
+) -> dict:
+    query = {"agent_id": str(agent_id), "user_id": str(user_id)}
+
+    if status:
+        query["status"] = status
+    if before:
+        query["last_message_at"] = {"$lt": before}
+
+    return query
+
+def summary_update(
+    summary: str,
+    summarized_until: datetime,
+    summarized_turns: int,
+    summarized_until_run_id: str | None = None
+) -> dict:
+    return {
+        "$set": {
+            "summary": summary,
+            "summarized_until": summarized_until,
+            "summarized_until_run_id": summarized_until_run_id,
+            "updated_at": utc_now()
+        },
+        "$inc": {"summarized_turns": summarized_turns}
+    }
+
+def build_history_page(history: list[dict], limit: int) -> dict:
+    items = [
+        {
+            "run_id": message.get("runId"),
+            "input": message.get("input"),
+            "output": message.get("output"),
+            "created_at": message.get("created_at"),
+        }
+        for message in history
+    ]
+
+    next_cursor = None
+    if len(items) == limit and items[-1]["created_at"]:
+        next_cursor = f"{items[-1]['created_at'].isoformat()}{HISTORY_CURSOR_SEPARATOR}{items[-1]['run_id']}"
+
+    return {"items": items, "next_cursor": next_cursor}
+
+def history_collection_names(collection: str) -> tuple[str, str, str]:
+    return (
+        os.getenv("MONGODB_SUMMARY_COLLECTION") or f"{collection}_summaries",
+        os.getenv("MONGODB_CONVERSATION_COLLECTION") or f"{collection}_conversations",
+        os.getenv("MONGODB_ARCHIVE_COLLECTION") or f"{collection}_archive",
+    )
+
+def ensure_history_indexes(collection: str = MONGO_HISTORY_COLLECTION):
+    """
+    Creates the history indexes once per process and collection with the sync
+    client, for DatabaseHandler and AsyncDatabaseHandler alike.
+    """
+    if collection in _indexed_collections:
+        return
+
+    with _indexes_lock:
+        if collection in _indexed_collections:
+            return
+
+        logger.info(f"Ensuring indexes for collection {collection}")
+        database = get_mongo_client()[DATABASE_NAME]
+        summary_collection, conversation_collection, archive_collection = history_collection_names(collection)
+        try:
+            database[collection].create_index(HISTORY_INDEX_KEYS, name=HISTORY_INDEX_NAME)
+            database[collection].create_index("created_at", name="created_at")
+            database[summary_collection].create_index(SUMMARY_INDEX_KEYS, name="user_agent_conversation", unique=True)
+            database[conversation_collection].create_index(CONVERSATION_KEYS, name="user_agent_conversation", unique=True)
+            database[conversation_collection].create_index(CONVERSATION_INDEX_KEYS, name="user_agent_last_message_at")
+            database[archive_collection].create_index(ARCHIVE_INDEX_KEYS, name="user_agent_conversation_last_created_at")
+            _indexed_collections.add(collection)
+        except Exception as e:
+            logger.error(f"Error to create history indexes: {e}")
+
 class DatabaseHandler:
     def __init__(self, collection):
         logger.info(f"Starting Mongo Database for collection {collection}")
         self.collection = collection
-        self.client = MongoClient(
-            DATABASE_URL_CONNECTION,
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000,
-            maxPoolSize=10,
-            retryWrites=True
-        )
+        self.client = get_mongo_client()
         self.database = self.client[DATABASE_NAME]
         self.collection_obj = self.database[self.collection]
+        self.summary_collection, self.conversation_collection, self.archive_collection = history_collection_names(self.collection)
+        self.summary_collection_obj = self.database[self.summary_collection]
+        self.conversation_collection_obj = self.database[self.conversation_collection]
+        self.archive_collection_obj = self.database[self.archive_collection]
+        self.history_cache = HistoryCache() if REDIS_HISTORY_CACHE_ENABLED else None
+        ensure_history_indexes(self.collection)
 
-    def insert_history(self, input: str, output: str, user_id: str, agent_id: str):
+    def insert_history(
+        self,
+        input: str,
+        output: str,
+        user_id: str,
+        agent_id: str,
+        messages: list[ModelMessage] | None = None,
+        conversation_id: str | None = None
+    ):
         logger.info(f"Inserting history for agent {agent_id}")
         try:
-            self.collection_obj.insert_one({
-                "runId": str(uuid.uuid4()),
-                "agent_id": str(agent_id),
-                "user_id": str(user_id),
-                "input": input, 
-                "output": output
-            })
+            document = build_history_document(input, output, user_id, agent_id, messages, conversation_id)
+
+            if MONGODB_HISTORY_WRITE_BEHIND:
+                history_write_buffer.add(self.collection_obj, document)
+            else:
+                self.collection_obj.insert_one(document)
+
+            if conversation_id:
+                self.conversation_collection_obj.update_one(*conversation_upsert(document), upsert=True)
+
+            if self.history_cache:
+                self.history_cache.append(user_id, agent_id, document, conversation_id)
         except Exception as e:
             logger.error(f"Error to insert history do agent: {e}")
             raise e
+
+    def find_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = None,
+        since: datetime | None = None,
+        before: datetime | None = None,
+        ascending: bool = False,
+        include_pending: bool = False,
+        projection: dict = HISTORY_PROJECTION,
+        conversation_id: str | None = None,
+        include_archived: bool = False,
+        before_run_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> list[dict]:
+        """
+        Returns the newest history documents of the conversation first (oldest
+        first if ascending), using the (user_id, agent_id, conversation_id,
+        created_at, runId) index. before_run_id makes before a (created_at,
+        runId) position. include_pending adds the turns still waiting in the
+        write-behind buffer of this process (not those buffered by other
+        processes), include_archived the turns moved to the archive.
+        """
+        query = history_query(
+            user_id, agent_id, since=since, before=before, conversation_id=conversation_id,
+            before_run_id=before_run_id, since_run_id=since_run_id
+        )
+
+        history = self.collection_obj.find(query, projection).sort(history_sort(ascending))
+
+        if limit:
+            history = history.limit(limit)
+
+        history = list(history)
+
+        if include_pending:
+            history = with_pending_history(
+                self.collection_obj, history, projection, user_id, agent_id, limit=limit, since=since,
+                before=before, ascending=ascending, conversation_id=conversation_id, before_run_id=before_run_id,
+                since_run_id=since_run_id
+            )
+
+        if include_archived:
+            archived = self.find_archived_history(
+                user_id, agent_id, limit=limit, since=since, before=before,
+                ascending=ascending, conversation_id=conversation_id, before_run_id=before_run_id,
+                since_run_id=since_run_id
+            )
+            history = merge_pending_history(history, archived, projection, ascending=ascending, limit=limit)
+
+        return history
+
+    def find_archived_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = None,
+        since: datetime | None = None,
+        before: datetime | None = None,
+        ascending: bool = False,
+        conversation_id: str | None = None,
+        before_run_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> list[dict]:
+        blocks = self.archive_collection_obj.find(
+            archive_blocks_query(
+                conversation_scope(user_id, agent_id, conversation_id), since=since, before=before,
+                before_run_id=before_run_id, since_run_id=since_run_id
+            )
+        ).sort(*archive_blocks_sort(ascending))
+
+        return select_archived_turns(
+            blocks, limit=limit, since=since, before=before, ascending=ascending, before_run_id=before_run_id, since_run_id=since_run_id
+        )
      
-    def load_history_json(self, user_id: str, agent_id: str):
+    def load_history_json(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int | None = MONGODB_HISTORY_MAX_TURNS,
+        since: datetime | None = None,
+        include_summary: bool = True,
+        conversation_id: str | None = None,
+        include_archived: bool = False
+    ):
         logger.info(f"Getting history for agent {agent_id}")
         try:
-            history = self.collection_obj.find({
-                "agent_id": str(agent_id),
-                "user_id": str(user_id)
-            })
-
-            loaded_messages = []
-
-            for message in history:
-                
-                # User input
-                loaded_messages.append(
-                    ModelRequest(parts=[UserPromptPart(content=message.get("input"))]),
-                )
+            use_cache = use_history_cache(self.history_cache, limit, since, include_summary, include_archived)
+            cached_window = self.history_cache.load(user_id, agent_id, limit, conversation_id) if use_cache else None
 
-                #Ai response
-                loaded_messages.append(
-                    ModelResponse(parts=[TextPart(content=message.get("output"))]),
+            if cached_window:
+                summary, history = cached_window
+            else:
+                cache_version = self.history_cache.get_version(user_id, agent_id, conversation_id) if use_cache else None
+                summary = self.load_summary(user_id, agent_id, conversation_id) if include_summary else None
+                since, since_run_id = history_since_summary(summary, since)
+
+                history = self.find_history(
+                    user_id,
+                    agent_id,
+                    limit=REDIS_HISTORY_CACHE_MAX_TURNS if use_cache else limit,
+                    since=since,
+                    since_run_id=since_run_id,
+                    include_pending=True,
+                    conversation_id=conversation_id,
+                    include_archived=include_archived
                 )
 
-            return loaded_messages
+                if use_cache:
+                    self.history_cache.populate(user_id, agent_id, cache_version, summary, history, conversation_id)
+                    history = history[:limit]
+
+            return build_history_messages(summary, history)
 
         except Exception as e:
             logger.error(f"Error to insert history do agent: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def count_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        since: datetime | None = None,
+        conversation_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> int:
+        return self.collection_obj.count_documents(
+            history_query(user_id, agent_id, since=since, conversation_id=conversation_id, since_run_id=since_run_id)
+        )
+
+    def load_summary(self, user_id: str, agent_id: str, conversation_id: str | None = None) -> dict | None:
+        return self.summary_collection_obj.find_one(
+            conversation_scope(user_id, agent_id, conversation_id),
+            SUMMARY_PROJECTION
+        )
+
+    def save_summary(
+        self,
+        user_id: str,
+        agent_id: str,
+        summary: str,
+        summarized_until: datetime,
+        summarized_turns: int,
+        conversation_id: str | None = None,
+        summarized_until_run_id: str | None = None
+    ):
+        logger.info(f"Saving history summary for agent {agent_id}")
+        try:
+            self.summary_collection_obj.update_one(
+                conversation_scope(user_id, agent_id, conversation_id),
+                summary_update(summary, summarized_until, summarized_turns, summarized_until_run_id),
+                upsert=True
+            )
+
+            # The cached window still holds the turns that were just summarized
+            if self.history_cache:
+                self.history_cache.invalidate(user_id, agent_id, conversation_id)
+        except Exception as e:
+            logger.error(f"Error to save history summary: {e}")
+            raise e
+
+    def get_history_page(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int,
+        cursor: datetime | None = None,
+        conversation_id: str | None = None,
+        include_archived: bool = False,
+        cursor_run_id: str | None = None
+    ) -> dict:
+        logger.info(f"Getting history page for agent {agent_id}")
+        try:
+            history = self.find_history(
+                user_id,
+                agent_id,
+                limit=limit,
+                before=cursor,
+                include_pending=True,
+                projection=HISTORY_PAGE_PROJECTION,
+                conversation_id=conversation_id,
+                include_archived=include_archived,
+                before_run_id=cursor_run_id
+            )
+
+            return build_history_page(history, limit)
+
+        except Exception as e:
+            logger.error(f"Error to get history page: {e}")
+            raise e
+
+    def iter_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        conversation_id: str | None = None,
+        batch_size: int = HISTORY_EXPORT_BATCH_SIZE,
+        include_archived: bool = False,
+        projection: dict = HISTORY_EXPORT_PROJECTION,
+        default_conversation: bool = False
+    ) -> Iterator[dict]:
+        """
+        Yields every turn of the agent from server-side cursors, fetching
+        batch_size documents per round trip, so memory does not grow with the
+        history size. Turns come ordered by (conversation_id, created_at,
+        runId), the default conversation first. conversation_id, or
+        default_conversation for the default one, exports a single conversation.
+        """
+        if conversation_id or default_conversation:
+            conversation_ids = [conversation_id]
+        else:
+            conversation_ids = self.history_conversation_ids(user_id, agent_id, include_archived)
+
+        for conversation in conversation_ids:
+            yield from self._iter_conversation_history(user_id, agent_id, conversation, batch_size, include_archived, projection)
+
+    def history_conversation_ids(self, user_id: str, agent_id: str, include_archived: bool = False) -> list[str | None]:
+        # Turns without a conversation_id are missing from distinct, so the default conversation is always listed
+        scope = {"agent_id": str(agent_id), "user_id": str(user_id)}
+        conversation_ids = set(self.collection_obj.distinct("conversation_id", scope))
+        if include_archived:
+            conversation_ids.update(self.archive_collection_obj.distinct("conversation_id", scope))
+        conversation_ids.discard(None)
+        return [None, *sorted(conversation_ids)]
+
+    def _iter_conversation_history(
+        self,
+        user_id: str,
+        agent_id: str,
+        conversation_id: str | None,
+        batch_size: int,
+        include_archived: bool,
+        projection: dict
+    ) -> Iterator[dict]:
+        since = since_run_id = None
+
+        if include_archived:
+            blocks = self.archive_collection_obj.find(
+                archive_blocks_query(conversation_scope(user_id, agent_id, conversation_id))
+            ).sort(*archive_blocks_sort(ascending=True)).batch_size(max(1, batch_size // HISTORY_ARCHIVE_BLOCK_TURNS))
+
+            with blocks:
+                for block in blocks:
+                    for turn in archived_block_turns(block, ascending=True):
+                        # Hot turns are always newer, except copies left by an interrupted archive
+                        # run. The runId keeps hot turns stored in the same millisecond
+                        since, since_run_id = turn["created_at"], turn.get("runId")
+                        yield turn
+
+        history = self.collection_obj.find(
+            history_query(user_id, agent_id, since=since, conversation_id=conversation_id, since_run_id=since_run_id), projection
+        ).sort(history_sort(ascending=True)).batch_size(batch_size)
+
+        with history:
+            yield from history
+
+    def get_conversation(self, user_id: str, agent_id: str, conversation_id: str) -> dict | None:
+        return self.conversation_collection_obj.find_one(
+            conversation_scope(user_id, agent_id, conversation_id),
+            CONVERSATION_PROJECTION
+        )
+
+    def list_conversations(
+        self,
+        user_id: str,
+        agent_id: str,
+        limit: int,
+        cursor: datetime | None = None,
+        status: str | None = None
+    ) -> dict:
+        logger.info(f"Listing conversations for agent {agent_id}")
+        try:
+            conversations = list(
+                self.conversation_collection_obj.find(
+                    conversations_query(user_id, agent_id, status=status, before=cursor),
+                    CONVERSATION_PROJECTION
+                ).sort("last_message_at", DESCENDING).limit(limit)
+            )
+
+            next_cursor = None
+            if len(conversations) == limit and conversations[-1].get("last_message_at"):
+                next_cursor = conversations[-1]["last_message_at"].isoformat()
+
+            return {"items": conversations, "next_cursor": next_cursor}
+
+        except Exception as e:
+            logger.error(f"Error to list conversations: {e}")
+            raise e
+
+    def close_conversation(self, user_id: str, agent_id: str, conversation_id: str) -> dict | None:
+        logger.info(f"Closing conversation {conversation_id} of agent {agent_id}")
+        try:
+            conversation = self.conversation_collection_obj.find_one_and_update(
+                conversation_scope(user_id, agent_id, conversation_id),
+                {"$set": {"status": CONVERSATION_CLOSED, "closed_at": utc_now()}},
+                projection=CONVERSATION_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+
+            # A closed conversation is not loaded again, so its window can go
+            if conversation and self.history_cache:
+                self.history_cache.invalidate(user_id, agent_id, conversation_id)
+
+            return conversation
+
+        except Exception as e:
+            logger.error(f"Error to close conversation: {e}")
+            raise e
+
+    def archive_history(
+        self,
+        older_than: datetime,
+        keep_turns: int = HISTORY_ARCHIVE_HOT_TURNS,
+        block_turns: int = HISTORY_ARCHIVE_BLOCK_TURNS
+    ) -> int:
+        """
+        Moves the turns created before older_than into compressed per-conversation
+        blocks of the archive collection, keeping the newest keep_turns of every
+        conversation hot. Returns the number of archived turns.
+        """
+        logger.info(f"Archiving history older than {older_than} from {self.collection}")
+        try:
+            conversations = self.collection_obj.aggregate([
+                {"$match": {"created_at": {"$lt": older_than}}},
+                {"$group": {"_id": {
+                    "user_id": "$user_id",
+                    "agent_id": "$agent_id",
+                    "conversation_id": {"$ifNull": ["$conversation_id", None]}
+                }}}
+            ])
+
+            return sum(
+                self._archive_conversation(conversation["_id"], older_than, keep_turns, block_turns)
+                for conversation in conversations
+            )
+
+        except Exception as e:
+            logger.error(f"Error to archive history: {e}")
+            raise e
+
+    def _archive_conversation(self, scope: dict, older_than: datetime, keep_turns: int, block_turns: int) -> int:
+        query = conversation_scope(scope["user_id"], scope["agent_id"], scope["conversation_id"])
+
+        archive_until = older_than
+        if keep_turns:
+            hot_boundary = list(
+                self.collection_obj.find(query, {"_id": 0, "created_at": 1})
+                .sort("created_at", DESCENDING).skip(keep_turns - 1).limit(1)
+            )
+            if not hot_boundary:
+                return 0
+            archive_until = min(archive_until, hot_boundary[0]["created_at"])
+
+        archived_turns = 0
+
+        while True:
+            turns = list(
+                self.collection_obj.find({**query, "created_at": {"$lt": archive_until}})
+                .sort(history_sort(ascending=True)).limit(block_turns)
+            )
+            if not turns:
+                break
+
+            # Written before deleting: a crash in between leaves the turns in both
+            # collections, which archived loads dedupe by runId, instead of losing them
+            self.archive_collection_obj.insert_one(
+                build_archive_block(query["user_id"], query["agent_id"], query["conversation_id"], turns, utc_now())
+            )
+            self.collection_obj.delete_many({"_id": {"$in": [turn["_id"] for turn in turns]}})
+            archived_turns += len(turns)
+
+            if len(turns) < block_turns:
+                break
+
+        return archived_turns
@@ -0,0 +1,160 @@
+import os
+import logging
+import importlib.util
+
+from datetime import datetime, timedelta
+from typing import Iterable
+
+import bson
+
+from bson.binary import Binary
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING
+
+load_dotenv()
+
+HISTORY_ARCHIVE_ENABLED = os.getenv("HISTORY_ARCHIVE_ENABLED", "false").lower() == "true"
+HISTORY_ARCHIVE_AFTER_DAYS = float(os.getenv("HISTORY_ARCHIVE_AFTER_DAYS", 30))
+HISTORY_ARCHIVE_HOT_TURNS = int(os.getenv("HISTORY_ARCHIVE_HOT_TURNS", 20))
+HISTORY_ARCHIVE_BLOCK_TURNS = int(os.getenv("HISTORY_ARCHIVE_BLOCK_TURNS", 100))
+HISTORY_ARCHIVE_INTERVAL = float(os.getenv("HISTORY_ARCHIVE_INTERVAL", 3600))
+HISTORY_ARCHIVE_ZSTD_LEVEL = int(os.getenv("HISTORY_ARCHIVE_ZSTD_LEVEL", 10))
+
+HISTORY_ARCHIVE_FORMAT = "bson+zstd"
+
+ARCHIVE_INDEX_KEYS = [
+    ("user_id", ASCENDING), ("agent_id", ASCENDING), ("conversation_id", ASCENDING), ("last_created_at", DESCENDING)
+]
+
+logger = logging.getLogger(__name__)
+
+
+def check_archive_dependencies():
+    # Fails at startup instead of inside every archive run of a misbuilt image
+    if HISTORY_ARCHIVE_ENABLED and importlib.util.find_spec("zstandard") is None:
+        raise RuntimeError("HISTORY_ARCHIVE_ENABLED needs zstandard, install requirements-optional.txt")
+
+
+def archive_cutoff(now: datetime, after_days: float = HISTORY_ARCHIVE_AFTER_DAYS) -> datetime:
+    return now - timedelta(days=after_days)
+
+
+def encode_archive_block(turns: list[dict]) -> Binary:
+    # Only the archive task and archived loads need zstd, so zstandard is an
+    # optional requirement, see check_archive_dependencies
+    import zstandard
+
+    data = bson.encode({"turns": [{key: value for key, value in turn.items() if key != "_id"} for turn in turns]})
+    return Binary(zstandard.ZstdCompressor(level=HISTORY_ARCHIVE_ZSTD_LEVEL).compress(data))
+
+
+def decode_archive_block(block: dict) -> list[dict]:
+    import zstandard
+
+    data = zstandard.ZstdDecompressor().decompress(block["data"])
+    return bson.decode(data)["turns"]
+
+
+def build_archive_block(user_id: str, agent_id: str, conversation_id: str | None, turns: list[dict], created_at: datetime) -> dict:
+    """
+    One archive document holds a run of consecutive turns (oldest first) of a
+    single conversation, compressed together so similar turns share the dictionary.
+    """
+    return {
+        "user_id": user_id,
+        "agent_id": agent_id,
+        "conversation_id": conversation_id,
+        "first_created_at": turns[0]["created_at"],
+        "last_created_at": turns[-1]["created_at"],
+        "turn_count": len(turns),
+        "format": HISTORY_ARCHIVE_FORMAT,
+        "data": encode_archive_block(turns),
+        "created_at": created_at
+    }
+
+
+def turn_before(turn: dict, before: datetime | None = None, before_run_id: str | None = None) -> bool:
+    """
+    Whether the turn comes before the (created_at, runId) position, or before
+    created_at alone when no run id is given.
+    """
+    if before is None:
+        return True
+    if before_run_id is None or turn["created_at"] != before:
+        return turn["created_at"] < before
+    return turn.get("runId", "") < before_run_id
+
+
+def turn_after(turn: dict, since: datetime | None = None, since_run_id: str | None = None) -> bool:
+    """
+    Whether the turn comes after the (created_at, runId) position, or after
+    created_at alone when no run id is given.
+    """
+    if since is None:
+        return True
+    if since_run_id is None or turn["created_at"] != since:
+        return turn["created_at"] > since
+    return turn.get("runId", "") > since_run_id
+
+
+def archive_blocks_query(
+    scope: dict,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    before_run_id: str | None = None,
+    since_run_id: str | None = None
+) -> dict:
+    query = dict(scope)
+
+    if since:
+        query["last_created_at"] = {"$gte" if since_run_id else "$gt": since}
+    if before:
+        # Turns created at the same time as the cursor may still come before it
+        query["first_created_at"] = {"$lte" if before_run_id else "$lt": before}
+
+    return query
+
+
+def archive_blocks_sort(ascending: bool = False) -> tuple[str, int]:
+    return ("first_created_at", ASCENDING) if ascending else ("last_created_at", DESCENDING)
+
+
+def archived_block_turns(
+    block: dict,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    ascending: bool = False,
+    before_run_id: str | None = None,
+    since_run_id: str | None = None
+) -> list[dict]:
+    turns = [
+        turn for turn in decode_archive_block(block)
+        if turn_after(turn, since, since_run_id) and turn_before(turn, before, before_run_id)
+    ]
+    return turns if ascending else turns[::-1]
+
+
+def select_archived_turns(
+    blocks: Iterable[dict],
+    limit: int | None = None,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    ascending: bool = False,
+    before_run_id: str | None = None,
+    since_run_id: str | None = None
+) -> list[dict]:
+    """
+    Decodes blocks in the requested order until limit turns inside the
+    since/before bounds are collected. Blocks of a conversation never overlap.
+    """
+    turns = []
+
+    for block in blocks:
+        turns.extend(archived_block_turns(
+            block, since=since, before=before, ascending=ascending, before_run_id=before_run_id, since_run_id=since_run_id
+        ))
+
+        if limit and len(turns) >= limit:
+            return turns[:limit]
+
+    return turns
@@ -0,0 +1,168 @@
+import os
+import atexit
+import logging
+import threading
+
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError
+from pymongo.collection import Collection
+
+from core.database.mongo.history_archive import turn_after, turn_before
+
+load_dotenv()
+
+DUPLICATE_KEY_ERROR = 11000
+
+MONGODB_HISTORY_WRITE_BEHIND = os.getenv("MONGODB_HISTORY_WRITE_BEHIND", "false").lower() == "true"
+HISTORY_BUFFER_MAX_SIZE = int(os.getenv("HISTORY_BUFFER_MAX_SIZE", 100))
+HISTORY_BUFFER_FLUSH_INTERVAL = float(os.getenv("HISTORY_BUFFER_FLUSH_INTERVAL", 1.0))
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriteBuffer:
+    """
+    Collects history documents per process and writes them with insert_many
+    when the buffer is full or the flush interval elapses, off the request path.
+    Buffered and in-flight documents stay readable through pending(), but only
+    in this process: other API or worker processes see a turn once it is flushed.
+    """
+
+    def __init__(self, max_size: int = HISTORY_BUFFER_MAX_SIZE, flush_interval: float = HISTORY_BUFFER_FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._collections: dict[str, Collection] = {}
+        self._buffered: dict[str, list[dict]] = {}
+        self._inflight: dict[str, list[dict]] = {}
+        self._size = 0
+        self._flush_failed = False
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def add(self, collection_obj: Collection, document: dict):
+        with self._condition:
+            self._start_thread()
+            self._collections[collection_obj.full_name] = collection_obj
+            self._buffered.setdefault(collection_obj.full_name, []).append(document)
+            self._size += 1
+
+            if self._size >= self.max_size:
+                self._condition.notify()
+
+    def pending(
+        self,
+        collection_obj: Collection,
+        user_id: str,
+        agent_id: str,
+        since: datetime | None = None,
+        before: datetime | None = None,
+        conversation_id: str | None = None,
+        before_run_id: str | None = None,
+        since_run_id: str | None = None
+    ) -> list[dict]:
+        # Read-your-writes holds within this process only, nothing is shared across processes
+        with self._condition:
+            documents = [
+                *self._inflight.get(collection_obj.full_name, []),
+                *self._buffered.get(collection_obj.full_name, []),
+            ]
+
+        return [
+            document for document in documents
+            if document.get("user_id") == str(user_id)
+            and document.get("agent_id") == str(agent_id)
+            and document.get("conversation_id") == conversation_id
+            and turn_after(document, since, since_run_id)
+            and turn_before(document, before, before_run_id)
+        ]
+
+    def flush(self):
+        with self._flush_lock:
+            with self._condition:
+                if not self._size:
+                    return
+                self._inflight = self._buffered
+                self._buffered = {}
+                self._size = 0
+                self._flush_failed = False
+
+            for collection_name, documents in self._inflight.items():
+                try:
+                    self._collections[collection_name].insert_many(documents, ordered=False)
+                    logger.info(f"Flushed {len(documents)} history documents to {collection_name}")
+                except BulkWriteError as e:
+                    # Unordered inserts keep going after an error, so only the failed
+                    # documents are retried; duplicates were already written earlier
+                    logger.error(f"Error to flush history documents to {collection_name}: {e}")
+                    failed_documents = [
+                        documents[error["index"]] for error in e.details.get("writeErrors", [])
+                        if error.get("code") != DUPLICATE_KEY_ERROR
+                    ]
+                    self._requeue(collection_name, failed_documents)
+                except Exception as e:
+                    # Keep the documents for the next flush instead of losing the turns
+                    logger.error(f"Error to flush history documents to {collection_name}: {e}")
+                    self._requeue(collection_name, documents)
+
+            with self._condition:
+                self._inflight = {}
+
+    def _requeue(self, collection_name: str, documents: list[dict]):
+        if not documents:
+            return
+
+        with self._condition:
+            self._buffered.setdefault(collection_name, [])[:0] = documents
+            self._size += len(documents)
+            self._flush_failed = True
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 5)
+
+        self.flush()
+
+    def _start_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="history-write-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # After a failed flush wait a full interval instead of retrying right away
+                if not self._closed and (self._size < self.max_size or self._flush_failed):
+                    self._condition.wait(timeout=self.flush_interval)
+                closed = self._closed
+
+            self.flush()
+
+            if closed:
+                return
+
+    def _reset_after_fork(self):
+        # The parent keeps flushing its own documents, the child starts empty
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._collections = {}
+        self._buffered = {}
+        self._inflight = {}
+        self._size = 0
+        self._flush_failed = False
+        self._thread = None
+        self._closed = False
+
+
+history_write_buffer = HistoryWriteBuffer()
+
+os.register_at_fork(after_in_child=history_write_buffer._reset_after_fork)
+atexit.register(history_write_buffer.close)
@@ -0,0 +1,106 @@
+import json
+import zlib
+import logging
+
+from dataclasses import replace
+
+from bson import Binary
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_MESSAGES_FORMAT = "pydantic-ai-json+zlib"
+
+
+def encode_messages(messages: list[ModelMessage]) -> tuple[Binary, int]:
+    """
+    Serializes the messages of one run, tool calls and returns included, as
+    zlib-compressed pydantic-ai JSON. System prompts are agent configuration,
+    not conversation, so they are not stored.
+    """
+    stored_messages = []
+
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            parts = [part for part in message.parts if not isinstance(part, SystemPromptPart)]
+            if not parts:
+                continue
+            if len(parts) != len(message.parts):
+                message = replace(message, parts=parts)
+
+        stored_messages.append(message)
+
+    data = ModelMessagesTypeAdapter.dump_json(stored_messages)
+    return Binary(zlib.compress(data)), len(stored_messages)
+
+
+def _legacy_messages(document: dict) -> list[ModelMessage]:
+    return [
+        ModelRequest(parts=[UserPromptPart(content=document.get("input"))]),
+        ModelResponse(parts=[TextPart(content=document.get("output"))]),
+    ]
+
+
+def decode_history(documents: list[dict]) -> list[ModelMessage]:
+    """
+    Rebuilds the messages of the history documents (oldest first). All stored
+    message arrays are joined and validated in one pass; documents written before
+    the messages were stored fall back to their input/output strings.
+    """
+    encoded_arrays = []
+    layout = []
+
+    for document in documents:
+        if document.get("messages_format") == HISTORY_MESSAGES_FORMAT and document.get("messages"):
+            array = zlib.decompress(document["messages"])[1:-1]
+            if array:
+                encoded_arrays.append(array)
+                layout.append(document.get("message_count", 0))
+        else:
+            layout.append(document)
+
+    decoded_messages = ModelMessagesTypeAdapter.validate_json(b"[" + b",".join(encoded_arrays) + b"]")
+
+    loaded_messages = []
+    position = 0
+
+    for entry in layout:
+        if isinstance(entry, dict):
+            loaded_messages.extend(_legacy_messages(entry))
+        else:
+            loaded_messages.extend(decoded_messages[position:position + entry])
+            position += entry
+
+    return loaded_messages
+
+
+def encode_export_line(document: dict, include_messages: bool = False) -> bytes:
+    """
+    One NDJSON line per turn. Stored messages are already pydantic-ai JSON, so
+    they are spliced in as decompressed instead of being validated and dumped again.
+    """
+    created_at = document.get("created_at")
+    line = json.dumps({
+        "run_id": document.get("runId"),
+        "conversation_id": document.get("conversation_id"),
+        "input": document.get("input"),
+        "output": document.get("output"),
+        "created_at": created_at.isoformat() if created_at else None,
+    }).encode()
+
+    if include_messages:
+        if document.get("messages_format") == HISTORY_MESSAGES_FORMAT and document.get("messages"):
+            messages = zlib.decompress(document["messages"])
+        else:
+            messages = ModelMessagesTypeAdapter.dump_json(_legacy_messages(document))
+        line = line[:-1] + b', "messages": ' + messages + b"}"
+
+    return line + b"\n"
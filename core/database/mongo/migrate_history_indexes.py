@@ -0,0 +1,68 @@
+"""
+Drops the history indexes replaced by newer ones.
+
+    python -m core.database.mongo.migrate_history_indexes [--collection NAME]
+
+Run once after upgrading: the old unique summary index on (user_id, agent_id)
+rejects a second conversation summary of the same agent, and the older history
+indexes are prefixes of user_agent_conversation_created_at_run. The new indexes
+are created first, so queries are never left without one. Safe to rerun.
+"""
+import os
+import logging
+import argparse
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure
+
+from core.database.mongo.database_handler import HISTORY_INDEX_NAME, DatabaseHandler
+
+load_dotenv()
+
+MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
+
+LEGACY_HISTORY_INDEXES = ["user_agent_created_at", "user_agent_conversation_created_at"]
+LEGACY_SUMMARY_INDEX = "user_agent"
+
+logger = logging.getLogger(__name__)
+
+
+def _drop_index(collection_obj, index_name: str) -> bool:
+    try:
+        collection_obj.drop_index(index_name)
+    except OperationFailure as e:
+        # Already dropped, by an earlier run or another process
+        if e.code == 27:
+            return False
+        raise e
+
+    logger.info(f"Dropped index {index_name} from {collection_obj.name}")
+    return True
+
+
+def migrate_history_indexes(collection: str = MONGO_HISTORY_COLLECTION) -> list[str]:
+    # Creates the current indexes before the old ones go
+    handler = DatabaseHandler(collection)
+    if HISTORY_INDEX_NAME not in handler.collection_obj.index_information():
+        raise RuntimeError(f"Index {HISTORY_INDEX_NAME} is missing on {collection}, keeping the old ones")
+
+    legacy_indexes = [(handler.collection_obj, index_name) for index_name in LEGACY_HISTORY_INDEXES]
+    legacy_indexes.append((handler.summary_collection_obj, LEGACY_SUMMARY_INDEX))
+
+    dropped = []
+    for collection_obj, index_name in legacy_indexes:
+        if _drop_index(collection_obj, index_name):
+            dropped.append(f"{collection_obj.name}.{index_name}")
+
+    return dropped
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Drop the history indexes replaced by newer ones")
+    parser.add_argument("--collection", default=MONGO_HISTORY_COLLECTION, help="History collection, MONGODB_HISTORY_COLLECTION by default")
+    args = parser.parse_args()
+
+    dropped = migrate_history_indexes(args.collection)
+    print(f"Dropped {len(dropped)} indexes: {', '.join(dropped) or '-'}")
@@ -0,0 +1,69 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+RETRIEVAL_LEXICAL_WEIGHT = float(os.getenv("RETRIEVAL_LEXICAL_WEIGHT", 1.0))
+RETRIEVAL_VECTOR_WEIGHT = float(os.getenv("RETRIEVAL_VECTOR_WEIGHT", 1.0))
+RETRIEVAL_RRF_RANK_CONSTANT = int(os.getenv("RETRIEVAL_RRF_RANK_CONSTANT", 60))
+RETRIEVAL_HYBRID_CANDIDATES = int(os.getenv("RETRIEVAL_HYBRID_CANDIDATES", 20))
+RETRIEVAL_RERANK = os.getenv("RETRIEVAL_RERANK", "false").lower() == "true"
+
+VECTOR_RETRIEVAL_MODE = "vector"
+HYBRID_RETRIEVAL_MODE = "hybrid"
+
+
+def resolve_retrieval_settings(agent_settings: dict | None = None) -> dict:
+    # Per-agent values override the environment defaults, unset ones fall back
+    settings = {
+        "mode": RETRIEVAL_MODE,
+        "lexical_weight": RETRIEVAL_LEXICAL_WEIGHT,
+        "vector_weight": RETRIEVAL_VECTOR_WEIGHT,
+        "rank_constant": RETRIEVAL_RRF_RANK_CONSTANT,
+        "candidates": RETRIEVAL_HYBRID_CANDIDATES,
+        "rerank": RETRIEVAL_RERANK,
+    }
+    settings.update({key: value for key, value in (agent_settings or {}).items() if value is not None})
+    return settings
+
+
+def build_knn_query(vector: list[float], size: int, filters: list[dict] | None = None) -> dict:
+    knn_query = {"vector": vector, "k": size}
+    if filters:
+        knn_query["filter"] = {"bool": {"filter": filters}}
+
+    return {"size": size, "query": {"knn": {"vector_field": knn_query}}, "_source": ["text", "metadata"]}
+
+
+def build_lexical_query(query: str, size: int, filters: list[dict] | None = None) -> dict:
+    return {
+        "size": size,
+        "query": {"bool": {"must": [{"match": {"text": query}}], "filter": filters or []}},
+        "_source": ["text", "metadata"]
+    }
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict]],
+    weights: list[float],
+    rank_constant: int = RETRIEVAL_RRF_RANK_CONSTANT
+) -> list[dict]:
+    """
+    Merges ranked hit lists by sum(weight / (rank_constant + rank)), so a chunk
+    found by both queries beats one ranked a bit higher by only one of them.
+    Raw BM25 and vector scores are not comparable, only ranks are used.
+    """
+    scores = {}
+    hits = {}
+
+    for ranking, weight in zip(rankings, weights):
+        for rank, hit in enumerate(ranking, start=1):
+            scores[hit["_id"]] = scores.get(hit["_id"], 0.0) + weight / (rank_constant + rank)
+            hits.setdefault(hit["_id"], hit)
+
+    return [
+        {**hits[hit_id], "_score": score}
+        for hit_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    ]
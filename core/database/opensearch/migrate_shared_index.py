@@ -0,0 +1,69 @@
+"""
+Moves agents from their own OpenSearch index into the shared index.
+
+    python -m core.database.opensearch.migrate_shared_index [--delete-source] [--agent-id ID]
+
+Each agent's chunks are copied with _reindex (tagged with agent_id and routed by
+it), then the agent is pointed at the shared index. Safe to rerun: chunk ids are
+kept, so copying again overwrites instead of duplicating.
+"""
+import uuid
+import logging
+import argparse
+
+from datetime import datetime
+from sqlmodel import Session, select
+
+from database.config import engine
+from database.models.agent import AgentModel
+from core.database.opensearch.vector_database_handler import OPENSEARCH_SHARED_INDEX, OpenSearchHandler
+from core.database.vector_store.local import LOCAL_INDEX_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_agents_to_shared_index(delete_source: bool = False, agent_id: str | None = None) -> dict:
+    shared_handler = OpenSearchHandler(index_name=OPENSEARCH_SHARED_INDEX)
+    shared_handler.create_shared_index()
+
+    migrated = {}
+    with Session(engine) as session:
+        query = select(AgentModel).where(
+            AgentModel.opensearch_index != OPENSEARCH_SHARED_INDEX,
+            ~AgentModel.opensearch_index.startswith(LOCAL_INDEX_PREFIX)
+        )
+        if agent_id:
+            query = query.where(AgentModel.id == uuid.UUID(agent_id))
+
+        for agent in session.exec(query).all():
+            source_index = agent.opensearch_index
+            copied = 0
+
+            if source_index and shared_handler.index_exists(source_index):
+                copied = OpenSearchHandler(index_name=source_index).reindex_into_shared(OPENSEARCH_SHARED_INDEX, agent.id)
+
+            agent.opensearch_index = OPENSEARCH_SHARED_INDEX
+            # A new updated_at also invalidates the cached agents of every process
+            agent.updated_at = datetime.now()
+            session.add(agent)
+            session.commit()
+
+            if delete_source and source_index:
+                shared_handler.delete_index(source_index)
+
+            logger.info(f"Migrated agent {agent.id}: {copied} chunks from {source_index}")
+            migrated[str(agent.id)] = copied
+
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Move per-agent OpenSearch indexes into the shared index")
+    parser.add_argument("--delete-source", action="store_true", help="Delete each per-agent index once it is copied")
+    parser.add_argument("--agent-id", help="Only migrate this agent")
+    args = parser.parse_args()
+
+    migrated = migrate_agents_to_shared_index(delete_source=args.delete_source, agent_id=args.agent_id)
+    print(f"Migrated {len(migrated)} agents, {sum(migrated.values())} chunks")
@@ -1,19 +1,51 @@
 import os
+import uuid
 import logging
 
 from dotenv import load_dotenv
-from opensearchpy import OpenSearch
-from langchain_community.vectorstores import OpenSearchVectorSearch
+from opensearchpy import OpenSearch, helpers
+from langchain_core.documents import Document
 
-from core.services.artificial_intelligence import RAG
+from core.services.artificial_intelligence import get_embedder, rerank_documents
+from core.services.artificial_intelligence.reranker import RERANKER_CANDIDATES
+from core.database.vector_store.base import VectorStore
+from core.database.opensearch.hybrid_search import (
+    HYBRID_RETRIEVAL_MODE,
+    build_knn_query,
+    build_lexical_query,
+    reciprocal_rank_fusion,
+    resolve_retrieval_settings,
+)
 
 logger = logging.Logger(__name__)
 
 load_dotenv()
 
-class OpenSearchHandler:
-    def __init__(self, index_name: str):
+OPENSEARCH_INDEX_MODE = os.getenv("OPENSEARCH_INDEX_MODE", "per_agent")
+OPENSEARCH_SHARED_INDEX = os.getenv("OPENSEARCH_SHARED_INDEX", "agentic-shared")
+OPENSEARCH_SHARED_INDEX_SHARDS = int(os.getenv("OPENSEARCH_SHARED_INDEX_SHARDS", 3))
+
+SHARED_INDEX_MODE = "shared"
+
+CHUNK_METADATA_PROPERTIES = {
+    "source_id": {"type": "keyword"},
+    "content_hash": {"type": "keyword"},
+}
+
+# Copies a per-agent index into the shared one, tagging and routing every chunk by agent
+SHARED_REINDEX_SCRIPT = """
+ctx._source.agent_id = params.agent_id;
+ctx._routing = params.agent_id;
+ctx._id = params.agent_id + ':' + ctx._id;
+"""
+
+class OpenSearchHandler(VectorStore):
+    def __init__(self, index_name: str, agent_id: str | None = None, retrieval_settings: dict | None = None):
         self.index_name = index_name
+        # Only set on the shared index: chunks carry the agent_id, are routed by it
+        # to a single shard and every query is filtered on it
+        self.agent_id = str(agent_id) if agent_id else None
+        self.retrieval_settings = resolve_retrieval_settings(retrieval_settings)
 
         host = os.getenv("OPENSEARCH_HOST")
         port = os.getenv("OPENSEARCH_PORT")
@@ -28,13 +60,22 @@ class OpenSearchHandler:
         )
 
         self.embedding_size = os.getenv("EMBEDDING_SIZE")
-        self.rag_handler = RAG()
 
-        self.handler = OpenSearchVectorSearch(
-            opensearch_url=os.getenv("OPENSEARCH_URL"),
-            index_name=self.index_name,
-            embedding_function=self.rag_handler.model
-        )
+    @classmethod
+    def for_agent(cls, agent_obj) -> "OpenSearchHandler":
+        if agent_obj.opensearch_index == OPENSEARCH_SHARED_INDEX:
+            return cls(index_name=OPENSEARCH_SHARED_INDEX, agent_id=agent_obj.id, retrieval_settings=agent_obj.retrieval_settings)
+        return cls(index_name=agent_obj.opensearch_index, retrieval_settings=agent_obj.retrieval_settings)
+
+    def _document_id(self, chunk_id: str) -> str:
+        # Chunk ids are only unique per agent, the shared index prefixes them
+        return f"{self.agent_id}:{chunk_id}" if self.agent_id else chunk_id
+
+    def _chunk_id(self, document_id: str) -> str:
+        return document_id.removeprefix(f"{self.agent_id}:") if self.agent_id else document_id
+
+    def _agent_filter(self, *filters: dict) -> list[dict]:
+        return [*filters, {"term": {"agent_id": self.agent_id}}] if self.agent_id else list(filters)
 
     def index_exists(self, index_name):
         return self.client.indices.exists(index=index_name)
@@ -57,6 +98,9 @@ class OpenSearchHandler:
                             "vector_field": {
                                 "type": "knn_vector",
                                 "dimension": self.embedding_size,
+                            },
+                            "metadata": {
+                                "properties": CHUNK_METADATA_PROPERTIES
                             }
                         }
                     }
@@ -68,13 +112,51 @@ class OpenSearchHandler:
                 raise e
 
         return self.index_name
-    
-    def delete_index(self):
-        logger.info(f"Deleting Index: {self.index_name}")
 
-        if self.index_exists(self.index_name):
+    def create_shared_index(self):
+        logger.info(f"Creating shared Index: {self.index_name}")
+
+        if not self.index_exists(self.index_name):
+            try:
+                index_body = {
+                    'settings': {
+                        'index': {
+                            'number_of_shards': OPENSEARCH_SHARED_INDEX_SHARDS,
+                            'number_of_replicas': 1,
+                            'knn': True
+                        }
+                    },
+                    "mappings": {
+                        "_routing": {"required": True},
+                        "properties": {
+                            "agent_id": {"type": "keyword"},
+                            "vector_field": {
+                                "type": "knn_vector",
+                                "dimension": self.embedding_size,
+                                # Lucene HNSW applies the agent filter during the graph search
+                                "method": {"name": "hnsw", "engine": "lucene", "space_type": "l2"}
+                            },
+                            "metadata": {
+                                "properties": CHUNK_METADATA_PROPERTIES
+                            }
+                        }
+                    }
+                }
+
+                self.client.indices.create(index=self.index_name, body=index_body)
+            except Exception as e:
+                logger.error(f"Error to create shared index: {e}")
+                raise e
+
+        return self.index_name
+
+    def delete_index(self, index_name: str | None = None):
+        index_name = index_name or self.index_name
+        logger.info(f"Deleting Index: {index_name}")
+
+        if self.index_exists(index_name):
             try:
-                self.handler.delete_index(index_name=self.index_name)
+                self.client.indices.delete(index=index_name)
                 return True
             except Exception as e:
                 logger.error(f"Error to delete index: {e}")
@@ -82,28 +164,195 @@ class OpenSearchHandler:
 
         return False
 
+    def delete_agent_documents(self):
+        if not self.agent_id:
+            return self.delete_index()
+
+        logger.info(f"Deleting documents of agent {self.agent_id} from index: {self.index_name}")
+
+        if self.index_exists(self.index_name):
+            try:
+                self.client.delete_by_query(
+                    index=self.index_name,
+                    body={"query": {"term": {"agent_id": self.agent_id}}},
+                    routing=self.agent_id,
+                    conflicts="proceed"
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Error to delete agent documents: {e}")
+                raise e
+
+        return False
+
     def insert_documents(self, documents: list):
         logger.info(f"Inserting documents into index: {self.index_name}")
 
         if self.index_exists(self.index_name):
             try:
-                self.handler.add_documents(documents)
+                vectors = get_embedder().embed_documents([document.page_content for document in documents])
+                self.bulk_index_chunks([
+                    {"id": str(uuid.uuid4()), "vector": vector, "text": document.page_content, "metadata": document.metadata}
+                    for document, vector in zip(documents, vectors)
+                ])
                 return {"Status": "Success", "Message": "Documents on database"}
             except Exception as e:
-                logger.error(f"Error to delete index: {e}")
+                logger.error(f"Error to insert documents: {e}")
                 raise e
 
         return {"Status": "Failed", "Message": "Agent not found"}
-    
+
+    def bulk_index_chunks(self, chunks: list[dict]) -> int:
+        """
+        Indexes already embedded chunks through the _bulk API, using the same
+        fields as OpenSearchVectorSearch (vector_field, text, metadata).
+        """
+        logger.info(f"Bulk indexing {len(chunks)} chunks into index: {self.index_name}")
+
+        actions = []
+        for chunk in chunks:
+            action = {
+                "_op_type": "index",
+                "_index": self.index_name,
+                "_id": self._document_id(chunk["id"]),
+                "_source": {
+                    "vector_field": chunk["vector"],
+                    "text": chunk["text"],
+                    "metadata": chunk["metadata"],
+                },
+            }
+            if self.agent_id:
+                action["_routing"] = self.agent_id
+                action["_source"]["agent_id"] = self.agent_id
+            actions.append(action)
+
+        try:
+            indexed, _ = helpers.bulk(self.client, actions, chunk_size=len(actions) or 1, refresh=False)
+            return indexed
+        except Exception as e:
+            logger.error(f"Error to bulk index chunks: {e}")
+            raise e
+
+    def ensure_chunk_mapping(self):
+        # Indexes created before the chunk metadata was mapped get the keyword fields added
+        try:
+            self.client.indices.put_mapping(
+                index=self.index_name,
+                body={"properties": {"metadata": {"properties": CHUNK_METADATA_PROPERTIES}}}
+            )
+        except Exception as e:
+            logger.error(f"Error to update chunk mapping: {e}")
+
+    def get_source_chunk_ids(self, source_id: str) -> set[str]:
+        logger.info(f"Getting chunk ids of {source_id} in index: {self.index_name}")
+
+        if not self.index_exists(self.index_name):
+            return set()
+
+        try:
+            hits = helpers.scan(
+                self.client,
+                index=self.index_name,
+                query={
+                    "query": {"bool": {"filter": self._agent_filter({"term": {"metadata.source_id": source_id}})}},
+                    "_source": False
+                },
+                routing=self.agent_id,
+                size=1000
+            )
+            return {self._chunk_id(hit["_id"]) for hit in hits}
+        except Exception as e:
+            logger.error(f"Error to get source chunk ids: {e}")
+            raise e
+
+    def bulk_delete_chunks(self, chunk_ids: list[str]) -> int:
+        logger.info(f"Bulk deleting {len(chunk_ids)} chunks from index: {self.index_name}")
+
+        actions = []
+        for chunk_id in chunk_ids:
+            action = {"_op_type": "delete", "_index": self.index_name, "_id": self._document_id(chunk_id)}
+            if self.agent_id:
+                action["_routing"] = self.agent_id
+            actions.append(action)
+
+        try:
+            deleted, _ = helpers.bulk(self.client, actions, refresh=False, raise_on_error=False)
+            return deleted
+        except Exception as e:
+            logger.error(f"Error to bulk delete chunks: {e}")
+            raise e
+
+    def refresh_index(self):
+        self.client.indices.refresh(index=self.index_name)
+
+    def reindex_into_shared(self, shared_index: str, agent_id: str) -> int:
+        logger.info(f"Reindexing {self.index_name} into shared index {shared_index} for agent {agent_id}")
+
+        try:
+            response = self.client.reindex(
+                body={
+                    "source": {"index": self.index_name},
+                    "dest": {"index": shared_index},
+                    "script": {"lang": "painless", "source": SHARED_REINDEX_SCRIPT, "params": {"agent_id": str(agent_id)}}
+                },
+                refresh=True,
+                wait_for_completion=True,
+                request_timeout=3600
+            )
+            return response.get("created", 0) + response.get("updated", 0)
+        except Exception as e:
+            logger.error(f"Error to reindex into shared index: {e}")
+            raise e
+
     def retrieve_documents(self, query:str, top_k: int):
         logger.info(f"Retrieving documents: {self.index_name}")
 
         if self.index_exists(self.index_name):
             try:
-                documents = self.handler.similarity_search(query=query, k=top_k)
-                return documents
+                # The cross-encoder picks top_k out of a larger candidate set
+                rerank = self.retrieval_settings["rerank"]
+                size = max(top_k, RERANKER_CANDIDATES) if rerank else top_k
+
+                if self.retrieval_settings["mode"] == HYBRID_RETRIEVAL_MODE:
+                    hits = self._hybrid_search(query, size)
+                else:
+                    hits = self.client.search(
+                        index=self.index_name,
+                        body=build_knn_query(get_embedder().embed_query(query), size, self._agent_filter()),
+                        routing=self.agent_id
+                    )["hits"]["hits"]
+
+                documents = [
+                    Document(page_content=hit["_source"]["text"], metadata=hit["_source"].get("metadata", {}))
+                    for hit in hits[:size]
+                ]
+
+                return rerank_documents(query, documents, top_k) if rerank else documents
             except Exception as e:
-                logger.error(f"Error to delete index: {e}")
+                logger.error(f"Error to retrieve documents: {e}")
                 raise e
 
-        return []
\ No newline at end of file
+        return []
+
+    def _hybrid_search(self, query: str, top_k: int) -> list[dict]:
+        # BM25 catches exact terms (codes, names) the embedding misses; both
+        # queries go in one _msearch round trip and are fused by rank
+        settings = self.retrieval_settings
+        size = max(top_k, settings["candidates"])
+        filters = self._agent_filter()
+        header = {"index": self.index_name, **({"routing": self.agent_id} if self.agent_id else {})}
+
+        responses = self.client.msearch(body=[
+            header, build_lexical_query(query, size, filters),
+            header, build_knn_query(get_embedder().embed_query(query), size, filters),
+        ])["responses"]
+
+        for response in responses:
+            if "error" in response:
+                raise Exception(response["error"])
+
+        return reciprocal_rank_fusion(
+            [response["hits"]["hits"] for response in responses],
+            [settings["lexical_weight"], settings["vector_weight"]],
+            settings["rank_constant"]
+        )
@@ -0,0 +1,12 @@
+from core.database.redis.client import get_redis_client, get_async_redis_client
+from core.database.redis.task_events import TaskEventPublisher, TaskEventSubscriber
+from core.database.redis.history_cache import HistoryCache, AsyncHistoryCache
+
+__all__ = [
+    "get_redis_client",
+    "get_async_redis_client",
+    "TaskEventPublisher",
+    "TaskEventSubscriber",
+    "HistoryCache",
+    "AsyncHistoryCache"
+]
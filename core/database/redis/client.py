@@ -0,0 +1,42 @@
+import os
+import logging
+import threading
+
+import redis
+import redis.asyncio as aioredis
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client: redis.Redis | None = None
+_async_client: aioredis.Redis | None = None
+
+
+def get_redis_client() -> redis.Redis:
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                logger.info("Starting Redis client")
+                _client = redis.Redis.from_url(REDIS_URL)
+
+    return _client
+
+
+def get_async_redis_client() -> aioredis.Redis:
+    global _async_client
+
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                logger.info("Starting async Redis client")
+                _async_client = aioredis.Redis.from_url(REDIS_URL)
+
+    return _async_client
@@ -0,0 +1,223 @@
+import os
+import logging
+
+import bson
+
+from dotenv import load_dotenv
+
+from core.database.redis.client import get_redis_client, get_async_redis_client
+
+load_dotenv()
+
+REDIS_HISTORY_CACHE_ENABLED = os.getenv("REDIS_HISTORY_CACHE_ENABLED", "false").lower() == "true"
+REDIS_HISTORY_CACHE_TTL = int(os.getenv("REDIS_HISTORY_CACHE_TTL", 3600))
+REDIS_HISTORY_CACHE_MAX_TURNS = int(os.getenv("REDIS_HISTORY_CACHE_MAX_TURNS", 50))
+
+HISTORY_CACHE_PREFIX = "agent-history"
+
+logger = logging.getLogger(__name__)
+
+# Appends only to windows that are already cached, otherwise the window would
+# look complete while missing the older turns
+APPEND_SCRIPT = """
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+    redis.call('LTRIM', KEYS[1], -tonumber(ARGV[3]), -1)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+# Writes the window loaded from Mongo only if no turn was appended meanwhile
+POPULATE_SCRIPT = """
+local version = redis.call('GET', KEYS[3]) or '0'
+if version ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for index = 4, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[index])
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+INVALIDATE_SCRIPT = """
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+def history_cache_keys(user_id: str, agent_id: str, conversation_id: str | None = None) -> list[str]:
+    key = f"{HISTORY_CACHE_PREFIX}:{user_id}:{agent_id}"
+    if conversation_id:
+        key = f"{key}:{conversation_id}"
+    return [f"{key}:turns", f"{key}:summary", f"{key}:version"]
+
+
+def encode_cached_document(document: dict) -> bytes:
+    return bson.encode({key: value for key, value in document.items() if key != "_id"})
+
+
+def decode_cached_window(summary_data: bytes, turns_data: list[bytes]) -> tuple[dict | None, list[dict]]:
+    summary = bson.decode(summary_data) if summary_data else None
+    # Stored oldest first, returned newest first like DatabaseHandler.find_history
+    turns = [bson.decode(turn) for turn in reversed(turns_data)]
+    return summary, turns
+
+
+def populate_args(version: str, summary: dict | None, history: list[dict]) -> list:
+    return [
+        version,
+        encode_cached_document(summary) if summary else b"",
+        REDIS_HISTORY_CACHE_TTL,
+        *[encode_cached_document(document) for document in reversed(history[:REDIS_HISTORY_CACHE_MAX_TURNS])],
+    ]
+
+
+def append_args(document: dict) -> list:
+    return [encode_cached_document(document), REDIS_HISTORY_CACHE_TTL, REDIS_HISTORY_CACHE_MAX_TURNS]
+
+
+class HistoryCache:
+    """
+    Read-through cache of the recent history window of each conversation,
+    so active conversations are served without reading Mongo on every turn.
+    The summary key doubles as the marker that the window is cached.
+    """
+
+    def __init__(self):
+        self.client = get_redis_client()
+        self.append_script = self.client.register_script(APPEND_SCRIPT)
+        self.populate_script = self.client.register_script(POPULATE_SCRIPT)
+        self.invalidate_script = self.client.register_script(INVALIDATE_SCRIPT)
+
+    def get_version(self, user_id: str, agent_id: str, conversation_id: str | None = None) -> str | None:
+        try:
+            version = self.client.get(history_cache_keys(user_id, agent_id, conversation_id)[2])
+            return version.decode() if version else "0"
+        except Exception as e:
+            logger.error(f"Error to get cached history version: {e}")
+            return None
+
+    def load(self, user_id: str, agent_id: str, limit: int, conversation_id: str | None = None) -> tuple[dict | None, list[dict]] | None:
+        turns_key, summary_key, _ = history_cache_keys(user_id, agent_id, conversation_id)
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.get(summary_key)
+            pipeline.lrange(turns_key, -limit, -1)
+            summary_data, turns_data = pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error to load cached history: {e}")
+            return None
+
+        if summary_data is None:
+            return None
+
+        return decode_cached_window(summary_data, turns_data)
+
+    def populate(
+        self,
+        user_id: str,
+        agent_id: str,
+        version: str | None,
+        summary: dict | None,
+        history: list[dict],
+        conversation_id: str | None = None
+    ):
+        if version is None:
+            return
+
+        try:
+            self.populate_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=populate_args(version, summary, history))
+        except Exception as e:
+            logger.error(f"Error to populate cached history: {e}")
+
+    def append(self, user_id: str, agent_id: str, document: dict, conversation_id: str | None = None):
+        try:
+            self.append_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=append_args(document))
+        except Exception as e:
+            # A stale window would hide this turn, so drop it instead
+            logger.error(f"Error to append cached history: {e}")
+            self.invalidate(user_id, agent_id, conversation_id)
+
+    def invalidate(self, user_id: str, agent_id: str, conversation_id: str | None = None):
+        try:
+            self.invalidate_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=[REDIS_HISTORY_CACHE_TTL])
+        except Exception as e:
+            logger.error(f"Error to invalidate cached history: {e}")
+
+
+class AsyncHistoryCache:
+    """
+    HistoryCache on the asyncio Redis client, used by AsyncDatabaseHandler.
+    Shares the keys and scripts, so both handlers read and write the same windows.
+    """
+
+    def __init__(self):
+        self.client = get_async_redis_client()
+        self.append_script = self.client.register_script(APPEND_SCRIPT)
+        self.populate_script = self.client.register_script(POPULATE_SCRIPT)
+        self.invalidate_script = self.client.register_script(INVALIDATE_SCRIPT)
+
+    async def get_version(self, user_id: str, agent_id: str, conversation_id: str | None = None) -> str | None:
+        try:
+            version = await self.client.get(history_cache_keys(user_id, agent_id, conversation_id)[2])
+            return version.decode() if version else "0"
+        except Exception as e:
+            logger.error(f"Error to get cached history version: {e}")
+            return None
+
+    async def load(self, user_id: str, agent_id: str, limit: int, conversation_id: str | None = None) -> tuple[dict | None, list[dict]] | None:
+        turns_key, summary_key, _ = history_cache_keys(user_id, agent_id, conversation_id)
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.get(summary_key)
+            pipeline.lrange(turns_key, -limit, -1)
+            summary_data, turns_data = await pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error to load cached history: {e}")
+            return None
+
+        if summary_data is None:
+            return None
+
+        return decode_cached_window(summary_data, turns_data)
+
+    async def populate(
+        self,
+        user_id: str,
+        agent_id: str,
+        version: str | None,
+        summary: dict | None,
+        history: list[dict],
+        conversation_id: str | None = None
+    ):
+        if version is None:
+            return
+
+        try:
+            await self.populate_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=populate_args(version, summary, history))
+        except Exception as e:
+            logger.error(f"Error to populate cached history: {e}")
+
+    async def append(self, user_id: str, agent_id: str, document: dict, conversation_id: str | None = None):
+        try:
+            await self.append_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=append_args(document))
+        except Exception as e:
+            logger.error(f"Error to append cached history: {e}")
+            await self.invalidate(user_id, agent_id, conversation_id)
+
+    async def invalidate(self, user_id: str, agent_id: str, conversation_id: str | None = None):
+        try:
+            await self.invalidate_script(keys=history_cache_keys(user_id, agent_id, conversation_id), args=[REDIS_HISTORY_CACHE_TTL])
+        except Exception as e:
+            logger.error(f"Error to invalidate cached history: {e}")
@@ -0,0 +1,64 @@
+import json
+import asyncio
+import logging
+
+from core.database.redis.client import get_redis_client, get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+TASK_CHANNEL_PREFIX = "agent-task"
+
+
+def task_channel(task_id: str) -> str:
+    return f"{TASK_CHANNEL_PREFIX}:{task_id}"
+
+
+class TaskEventPublisher:
+    """
+    Publishes task events from the Celery workers to the task Redis channel.
+    """
+
+    def __init__(self, task_id: str):
+        self.channel = task_channel(task_id)
+        self.client = get_redis_client()
+
+    def publish(self, event_type: str, **payload):
+        try:
+            self.client.publish(self.channel, json.dumps({"type": event_type, **payload}))
+        except Exception as e:
+            logger.error(f"Error to publish task event on {self.channel}: {e}")
+
+    def publish_delta(self, content: str):
+        self.publish("delta", content=content)
+
+
+class TaskEventSubscriber:
+    """
+    Receives the task events on the API side without blocking the event loop.
+    Subscribe before enqueueing the task, otherwise early events are lost.
+    """
+
+    def __init__(self, task_id: str):
+        self.channel = task_channel(task_id)
+        self.pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+
+    async def subscribe(self):
+        await self.pubsub.subscribe(self.channel)
+
+    async def get_event(self, timeout: float) -> dict | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while (remaining := deadline - loop.time()) > 0:
+            message = await self.pubsub.get_message(timeout=remaining)
+            if message and message.get("type") == "message":
+                return json.loads(message["data"])
+
+        return None
+
+    async def close(self):
+        try:
+            await self.pubsub.unsubscribe(self.channel)
+            await self.pubsub.aclose()
+        except Exception as e:
+            logger.error(f"Error to close task subscription {self.channel}: {e}")
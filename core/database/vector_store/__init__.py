@@ -0,0 +1,13 @@
+from core.database.vector_store.base import VectorStore
+from core.database.vector_store.local import LocalVectorStore, is_local_index
+from core.database.vector_store.factory import VECTOR_STORE_BACKEND, create_vector_store, get_vector_store, open_vector_store
+
+__all__ = [
+    "VectorStore",
+    "LocalVectorStore",
+    "is_local_index",
+    "VECTOR_STORE_BACKEND",
+    "create_vector_store",
+    "get_vector_store",
+    "open_vector_store"
+]
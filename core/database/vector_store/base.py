@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+
+
+class VectorStore(ABC):
+    """
+    Chunk storage and retrieval of an agent's knowledge base. Chunks are dicts
+    with id, vector, text and metadata; writes become visible on refresh_index.
+    """
+
+    index_name: str
+
+    @abstractmethod
+    def create_index(self) -> str:
+        ...
+
+    @abstractmethod
+    def delete_agent_documents(self):
+        ...
+
+    @abstractmethod
+    def ensure_chunk_mapping(self):
+        ...
+
+    @abstractmethod
+    def get_source_chunk_ids(self, source_id: str) -> set[str]:
+        ...
+
+    @abstractmethod
+    def bulk_index_chunks(self, chunks: list[dict]) -> int:
+        ...
+
+    @abstractmethod
+    def bulk_delete_chunks(self, chunk_ids: list[str]) -> int:
+        ...
+
+    @abstractmethod
+    def refresh_index(self):
+        ...
+
+    @abstractmethod
+    def insert_documents(self, documents: list):
+        ...
+
+    @abstractmethod
+    def retrieve_documents(self, query: str, top_k: int) -> list:
+        ...
@@ -0,0 +1,47 @@
+import os
+import uuid
+
+from dotenv import load_dotenv
+
+from core.database.vector_store.base import VectorStore
+from core.database.vector_store.local import LOCAL_INDEX_PREFIX, LocalVectorStore, is_local_index
+
+load_dotenv()
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "opensearch")
+
+OPENSEARCH_BACKEND = "opensearch"
+LOCAL_BACKEND = "local"
+
+
+def create_vector_store(backend: str | None = None) -> str:
+    """
+    Creates the index of a new agent and returns its name. The name also
+    records the backend, local indexes are prefixed with LOCAL_INDEX_PREFIX.
+    """
+    if (backend or VECTOR_STORE_BACKEND) == LOCAL_BACKEND:
+        return LocalVectorStore(index_name=f"{LOCAL_INDEX_PREFIX}{str(uuid.uuid4())}").create_index()
+
+    from core.database.opensearch import OpenSearchHandler
+    from core.database.opensearch.vector_database_handler import OPENSEARCH_INDEX_MODE, OPENSEARCH_SHARED_INDEX, SHARED_INDEX_MODE
+
+    # The shared index holds every agent's chunks, so creating an agent adds no shards
+    if OPENSEARCH_INDEX_MODE == SHARED_INDEX_MODE:
+        return OpenSearchHandler(index_name=OPENSEARCH_SHARED_INDEX).create_shared_index()
+    return OpenSearchHandler(index_name=f"agentic-{str(uuid.uuid4())}").create_index()
+
+
+def open_vector_store(index_name: str, agent_id: str | None = None, retrieval_settings: dict | None = None) -> VectorStore:
+    if is_local_index(index_name):
+        return LocalVectorStore(index_name=index_name, retrieval_settings=retrieval_settings)
+
+    from core.database.opensearch import OpenSearchHandler
+    return OpenSearchHandler(index_name=index_name, agent_id=agent_id, retrieval_settings=retrieval_settings)
+
+
+def get_vector_store(agent_obj) -> VectorStore:
+    if is_local_index(agent_obj.opensearch_index):
+        return LocalVectorStore(index_name=agent_obj.opensearch_index, retrieval_settings=agent_obj.retrieval_settings)
+
+    from core.database.opensearch import OpenSearchHandler
+    return OpenSearchHandler.for_agent(agent_obj)
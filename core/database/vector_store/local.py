@@ -0,0 +1,327 @@
+import os
+import json
+import uuid
+import fcntl
+import shutil
+import logging
+import threading
+
+import numpy as np
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+from core.database.vector_store.base import VectorStore
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "vector_store")
+LOCAL_VECTOR_STORE_DTYPE = os.getenv("LOCAL_VECTOR_STORE_DTYPE", "float32")
+
+LOCAL_INDEX_PREFIX = "local-"
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+STAGING_PREFIX = "staging-"
+# Rows copied at a time when a generation is written, so a refresh never holds the whole index
+WRITE_BATCH_ROWS = 4096
+
+_cache_lock = threading.Lock()
+# index path -> (generation, memory-mapped vectors, chunk sidecar)
+_loaded_indexes: dict[str, tuple[str, np.ndarray, list[dict]]] = {}
+
+
+def is_local_index(index_name: str | None) -> bool:
+    return bool(index_name) and index_name.startswith(LOCAL_INDEX_PREFIX)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_cosine(vectors: np.ndarray, query_vector, top_k: int) -> list[tuple[int, float]]:
+    """
+    Rows are stored normalized, so one matrix-vector product gives the cosine
+    similarities; argpartition selects top_k without sorting every row.
+    """
+    if not len(vectors) or top_k <= 0:
+        return []
+
+    query = normalize_rows([query_vector])[0]
+    scores = np.asarray(vectors @ query, dtype=np.float32)
+
+    k = min(top_k, len(scores))
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(int(index), float(scores[index])) for index in order]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index for small or offline agents. Each index is a
+    directory with the normalized embeddings in a .npy file (memory-mapped on
+    read) and the chunk ids, texts and metadata in a JSON sidecar, row aligned.
+    Every refresh writes a new generation and swaps the manifest atomically, so
+    readers in other processes never see half-written files. Upserted chunks
+    are spilled to a staging directory as they arrive and merged on refresh,
+    so only their ids stay in memory until then.
+    """
+
+    def __init__(
+        self,
+        index_name: str,
+        retrieval_settings: dict | None = None,
+        root: str = LOCAL_VECTOR_STORE_PATH,
+        dtype: str = LOCAL_VECTOR_STORE_DTYPE
+    ):
+        self.index_name = index_name
+        self.retrieval_settings = retrieval_settings
+        self.path = os.path.join(root, index_name)
+        self.dtype = np.dtype(dtype)
+        # chunk id -> (staged batch, row) of its latest upsert
+        self._upserts: dict[str, tuple[int, int]] = {}
+        self._deletes: set[str] = set()
+        self._staging_path: str | None = None
+        self._staged_batches = 0
+
+    def index_exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, MANIFEST_FILE))
+
+    def create_index(self):
+        logger.info(f"Creating local Index: {self.index_name}")
+
+        if not self.index_exists():
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                self._write([], [])
+            except Exception as e:
+                logger.error(f"Error to create local index: {e}")
+                raise e
+
+        return self.index_name
+
+    def delete_index(self):
+        logger.info(f"Deleting local Index: {self.index_name}")
+
+        with _cache_lock:
+            _loaded_indexes.pop(self.path, None)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+            return True
+
+        return False
+
+    def delete_agent_documents(self):
+        return self.delete_index()
+
+    def ensure_chunk_mapping(self):
+        # The sidecar has no schema to update
+        pass
+
+    def _read_manifest(self) -> dict:
+        with open(os.path.join(self.path, MANIFEST_FILE)) as manifest_file:
+            return json.load(manifest_file)
+
+    def _load(self) -> tuple[np.ndarray, list[dict]]:
+        if not self.index_exists():
+            return np.empty((0, 0), dtype=self.dtype), []
+
+        for attempt in range(2):
+            generation = self._read_manifest()["generation"]
+
+            with _cache_lock:
+                loaded = _loaded_indexes.get(self.path)
+            if loaded and loaded[0] == generation:
+                return loaded[1], loaded[2]
+
+            try:
+                vectors = np.load(os.path.join(self.path, f"vectors-{generation}.npy"), mmap_mode="r")
+                with open(os.path.join(self.path, f"chunks-{generation}.json")) as chunks_file:
+                    chunks = json.load(chunks_file)
+            except FileNotFoundError:
+                # A writer replaced the generation between the manifest read and the load
+                if attempt:
+                    raise
+                continue
+
+            with _cache_lock:
+                _loaded_indexes[self.path] = (generation, vectors, chunks)
+            return vectors, chunks
+
+    def _write(self, parts: list[tuple[np.ndarray, list[int]]], chunks: list[dict]):
+        """
+        Writes a generation from (vectors, rows) parts, copied in slices of
+        WRITE_BATCH_ROWS into a memory-mapped .npy file.
+        """
+        previous = self._read_manifest()["generation"] if self.index_exists() else None
+        generation = uuid.uuid4().hex
+        vectors_path = os.path.join(self.path, f"vectors-{generation}.npy")
+
+        parts = [(vectors, rows) for vectors, rows in parts if len(rows)]
+        if parts:
+            vectors = np.lib.format.open_memmap(
+                vectors_path, mode="w+", dtype=self.dtype, shape=(sum(len(rows) for _, rows in parts), parts[0][0].shape[1])
+            )
+            position = 0
+            for part, rows in parts:
+                for start in range(0, len(rows), WRITE_BATCH_ROWS):
+                    block = part[rows[start:start + WRITE_BATCH_ROWS]]
+                    vectors[position:position + len(block)] = block
+                    position += len(block)
+            vectors.flush()
+            del vectors
+        else:
+            np.save(vectors_path, np.empty((0, 0), dtype=self.dtype))
+
+        with open(os.path.join(self.path, f"chunks-{generation}.json"), "w") as chunks_file:
+            json.dump(chunks, chunks_file)
+
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp", "w") as manifest_file:
+            json.dump({"generation": generation, "count": len(chunks), "dtype": self.dtype.name}, manifest_file)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        # Open memory maps of the old generation stay valid after the unlink
+        if previous:
+            for file_name in (f"vectors-{previous}.npy", f"chunks-{previous}.json"):
+                try:
+                    os.remove(os.path.join(self.path, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def get_source_chunk_ids(self, source_id: str) -> set[str]:
+        _, chunks = self._load()
+        return {chunk["id"] for chunk in chunks if chunk["metadata"].get("source_id") == source_id}
+
+    def bulk_index_chunks(self, chunks: list[dict]) -> int:
+        if not chunks:
+            return 0
+
+        if self._staging_path is None:
+            self._staging_path = os.path.join(self.path, f"{STAGING_PREFIX}{uuid.uuid4().hex}")
+            os.makedirs(self._staging_path)
+
+        # Each batch is stored normalized in the index dtype, like the rows it will become
+        batch = self._staged_batches
+        vectors = normalize_rows([chunk["vector"] for chunk in chunks]).astype(self.dtype)
+        np.save(os.path.join(self._staging_path, f"vectors-{batch}.npy"), vectors)
+        with open(os.path.join(self._staging_path, f"chunks-{batch}.jsonl"), "w") as chunks_file:
+            for chunk in chunks:
+                chunks_file.write(json.dumps({"id": chunk["id"], "text": chunk["text"], "metadata": chunk["metadata"]}) + "\n")
+        self._staged_batches += 1
+
+        for row, chunk in enumerate(chunks):
+            self._upserts[chunk["id"]] = (batch, row)
+            self._deletes.discard(chunk["id"])
+
+        return len(chunks)
+
+    def bulk_delete_chunks(self, chunk_ids: list[str]) -> int:
+        for chunk_id in chunk_ids:
+            self._upserts.pop(chunk_id, None)
+            self._deletes.add(chunk_id)
+
+        return len(chunk_ids)
+
+    def _staged_parts(self) -> tuple[list[tuple[np.ndarray, list[int]]], list[dict]]:
+        # The latest upsert of every chunk, read back one staged batch at a time
+        rows_by_batch: dict[int, list[int]] = {}
+        for batch, row in self._upserts.values():
+            rows_by_batch.setdefault(batch, []).append(row)
+
+        parts, chunks = [], []
+        for batch, rows in sorted(rows_by_batch.items()):
+            rows.sort()
+            parts.append((np.load(os.path.join(self._staging_path, f"vectors-{batch}.npy"), mmap_mode="r"), rows))
+
+            selected = set(rows)
+            with open(os.path.join(self._staging_path, f"chunks-{batch}.jsonl")) as chunks_file:
+                chunks.extend(json.loads(line) for row, line in enumerate(chunks_file) if row in selected)
+
+        return parts, chunks
+
+    def _discard_staging(self):
+        if self._staging_path:
+            shutil.rmtree(self._staging_path, ignore_errors=True)
+
+        self._upserts = {}
+        self._deletes = set()
+        self._staging_path = None
+        self._staged_batches = 0
+
+    def refresh_index(self):
+        if not self._upserts and not self._deletes:
+            self._discard_staging()
+            return
+
+        logger.info(f"Writing {len(self._upserts)} chunks and {len(self._deletes)} deletes to local index: {self.index_name}")
+
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(os.path.join(self.path, LOCK_FILE), "w") as lock_file:
+                # Serializes writers of the same index across processes
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                vectors, chunks = self._load()
+                keep = [
+                    index for index, chunk in enumerate(chunks)
+                    if chunk["id"] not in self._deletes and chunk["id"] not in self._upserts
+                ]
+                staged_parts, staged_chunks = self._staged_parts()
+
+                self._write([(vectors, keep), *staged_parts], [chunks[index] for index in keep] + staged_chunks)
+        finally:
+            self._discard_staging()
+
+    def insert_documents(self, documents: list):
+        from core.services.artificial_intelligence import get_embedder
+
+        logger.info(f"Inserting documents into local index: {self.index_name}")
+
+        if self.index_exists():
+            try:
+                vectors = get_embedder().embed_documents([document.page_content for document in documents])
+                self.bulk_index_chunks([
+                    {"id": str(uuid.uuid4()), "vector": vector, "text": document.page_content, "metadata": document.metadata}
+                    for document, vector in zip(documents, vectors)
+                ])
+                self.refresh_index()
+                return {"Status": "Success", "Message": "Documents on database"}
+            except Exception as e:
+                logger.error(f"Error to insert documents: {e}")
+                raise e
+
+        return {"Status": "Failed", "Message": "Agent not found"}
+
+    def search_by_vector(self, query_vector, top_k: int) -> list[Document]:
+        vectors, chunks = self._load()
+
+        return [
+            Document(page_content=chunks[index]["text"], metadata={**chunks[index]["metadata"], "score": score})
+            for index, score in top_k_cosine(vectors, query_vector, top_k)
+        ]
+
+    def retrieve_documents(self, query: str, top_k: int):
+        from core.services.artificial_intelligence import get_embedder, rerank_documents
+        from core.services.artificial_intelligence.reranker import RERANKER_CANDIDATES
+        from core.database.opensearch.hybrid_search import resolve_retrieval_settings
+
+        logger.info(f"Retrieving documents: {self.index_name}")
+
+        try:
+            # Vector search only, hybrid mode needs the OpenSearch BM25 index
+            rerank = resolve_retrieval_settings(self.retrieval_settings)["rerank"]
+            size = max(top_k, RERANKER_CANDIDATES) if rerank else top_k
+
+            documents = self.search_by_vector(get_embedder().embed_query(query), size)
+
+            return rerank_documents(query, documents, top_k) if rerank else documents
+        except Exception as e:
+            logger.error(f"Error to retrieve documents: {e}")
+            raise e
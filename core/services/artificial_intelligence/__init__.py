@@ -1,5 +1,18 @@
 from core.services.artificial_intelligence.rag import RAG
+from core.services.artificial_intelligence.embeddings import check_embedding_backend, get_embedding_model, warm_up_embedding_model
+from core.services.artificial_intelligence.embedding_batcher import EmbeddingBatcher, get_embedder
+from core.services.artificial_intelligence.embedding_cache import EmbeddingCache, get_embedding_cache
+from core.services.artificial_intelligence.reranker import get_reranker_model, rerank_documents
 
 __all__ = [
-    "RAG"
+    "RAG",
+    "check_embedding_backend",
+    "get_embedding_model",
+    "warm_up_embedding_model",
+    "EmbeddingBatcher",
+    "get_embedder",
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "get_reranker_model",
+    "rerank_documents"
 ]
\ No newline at end of file
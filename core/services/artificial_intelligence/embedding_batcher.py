@@ -0,0 +1,165 @@
+import os
+import atexit
+import logging
+import threading
+
+from concurrent.futures import Future
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from core.services.artificial_intelligence.embeddings import get_embedding_model
+from core.services.artificial_intelligence.embedding_cache import EMBEDDING_CACHE_ENABLED, CachedEmbeddings, get_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "false").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", 5))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding calls into one forward pass. Requests queue
+    up for at most window_ms after the first one (or until max_batch_size texts)
+    and a dedicated thread embeds them together, resolving one future per call.
+    A request is never split, so a larger embed_documents call runs on its own.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._condition = threading.Condition()
+        self._requests: list[tuple[list[str], Future]] = []
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, texts: list[str]) -> Future:
+        future = Future()
+
+        if not texts:
+            future.set_result([])
+            return future
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is closed")
+
+            self._start_thread()
+            self._requests.append((list(texts), future))
+            self._condition.notify()
+
+        return future
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.submit([text]).result()[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.submit(texts).result()
+
+    def _next_batch(self) -> list[tuple[list[str], Future]] | None:
+        with self._condition:
+            while not self._requests and not self._closed:
+                self._condition.wait()
+
+            if not self._requests:
+                return None
+
+            # The window starts with the first waiting request
+            self._condition.wait_for(
+                lambda: self._closed or sum(len(texts) for texts, _ in self._requests) >= self.max_batch_size,
+                timeout=self.window
+            )
+
+            batch, size = [], 0
+            while self._requests and (not batch or size + len(self._requests[0][0]) <= self.max_batch_size):
+                texts, future = self._requests.pop(0)
+                batch.append((texts, future))
+                size += len(texts)
+
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            self._embed(batch)
+
+    def _embed(self, batch: list[tuple[list[str], Future]]):
+        texts = [text for request_texts, _ in batch for text in request_texts]
+
+        try:
+            vectors = self.embed_fn(texts)
+        except Exception as e:
+            logger.error(f"Error to embed batch: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for request_texts, future in batch:
+            future.set_result(vectors[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+    def _start_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def _reset_after_fork(self):
+        # Requests of the parent are resolved by the parent's thread
+        self._condition = threading.Condition()
+        self._requests = []
+        self._thread = None
+        self._closed = False
+
+
+_lock = threading.Lock()
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+
+    if _batcher is None:
+        with _lock:
+            if _batcher is None:
+                # Queries and documents go through embed_documents so they can share
+                # a forward pass; the models in use encode both the same way
+                _batcher = EmbeddingBatcher(lambda texts: get_embedding_model().embed_documents(texts))
+                os.register_at_fork(after_in_child=_batcher._reset_after_fork)
+                atexit.register(_batcher.close)
+
+    return _batcher
+
+
+def get_embedder():
+    """
+    Returns what callers embed with: the shared batcher when batching is
+    enabled, otherwise the embedding model itself, behind the embedding cache
+    when it is enabled. All of them expose embed_query and embed_documents.
+    """
+    embedder = get_embedding_batcher() if EMBEDDING_BATCHING_ENABLED else get_embedding_model()
+
+    if EMBEDDING_CACHE_ENABLED:
+        return CachedEmbeddings(embedder, get_embedding_cache())
+
+    return embedder
@@ -0,0 +1,184 @@
+import os
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+
+from dotenv import load_dotenv
+
+from core.services.artificial_intelligence.embeddings import embedding_model_id
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "false").lower() == "true"
+EMBEDDING_CACHE_MAX_SIZE = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", 10000))
+EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "true").lower() == "true"
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", 7 * 24 * 3600))
+
+EMBEDDING_CACHE_PREFIX = "embedding"
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings with a process LRU tier in front of
+    an optional Redis tier. Keys are (model_name, sha256(text)), so changing
+    EMBEDDING_MODEL starts from an empty cache without any invalidation.
+    Vectors are kept as float32 arrays and only become lists when returned.
+    """
+
+    def __init__(self, model_name: str, max_size: int = EMBEDDING_CACHE_MAX_SIZE, redis_client=None):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.redis_client = redis_client
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def build_key(self, text: str) -> str:
+        return f"{EMBEDDING_CACHE_PREFIX}:{self.model_name}:{text_digest(text)}"
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        keys = [self.build_key(text) for text in texts]
+        vectors = [None] * len(texts)
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    vectors[index] = vector
+                    self.memory_hits += 1
+
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing and self.redis_client is not None:
+            try:
+                stored = self.redis_client.mget([keys[index] for index in missing])
+            except Exception as e:
+                logger.error(f"Error to load cached embeddings: {e}")
+                stored = [None] * len(missing)
+
+            found = {}
+            for index, data in zip(missing, stored):
+                if data is not None:
+                    vectors[index] = found[keys[index]] = decode_vector(data)
+
+            with self._lock:
+                self.redis_hits += len(found)
+                self._store(found)
+
+        with self._lock:
+            self.misses += sum(vector is None for vector in vectors)
+
+        return [vector.tolist() if vector is not None else None for vector in vectors]
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]):
+        entries = {self.build_key(text): np.asarray(vector, dtype=np.float32) for text, vector in zip(texts, vectors)}
+
+        with self._lock:
+            self._store(entries)
+
+        if self.redis_client is not None and entries:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                for key, vector in entries.items():
+                    pipeline.set(key, encode_vector(vector), ex=EMBEDDING_CACHE_TTL)
+                pipeline.execute()
+            except Exception as e:
+                logger.error(f"Error to store cached embeddings: {e}")
+
+    def _store(self, entries: dict[str, np.ndarray]):
+        for key, vector in entries.items():
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "persistent": self.redis_client is not None,
+                "memory_hits": self.memory_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings:
+    """
+    Wraps an embedder (the model or the batcher) so only texts missing from the
+    cache are embedded, each distinct text once per call.
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.cache.get_many(texts)
+
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, self.embedder.embed_documents(missing)))
+            self.cache.put_many(list(computed), list(computed.values()))
+            vectors = [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = self.cache.get_many([text])[0]
+
+        if vector is None:
+            vector = self.embedder.embed_query(text)
+            self.cache.put_many([text], [vector])
+
+        return vector
+
+
+_lock = threading.Lock()
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                from core.database.redis import get_redis_client
+
+                _cache = EmbeddingCache(embedding_model_id(), redis_client=get_redis_client() if EMBEDDING_CACHE_REDIS else None)
+
+    return _cache
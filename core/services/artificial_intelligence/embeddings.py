@@ -0,0 +1,72 @@
+import os
+import logging
+import threading
+import importlib.util
+
+from dotenv import load_dotenv
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.services.artificial_intelligence.onnx_embeddings import EMBEDDING_CONFIG_FILE, EMBEDDING_ONNX_PATH, OnnxEmbeddings
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "false").lower() == "true"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+TORCH_EMBEDDING_BACKEND = "torch"
+ONNX_EMBEDDING_BACKEND = "onnx"
+
+_lock = threading.Lock()
+_model: HuggingFaceEmbeddings | OnnxEmbeddings | None = None
+
+
+def embedding_model_id() -> str:
+    # Quantized vectors differ slightly, so cached ones are kept apart
+    if EMBEDDING_BACKEND == ONNX_EMBEDDING_BACKEND:
+        return f"{EMBEDDING_MODEL}:onnx"
+    return EMBEDDING_MODEL
+
+
+def check_embedding_backend():
+    """
+    Fails at startup when EMBEDDING_BACKEND cannot be served by this image,
+    instead of on the first embedding call of a request.
+    """
+    if EMBEDDING_BACKEND not in (TORCH_EMBEDDING_BACKEND, ONNX_EMBEDDING_BACKEND):
+        raise RuntimeError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+    if EMBEDDING_BACKEND == ONNX_EMBEDDING_BACKEND:
+        if importlib.util.find_spec("onnxruntime") is None:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx needs onnxruntime, install requirements-optional.txt")
+        if not os.path.exists(os.path.join(EMBEDDING_ONNX_PATH, EMBEDDING_CONFIG_FILE)):
+            raise RuntimeError(f"No exported ONNX model in {EMBEDDING_ONNX_PATH}, run core.services.artificial_intelligence.onnx_export")
+
+
+def get_embedding_model() -> HuggingFaceEmbeddings | OnnxEmbeddings:
+    """
+    Returns the embedding model of the current process, loading it on first use.
+    """
+    global _model
+
+    if _model is None:
+        with _lock:
+            if _model is None:
+                if EMBEDDING_BACKEND == ONNX_EMBEDDING_BACKEND:
+                    logger.info(f"Loading ONNX embedding model: {EMBEDDING_ONNX_PATH}")
+                    _model = OnnxEmbeddings(EMBEDDING_ONNX_PATH)
+                else:
+                    logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
+                    _model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+    return _model
+
+
+def warm_up_embedding_model():
+    if not EMBEDDING_WARMUP:
+        return
+
+    logger.info("Warming up embedding model")
+    get_embedding_model().embed_query("warm up")
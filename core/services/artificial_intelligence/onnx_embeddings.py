@@ -0,0 +1,86 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH", "onnx_models/embedding")
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", 0))
+EMBEDDING_ONNX_BATCH_SIZE = int(os.getenv("EMBEDDING_ONNX_BATCH_SIZE", 32))
+
+EMBEDDING_CONFIG_FILE = "embedding_config.json"
+
+
+def pool_embeddings(hidden_states: np.ndarray, attention_mask: np.ndarray, pooling: str = "mean", normalize: bool = True) -> np.ndarray:
+    """
+    Same pooling as the sentence-transformers modules the model was exported
+    from: mean over the real tokens (or the CLS token), then L2 normalization.
+    """
+    if pooling == "cls":
+        embeddings = hidden_states[:, 0]
+    else:
+        mask = attention_mask[..., None].astype(hidden_states.dtype)
+        embeddings = (hidden_states * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    if normalize:
+        embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+    return embeddings
+
+
+class OnnxEmbeddings:
+    """
+    Embedding model served by ONNX Runtime on CPU, from a directory written by
+    core.services.artificial_intelligence.onnx_export. Exposes embed_query and
+    embed_documents like HuggingFaceEmbeddings.
+    """
+
+    def __init__(self, model_dir: str = EMBEDDING_ONNX_PATH, batch_size: int = EMBEDDING_ONNX_BATCH_SIZE):
+        # An optional requirement, only installed where the ONNX backend is used
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, EMBEDDING_CONFIG_FILE)) as config_file:
+            self.config = json.load(config_file)
+
+        options = onnxruntime.SessionOptions()
+        if EMBEDDING_ONNX_THREADS:
+            options.intra_op_num_threads = EMBEDDING_ONNX_THREADS
+
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, self.config["model_file"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.config["max_seq_length"],
+            return_tensors="np"
+        )
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+
+        hidden_states = self.session.run(None, inputs)[0]
+        return pool_embeddings(hidden_states, encoded["attention_mask"], self.config["pooling"], self.config["normalize"])
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        return np.concatenate([
+            self._embed_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
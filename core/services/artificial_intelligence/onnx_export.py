@@ -0,0 +1,203 @@
+"""
+Exports the embedding model to ONNX with int8 dynamic quantization, and
+compares it with the PyTorch model it came from.
+
+    python -m core.services.artificial_intelligence.onnx_export [--model NAME] [--output DIR] [--no-quantize] [--check]
+    python -m core.services.artificial_intelligence.onnx_export --check-only [--texts-file FILE] [--min-cosine 0.99]
+
+Set EMBEDDING_BACKEND=onnx and EMBEDDING_ONNX_PATH to the output directory to
+serve the exported model. The ONNX packages are optional requirements, see
+requirements-optional.txt.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from core.services.artificial_intelligence.embeddings import EMBEDDING_MODEL
+from core.services.artificial_intelligence.onnx_embeddings import EMBEDDING_CONFIG_FILE, EMBEDDING_ONNX_PATH, OnnxEmbeddings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXTS = [
+    "How do I reset my password?",
+    "The invoice for order 48213 was charged twice.",
+    "Agents can search the web and create documents.",
+    "Quarterly revenue grew 12% compared to last year.",
+    "Restart the worker after changing the broker URL.",
+    "SKU-7781 is out of stock in the Lisbon warehouse.",
+    "Summarize the meeting notes from Monday.",
+    "The API returns 409 when the conversation is closed.",
+    "Python 3.11 is required to run the service.",
+    "Our refund policy allows returns within 30 days.",
+    "OpenSearch stores the document chunks as kNN vectors.",
+    "Translate the onboarding guide into Portuguese.",
+    "The cat sat quietly on the warm windowsill.",
+    "Schedule a call with the sales team next Thursday.",
+    "Latency increased after the last deployment.",
+    "Export the conversation history as NDJSON.",
+]
+
+
+def export_onnx_model(model_name: str = EMBEDDING_MODEL, output_dir: str = EMBEDDING_ONNX_PATH, quantize: bool = True, opset: int = 17) -> dict:
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"Exporting {model_name} to ONNX in {output_dir}")
+
+    sentence_model = SentenceTransformer(model_name, device="cpu")
+    transformer = sentence_model[0]
+    pooling = next((module for module in sentence_model if isinstance(module, models.Pooling)), None)
+
+    os.makedirs(output_dir, exist_ok=True)
+    encoded = transformer.tokenizer(["export"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in encoded]
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in [*input_names, "last_hidden_state"]}
+    fp32_path = os.path.join(output_dir, "model.onnx")
+
+    transformer.auto_model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model),
+            tuple(encoded[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    model_file = "model.onnx"
+    if quantize:
+        # Weights become int8, activations are quantized on the fly per batch
+        quantize_dynamic(fp32_path, os.path.join(output_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+        model_file = "model_int8.onnx"
+
+    transformer.tokenizer.save_pretrained(output_dir)
+
+    config = {
+        "model_name": model_name,
+        "model_file": model_file,
+        "quantized": quantize,
+        "pooling": "cls" if pooling and pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(isinstance(module, models.Normalize) for module in sentence_model),
+        "max_seq_length": sentence_model.max_seq_length,
+    }
+    with open(os.path.join(output_dir, EMBEDDING_CONFIG_FILE), "w") as config_file:
+        json.dump(config, config_file, indent=2)
+
+    return config
+
+
+def _best_time(encode, texts: list[str], runs: int) -> tuple[np.ndarray, float]:
+    encode(texts[:2])  # warm up
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        vectors = np.asarray(encode(texts), dtype=np.float32)
+        timings.append(time.perf_counter() - started)
+
+    return vectors, min(timings)
+
+
+def compare_with_baseline(model_dir: str = EMBEDDING_ONNX_PATH, texts: list[str] | None = None, runs: int = 3, top_k: int = 5) -> dict:
+    """
+    Encodes the same texts with the PyTorch model and the ONNX one and reports
+    how close the vectors are (cosine per text, overlap of the top_k
+    neighbours) and how fast each is on this machine.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    with open(os.path.join(model_dir, EMBEDDING_CONFIG_FILE)) as config_file:
+        config = json.load(config_file)
+
+    texts = texts or SAMPLE_TEXTS * 16
+    baseline_model = SentenceTransformer(config["model_name"], device="cpu")
+    onnx_model = OnnxEmbeddings(model_dir)
+
+    baseline, baseline_seconds = _best_time(lambda batch: baseline_model.encode(batch, batch_size=onnx_model.batch_size), texts, runs)
+    onnx_vectors, onnx_seconds = _best_time(onnx_model.embed_documents, texts, runs)
+
+    def normalized(vectors):
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    baseline, onnx_vectors = normalized(baseline), normalized(onnx_vectors)
+    cosine = (baseline * onnx_vectors).sum(axis=1)
+
+    # Neighbour lists over the distinct texts, excluding the text itself
+    first_rows = {}
+    for row, text in enumerate(texts):
+        first_rows.setdefault(text, row)
+    rows = list(first_rows.values())
+    k = min(top_k, len(rows) - 1)
+
+    neighbour_overlap = 1.0
+    if k > 0:
+        neighbours = []
+        for vectors in (baseline[rows], onnx_vectors[rows]):
+            scores = vectors @ vectors.T
+            np.fill_diagonal(scores, -np.inf)
+            neighbours.append(np.argsort(-scores, axis=1)[:, :k])
+        neighbour_overlap = float(np.mean([
+            len(set(baseline_row) & set(onnx_row)) / k for baseline_row, onnx_row in zip(*neighbours)
+        ]))
+
+    return {
+        "model_name": config["model_name"],
+        "model_file": config["model_file"],
+        "texts": len(texts),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "top_k": k,
+        "neighbour_overlap": neighbour_overlap,
+        "torch_seconds": baseline_seconds,
+        "onnx_seconds": onnx_seconds,
+        "torch_texts_per_second": len(texts) / baseline_seconds,
+        "onnx_texts_per_second": len(texts) / onnx_seconds,
+        "speedup": baseline_seconds / onnx_seconds,
+        "onnx_model_mb": os.path.getsize(os.path.join(model_dir, config["model_file"])) / 2**20,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX and check it against PyTorch")
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="sentence-transformers model to export")
+    parser.add_argument("--output", default=EMBEDDING_ONNX_PATH, help="Directory of the exported model")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep the float32 graph only")
+    parser.add_argument("--check", action="store_true", help="Compare with the PyTorch model after exporting")
+    parser.add_argument("--check-only", action="store_true", help="Only compare an already exported model")
+    parser.add_argument("--texts-file", help="Texts to compare on, one per line")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail the check below this mean cosine")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        print(json.dumps(export_onnx_model(args.model, args.output, quantize=not args.no_quantize), indent=2))
+
+    if args.check or args.check_only:
+        texts = None
+        if args.texts_file:
+            with open(args.texts_file) as texts_file:
+                texts = [line.strip() for line in texts_file if line.strip()]
+
+        report = compare_with_baseline(args.output, texts)
+        print(json.dumps(report, indent=2))
+
+        if report["mean_cosine"] < args.min_cosine:
+            print(f"Mean cosine {report['mean_cosine']:.4f} is below {args.min_cosine}", file=sys.stderr)
+            sys.exit(1)
@@ -1,8 +1,9 @@
-import os
 import logging
 
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.services.artificial_intelligence.embeddings import EMBEDDING_MODEL
+from core.services.artificial_intelligence.embedding_batcher import get_embedder
 
 logger = logging.Logger(__name__)
 
@@ -10,8 +11,11 @@ load_dotenv()
 
 class RAG:
     def __init__(self):
-        self.model_name = os.getenv("EMBEDDING_MODEL")
-        self.model = HuggingFaceEmbeddings(model_name=self.model_name)
+        self.model_name = EMBEDDING_MODEL
+
+    @property
+    def model(self):
+        return get_embedder()
     
     def embedding_sentence(self, sentence) -> list:
         logging.info(f"Embedding sentence: {sentence[:50]}...")
@@ -31,13 +35,21 @@ class RAG:
             logger.error(f"Error to embed documents: {e}")
             raise e
     
-    def retrieve_documents_by_similarity(self, index_name: str, query: str, top_k: int) -> list:
-        from core.database.opensearch import OpenSearchHandler
+    def retrieve_documents_by_similarity(
+        self,
+        index_name: str,
+        query: str,
+        top_k: int,
+        agent_id: str | None = None,
+        retrieval_settings: dict | None = None
+    ) -> list:
+        from core.database.vector_store import open_vector_store
         logging.info("Retrieving documents")
-        opensearch_handler = OpenSearchHandler(index_name=index_name)
+        # agent_id is only needed for agents on the shared index
+        vector_store = open_vector_store(index_name, agent_id=agent_id, retrieval_settings=retrieval_settings)
 
         try:
-            documents = opensearch_handler.retrieve_documents(query=query, top_k=top_k)
+            documents = vector_store.retrieve_documents(query=query, top_k=top_k)
             return documents
         except Exception as e:
             logger.error(f"Error to embed documents: {e}")
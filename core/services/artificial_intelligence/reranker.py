@@ -0,0 +1,55 @@
+import os
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANKER_CANDIDATES = int(os.getenv("RERANKER_CANDIDATES", 20))
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", 32))
+
+_lock = threading.Lock()
+_model = None
+
+
+def get_reranker_model():
+    """
+    Returns the cross-encoder of the current process, loading it on first use.
+    """
+    global _model
+
+    if _model is None:
+        with _lock:
+            if _model is None:
+                # Only needed when reranking is enabled for some agent
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading reranker model: {RERANKER_MODEL}")
+                _model = CrossEncoder(RERANKER_MODEL, device="cpu")
+
+    return _model
+
+
+def rerank_documents(query: str, documents: list, top_k: int) -> list:
+    """
+    Scores every (query, chunk) pair with the cross-encoder in batches and
+    keeps the best top_k, best first.
+    """
+    if not documents:
+        return []
+
+    scores = get_reranker_model().predict(
+        [(query, document.page_content) for document in documents],
+        batch_size=RERANKER_BATCH_SIZE,
+        show_progress_bar=False
+    )
+
+    ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)[:top_k]
+    for document, score in ranked:
+        document.metadata["rerank_score"] = float(score)
+
+    return [document for document, _ in ranked]
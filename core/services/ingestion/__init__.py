@@ -0,0 +1,15 @@
+from core.services.ingestion.pipeline import INGESTION_JOB_TYPE, IngestionPipeline
+from core.services.ingestion.chunking import batched, content_hash, iter_changed_chunks, iter_chunks, split_text
+from core.services.ingestion.parsers import SUPPORTED_EXTENSIONS, iter_document_pages
+
+__all__ = [
+    "INGESTION_JOB_TYPE",
+    "IngestionPipeline",
+    "batched",
+    "content_hash",
+    "iter_changed_chunks",
+    "iter_chunks",
+    "split_text",
+    "SUPPORTED_EXTENSIONS",
+    "iter_document_pages"
+]
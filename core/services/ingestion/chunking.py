@@ -0,0 +1,99 @@
+import os
+import hashlib
+
+from typing import Iterable, Iterator, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INGESTION_CHUNK_SIZE = int(os.getenv("INGESTION_CHUNK_SIZE", 1000))
+INGESTION_CHUNK_OVERLAP = int(os.getenv("INGESTION_CHUNK_OVERLAP", 200))
+
+T = TypeVar("T")
+
+
+def content_hash(text: str) -> str:
+    # Whitespace-only edits (re-extraction, line wrapping) do not count as changes
+    return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+
+
+def chunk_id(source_id: str, chunk_hash: str) -> str:
+    # Same text in the same source always maps to the same document id
+    return f"{hashlib.sha256(source_id.encode()).hexdigest()[:16]}:{chunk_hash}"
+
+
+def split_text(text: str, chunk_size: int = INGESTION_CHUNK_SIZE, chunk_overlap: int = INGESTION_CHUNK_OVERLAP) -> Iterator[str]:
+    """
+    Splits the text in windows of up to chunk_size characters overlapping by
+    chunk_overlap, cutting at the last whitespace of the window when there is one.
+    """
+    text = text.strip()
+    start = 0
+
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+
+        if end < len(text):
+            boundary = text.rfind(" ", start + chunk_overlap + 1, end)
+            if boundary != -1:
+                end = boundary
+
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+
+        if end >= len(text):
+            break
+        start = max(end - chunk_overlap, start + 1)
+
+
+def iter_chunks(
+    pages: Iterable[tuple[int, str]],
+    chunk_size: int = INGESTION_CHUNK_SIZE,
+    chunk_overlap: int = INGESTION_CHUNK_OVERLAP
+) -> Iterator[dict]:
+    chunk_number = 0
+
+    for page_number, text in pages:
+        for chunk in split_text(text, chunk_size, chunk_overlap):
+            yield {"text": chunk, "page": page_number, "chunk": chunk_number}
+            chunk_number += 1
+
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    batch = []
+
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def iter_changed_chunks(
+    chunks: Iterable[dict],
+    source_id: str,
+    existing_ids: set[str],
+    seen_ids: set[str],
+    progress: dict
+) -> Iterator[dict]:
+    """
+    Tags the chunks with their content hash and id, and yields only the ones not
+    indexed yet. Every id of the current source version is added to seen_ids.
+    """
+    for chunk in chunks:
+        chunk["content_hash"] = content_hash(chunk["text"])
+        chunk["id"] = chunk_id(source_id, chunk["content_hash"])
+
+        already_indexed = chunk["id"] in seen_ids or chunk["id"] in existing_ids
+        seen_ids.add(chunk["id"])
+
+        if already_indexed:
+            progress["chunks_skipped"] += 1
+            continue
+
+        yield chunk
@@ -0,0 +1,62 @@
+import os
+import logging
+
+from typing import Iterator
+
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+DOCLING_EXTENSIONS = {".docx", ".pptx", ".html"}
+SUPPORTED_EXTENSIONS = {".pdf", *TEXT_EXTENSIONS, *DOCLING_EXTENSIONS}
+
+# Plain text files are read in blocks of this size, so a large file is never
+# held in memory at once
+TEXT_BLOCK_SIZE = 64 * 1024
+
+
+def count_document_pages(file_path: str) -> int | None:
+    if os.path.splitext(file_path)[1].lower() == ".pdf":
+        return len(PdfReader(file_path).pages)
+    return None
+
+
+def _iter_pdf_pages(file_path: str) -> Iterator[tuple[int, str]]:
+    reader = PdfReader(file_path)
+
+    for page_number, page in enumerate(reader.pages, start=1):
+        yield page_number, page.extract_text() or ""
+
+
+def _iter_text_blocks(file_path: str) -> Iterator[tuple[int, str]]:
+    with open(file_path, encoding="utf-8", errors="replace") as file:
+        block_number = 1
+        while block := file.read(TEXT_BLOCK_SIZE):
+            yield block_number, block
+            block_number += 1
+
+
+def _iter_docling_sections(file_path: str) -> Iterator[tuple[int, str]]:
+    # Docling loads its layout models on import, only pay for it on these formats
+    from langchain_docling import DoclingLoader
+
+    for section_number, document in enumerate(DoclingLoader(file_path=file_path).lazy_load(), start=1):
+        yield section_number, document.page_content
+
+
+def iter_document_pages(file_path: str) -> Iterator[tuple[int, str]]:
+    """
+    Yields (page_number, text) one page at a time. Text files are split in
+    fixed-size blocks and docling formats in the sections docling produces.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == ".pdf":
+        return _iter_pdf_pages(file_path)
+    if extension in TEXT_EXTENSIONS:
+        return _iter_text_blocks(file_path)
+    if extension in DOCLING_EXTENSIONS:
+        return _iter_docling_sections(file_path)
+
+    raise ValueError(f"Unsupported document type: {extension}")
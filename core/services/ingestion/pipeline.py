@@ -0,0 +1,89 @@
+import os
+import logging
+
+from typing import Callable
+from dotenv import load_dotenv
+
+from core.services.artificial_intelligence import RAG
+from core.database.vector_store import VectorStore
+from core.services.ingestion.chunking import batched, iter_changed_chunks, iter_chunks
+from core.services.ingestion.parsers import count_document_pages, iter_document_pages
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", 64))
+
+# Tags the Celery results of ingestion jobs, other tasks share the result backend
+INGESTION_JOB_TYPE = "ingestion"
+
+
+class IngestionPipeline:
+    """
+    Parses, chunks, embeds and indexes one document as a generator pipeline:
+    only one batch of chunks and its vectors is in memory at a time.
+    Re-ingesting a source only embeds new or changed chunks and deletes the
+    chunks that are no longer in it.
+    """
+
+    def __init__(self, vector_store: VectorStore, batch_size: int = INGESTION_BATCH_SIZE):
+        self.vector_store = vector_store
+        self.rag = RAG()
+        self.batch_size = batch_size
+
+    def ingest(
+        self,
+        file_path: str,
+        source_id: str,
+        metadata: dict | None = None,
+        on_progress: Callable[[dict], None] | None = None
+    ) -> dict:
+        logger.info(f"Ingesting {source_id} into index: {self.vector_store.index_name}")
+
+        progress = {
+            "source_id": source_id,
+            "pages_total": count_document_pages(file_path),
+            "pages_processed": 0,
+            "chunks_indexed": 0,
+            "chunks_skipped": 0,
+            "chunks_deleted": 0,
+        }
+
+        self.vector_store.ensure_chunk_mapping()
+        existing_ids = self.vector_store.get_source_chunk_ids(source_id)
+        seen_ids = set()
+
+        chunks = iter_changed_chunks(
+            iter_chunks(iter_document_pages(file_path)), source_id, existing_ids, seen_ids, progress
+        )
+
+        for batch in batched(chunks, self.batch_size):
+            vectors = self.rag.embedding_documents([chunk["text"] for chunk in batch])
+
+            progress["chunks_indexed"] += self.vector_store.bulk_index_chunks([
+                {
+                    "id": chunk["id"],
+                    "vector": vector,
+                    "text": chunk["text"],
+                    "metadata": {
+                        **(metadata or {}),
+                        "source_id": source_id,
+                        "content_hash": chunk["content_hash"],
+                        "page": chunk["page"],
+                    },
+                }
+                for chunk, vector in zip(batch, vectors)
+            ])
+            progress["pages_processed"] = batch[-1]["page"]
+
+            if on_progress:
+                on_progress(progress)
+
+        removed_ids = list(existing_ids - seen_ids)
+        for batch in batched(removed_ids, self.batch_size * 10):
+            progress["chunks_deleted"] += self.vector_store.bulk_delete_chunks(batch)
+
+        progress["pages_processed"] = progress["pages_total"] or progress["pages_processed"]
+        self.vector_store.refresh_index()
+        return progress
@@ -14,4 +14,6 @@ class AgentModel(BaseModel, table=True):
     opensearch_index: str = Field(nullable=True)
     tools: List[str] = Field(sa_column=Column(JSON, nullable=False))
     provider: Optional[str] = Field(nullable=True)
+    history_token_budget: Optional[int] = Field(default=None, nullable=True)
+    retrieval_settings: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
     user_id: uuid.UUID = ForeignKey("users.id")
\ No newline at end of file
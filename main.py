@@ -5,6 +5,9 @@ from fastapi import FastAPI
 
 from routers import agent, users, integrations, auth
 from database.config import create_db_and_tables
+from core.database.mongo import close_mongo_clients, close_async_mongo_clients, ensure_history_indexes, history_write_buffer
+from core.database.mongo.history_archive import check_archive_dependencies
+from core.services.artificial_intelligence import check_embedding_backend, warm_up_embedding_model
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,8 +21,15 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    check_archive_dependencies()
+    check_embedding_backend()
     create_db_and_tables()
+    ensure_history_indexes()
+    warm_up_embedding_model()
     yield
+    history_write_buffer.close()
+    close_mongo_clients()
+    await close_async_mongo_clients()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -1,4 +1,4 @@
-from models.agent import AgentRequest, AgentBaseModel, AgentUpdateModel
+from models.agent import AgentRequest, AgentBaseModel, AgentUpdateModel, RetrievalSettings
 from models.headers import CommonHeaders
 from models.users import UserBaseModel, UserLoginModel, UserUpdateModel, UserResponseModel
 
@@ -6,6 +6,7 @@ __all__ = [
     "AgentRequest",
     "AgentBaseModel",
     "AgentUpdateModel",
+    "RetrievalSettings",
     "CommonHeaders",
     "UserBaseModel",
     "UserLoginModel",
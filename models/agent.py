@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import Field as PydanticField
+from typing import List, Literal, Optional
 from sqlmodel import Field, JSON
 from sqlalchemy import Column
 
@@ -8,6 +9,16 @@ from sqlmodel import SQLModel
 
 class AgentRequest(BaseModel):
     message: str
+    conversation_id: Optional[str] = None
+
+
+class RetrievalSettings(BaseModel):
+    mode: Optional[Literal["vector", "hybrid"]] = None
+    lexical_weight: Optional[float] = PydanticField(default=None, ge=0)
+    vector_weight: Optional[float] = PydanticField(default=None, ge=0)
+    rank_constant: Optional[int] = PydanticField(default=None, ge=1)
+    candidates: Optional[int] = PydanticField(default=None, ge=1, le=1000)
+    rerank: Optional[bool] = None
 
 
 class AgentBaseModel(SQLModel):
@@ -16,10 +27,15 @@ class AgentBaseModel(SQLModel):
     system_prompt: str = Field(nullable=False)
     tools: List[str] = Field(sa_column=Column(JSON, nullable=False))
     provider: Optional[str] = Field(nullable=True)
+    history_token_budget: Optional[int] = Field(default=None, nullable=True)
+    retrieval_settings: Optional[RetrievalSettings] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    vector_store: Optional[Literal["opensearch", "local"]] = None
 
 class AgentUpdateModel(SQLModel):
     name: str | None = None
     description: str | None = None
     system_prompt: str | None = None
     tools: List[str] | None = None
-    provider: str | None = None
\ No newline at end of file
+    provider: str | None = None
+    history_token_budget: int | None = None
+    retrieval_settings: RetrievalSettings | None = None
\ No newline at end of file
@@ -1,23 +1,31 @@
 import os
+import uuid
 import asyncio
 import logging
 
-from typing import Annotated
+from typing import Annotated, Literal
 from celery.result import AsyncResult
-from fastapi import APIRouter, Depends, Header, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, File, Header, Query, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from core.agents import AgentDeps
+from core.agents import AgentDeps, agent_cache
 from core.api import AgentsAPIView
 from database.models.users import UserModel
 from core.websocket import ConnectionManager
 from database.models.agent import AgentModel
-from core.database.mongo import DatabaseHandler
+from core.database.mongo import MONGODB_ASYNC_HISTORY, DatabaseHandler, AsyncDatabaseHandler
+from core.database.mongo.database_handler import HISTORY_EXPORT_BATCH_SIZE
+from core.database.redis import TaskEventSubscriber
+from core.services.artificial_intelligence import get_embedding_cache
+from core.services.artificial_intelligence.embedding_cache import EMBEDDING_CACHE_ENABLED
 from core.auth import validate_api_key, validate_api_key_websocket
 from models import AgentRequest, AgentBaseModel, AgentUpdateModel, CommonHeaders
 
 logger = logging.getLogger(__name__)
 
 MONGO_HISTORY_COLLECTION = os.getenv("MONGODB_HISTORY_COLLECTION")
+AGENT_TASK_TIMEOUT = float(os.getenv("AGENT_TASK_TIMEOUT", 300))
 
 router = APIRouter(
     prefix="/agent",
@@ -40,9 +48,23 @@ async def websocket_invoke_agent(websocket: WebSocket):
     from celery_worker import execute_agent_task
 
     await manager.connect(websocket)
+    subscriber = None
     try:
         data = await websocket.receive_json()
-        task = execute_agent_task.delay(data.get("message"), user.id, data.get("agent_id"))
+
+        conversation_id = data.get("conversation_id")
+        await run_in_threadpool(
+            AgentsAPIView().ensure_conversation_open, data.get("agent_id"), user.id, conversation_id
+        )
+
+        task_id = str(uuid.uuid4())
+        subscriber = TaskEventSubscriber(task_id)
+        await subscriber.subscribe()
+
+        task = execute_agent_task.apply_async(
+            args=(data.get("message"), user.id, data.get("agent_id"), conversation_id),
+            task_id=task_id
+        )
 
         logger.info(f"Task created with id: {task.id}")
 
@@ -51,16 +73,38 @@ async def websocket_invoke_agent(websocket: WebSocket):
             "status": "started"
         }, websocket)
 
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + AGENT_TASK_TIMEOUT
+
         while True:
-            task_result = get_invoke_result(task.id)
+            event = await subscriber.get_event(timeout=deadline - loop.time())
 
-            await manager.send_personal_message(task_result, websocket)
+            if event is None:
+                # No completion event in time, check the result backend once before giving up
+                task_result = await run_in_threadpool(get_task_result, task.id)
+                if task_result.get("status") == "in progress":
+                    task_result = {"task_id": task.id, "status": "timeout", "result": {"message": "Agent took too long to process your request."}}
 
-            if task_result.get("status") in ["completed", "failed"]:
-                logger.info(f"Task finished with status: {task_result.get("status")}")
+                await manager.send_personal_message(task_result, websocket)
+                logger.info(f"Task finished with status: {task_result.get('status')}")
                 break
 
-            await asyncio.sleep(1)
+            if event.get("type") == "delta":
+                await manager.send_personal_message({
+                    "task_id": task.id,
+                    "status": "streaming",
+                    "delta": event.get("content")
+                }, websocket)
+                continue
+
+            if event.get("type") in ["completed", "failed"]:
+                await manager.send_personal_message({
+                    "task_id": task.id,
+                    "status": event.get("type"),
+                    "result": event.get("result")
+                }, websocket)
+                logger.info(f"Task finished with status: {event.get('type')}")
+                break
             
     except WebSocketDisconnect:
         logger.error("Websocket disconnected")
@@ -72,23 +116,28 @@ async def websocket_invoke_agent(websocket: WebSocket):
             "message": str(e)
         }, websocket)
     finally:
+        if subscriber:
+            await subscriber.close()
         try:
             await manager.disconnect(websocket)
         except Exception:
             pass
 
+def get_task_result(task_id: str):
+    task_result = AsyncResult(task_id)
+    if task_result.ready():
+        return {"task_id": task_id, "status": "completed", "result": task_result.result}
+    elif task_result.failed():
+        return {"task_id": task_id, "status": "failed", "result": {"message": "Agent cannot process your request."}}
+    else:
+        return {"task_id": task_id, "status": "in progress", "result": {"message": "Agent is processing your request..."}}
+
 @router.get("/get-async-agent-result/{task_id}")
 def get_invoke_result(task_id: str, user: UserModel = Depends(validate_api_key)):
     logger.info(f"Getting task status with id: {task_id} for user: {user.name}")
 
     try:
-        task_result = AsyncResult(task_id)
-        if task_result.ready():
-            return {"task_id": task_id, "status": "completed", "result": task_result.result}
-        elif task_result.failed():
-            return {"task_id": task_id, "status": "failed", "result": {"message": "Agent cannot process your request."}}
-        else:
-            return {"task_id": task_id, "status": "in progress", "result": {"message": "Agent is processing your request..."}}
+        return get_task_result(task_id)
     except Exception as e:
         logger.error(f"Error to get task result: {e}")
         raise e
@@ -99,33 +148,49 @@ def invoke_agent_async(request: AgentRequest, header: Annotated[CommonHeaders, H
     from celery_worker import execute_agent_task
 
     try:
-        task = execute_agent_task.delay(request.message, user.id, header.agent_id)
-        return {"task_id": task.id}
+        AgentsAPIView().ensure_conversation_open(header.agent_id, user.id, request.conversation_id)
+        task = execute_agent_task.delay(request.message, user.id, header.agent_id, request.conversation_id)
+        return {"task_id": task.id, "conversation_id": request.conversation_id}
     except Exception as e:
         logger.error(f"Error to execute agent asynchronously: {e}")
         raise e
 
 @router.post("/execute/sync")
-def invoke_agent_sync(request: AgentRequest, header: Annotated[CommonHeaders, Header()], user: UserModel = Depends(validate_api_key)):
+async def invoke_agent_sync(request: AgentRequest, header: Annotated[CommonHeaders, Header()], user: UserModel = Depends(validate_api_key)):
     logger.info(f"Executing agent ({header.agent_id}) synchronously")
-    from core.agents import OrchestratorAgent
 
     try:
-        agent = AgentsAPIView().get_agent(header.agent_id, user.id)
+        agent = await run_in_threadpool(lambda: AgentsAPIView().get_agent(header.agent_id, user.id))
+        await run_in_threadpool(
+            AgentsAPIView().ensure_conversation_open, header.agent_id, user.id, request.conversation_id
+        )
 
         deps = AgentDeps(
-            db=DatabaseHandler(MONGO_HISTORY_COLLECTION),
+            db=AsyncDatabaseHandler(MONGO_HISTORY_COLLECTION) if MONGODB_ASYNC_HISTORY else DatabaseHandler(MONGO_HISTORY_COLLECTION),
             user_id=str(user.id),
-            agent_id=str(header.agent_id)
+            agent_id=str(header.agent_id),
+            conversation_id=request.conversation_id
         )
 
-        agent = OrchestratorAgent(agent)
-        response = agent.execute(request.message, is_tool_agent=False, deps=deps)
-        return {"message": response}
+        agent = await run_in_threadpool(agent_cache.get_or_build, agent)
+        response = await agent.execute_async(request.message, is_tool_agent=False, deps=deps)
+        return {"message": response, "conversation_id": request.conversation_id}
     except Exception as e:
         logger.error(f"Error to execute agent synchronously: {e}")
         raise e
 
+@router.get("/cache/stats")
+def get_agent_cache_stats(user: UserModel = Depends(validate_api_key)):
+    logger.info("Getting agent cache stats")
+    return agent_cache.stats()
+
+@router.get("/embeddings/cache/stats")
+def get_embedding_cache_stats(user: UserModel = Depends(validate_api_key)):
+    logger.info("Getting embedding cache stats")
+    if not EMBEDDING_CACHE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_embedding_cache().stats()}
+
 @router.post("/create")
 def create_agent(agent: AgentBaseModel, user: UserModel = Depends(validate_api_key)):
     logger.info("Creating agent")
@@ -133,7 +198,7 @@ def create_agent(agent: AgentBaseModel, user: UserModel = Depends(validate_api_k
         agent_model = agent.model_dump_json()
         logger.info(f"Agent data: {agent_model}")
         agent_model = AgentModel.model_validate_json(agent_model)
-        return AgentsAPIView().create_agent(agent_model, user.id)
+        return AgentsAPIView().create_agent(agent_model, user.id, vector_store=agent.vector_store)
     except Exception as e:
         logger.error(f"Error creating agent: {e}")
         raise e
@@ -176,4 +241,98 @@ def delete_agent(agent_id: str, user: UserModel = Depends(validate_api_key)):
     except Exception as e:
         logger.error(f"Error deleting agent: {e}")
         raise e
-    
\ No newline at end of file
+
+@router.get("/{agent_id}/history")
+def get_agent_history(
+    agent_id: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    conversation_id: str | None = None,
+    include_archived: bool = False,
+    user: UserModel = Depends(validate_api_key)
+):
+    logger.info(f"Getting history of agent: {agent_id}")
+    try:
+        return AgentsAPIView().get_agent_history(
+            agent_id,
+            user.id,
+            limit=limit,
+            cursor=cursor,
+            conversation_id=conversation_id,
+            include_archived=include_archived
+        )
+    except Exception as e:
+        logger.error(f"Error getting agent history ({agent_id}): {e}")
+        raise e
+
+@router.get("/{agent_id}/history/export")
+def export_agent_history(
+    agent_id: str,
+    conversation_id: str | None = None,
+    batch_size: int = Query(default=HISTORY_EXPORT_BATCH_SIZE, ge=1, le=5000),
+    include_archived: bool = False,
+    include_messages: bool = False,
+    default_conversation: bool = False,
+    user: UserModel = Depends(validate_api_key)
+):
+    logger.info(f"Exporting history of agent: {agent_id}")
+    try:
+        lines = AgentsAPIView().export_agent_history(
+            agent_id,
+            user.id,
+            batch_size=batch_size,
+            conversation_id=conversation_id,
+            include_archived=include_archived,
+            include_messages=include_messages,
+            default_conversation=default_conversation
+        )
+        return StreamingResponse(
+            lines,
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="agent-{agent_id}-history.ndjson"'}
+        )
+    except Exception as e:
+        logger.error(f"Error exporting agent history ({agent_id}): {e}")
+        raise e
+
+@router.post("/{agent_id}/documents")
+def upload_agent_document(agent_id: str, file: UploadFile = File(...), user: UserModel = Depends(validate_api_key)):
+    logger.info(f"Uploading document to agent: {agent_id}")
+    try:
+        return AgentsAPIView().upload_agent_document(agent_id, user.id, file)
+    except Exception as e:
+        logger.error(f"Error uploading document to agent ({agent_id}): {e}")
+        raise e
+
+@router.get("/documents/jobs/{job_id}")
+def get_ingestion_job(job_id: str, user: UserModel = Depends(validate_api_key)):
+    logger.info(f"Getting ingestion job: {job_id}")
+    try:
+        return AgentsAPIView().get_ingestion_job(job_id, user.id)
+    except Exception as e:
+        logger.error(f"Error getting ingestion job ({job_id}): {e}")
+        raise e
+
+@router.get("/{agent_id}/conversations")
+def get_agent_conversations(
+    agent_id: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    status: Literal["open", "closed"] | None = None,
+    user: UserModel = Depends(validate_api_key)
+):
+    logger.info(f"Getting conversations of agent: {agent_id}")
+    try:
+        return AgentsAPIView().list_conversations(agent_id, user.id, limit=limit, cursor=cursor, status=status)
+    except Exception as e:
+        logger.error(f"Error getting agent conversations ({agent_id}): {e}")
+        raise e
+
+@router.post("/{agent_id}/conversations/{conversation_id}/close")
+def close_agent_conversation(agent_id: str, conversation_id: str, user: UserModel = Depends(validate_api_key)):
+    logger.info(f"Closing conversation {conversation_id} of agent: {agent_id}")
+    try:
+        return AgentsAPIView().close_conversation(agent_id, user.id, conversation_id)
+    except Exception as e:
+        logger.error(f"Error closing agent conversation ({conversation_id}): {e}")
+        raise e
@@ -0,0 +1,75 @@
+import uuid
+
+from datetime import datetime, timedelta
+
+from database.models import AgentModel
+from core.agents import cache as agent_cache_module
+from core.agents.cache import AgentCache
+
+
+class FakeOrchestratorAgent:
+    def __init__(self, agent_obj: AgentModel):
+        self.agent_obj = agent_obj
+
+
+def build_agent_model(**kwargs) -> AgentModel:
+    data = {
+        "name": "Agent Test",
+        "description": "Agent test",
+        "system_prompt": "Test agent",
+        "tools": [],
+        "provider": "openai",
+        "user_id": uuid.uuid4(),
+    }
+    data.update(kwargs)
+    return AgentModel(**data)
+
+def test_agent_cache_hit_and_miss(monkeypatch):
+    monkeypatch.setattr(agent_cache_module, "OrchestratorAgent", FakeOrchestratorAgent)
+    cache = AgentCache(max_size=2)
+    agent_obj = build_agent_model()
+
+    first = cache.get_or_build(agent_obj)
+    second = cache.get_or_build(agent_obj)
+
+    assert first is second
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_agent_cache_rebuilds_when_agent_is_updated(monkeypatch):
+    monkeypatch.setattr(agent_cache_module, "OrchestratorAgent", FakeOrchestratorAgent)
+    cache = AgentCache(max_size=2)
+    agent_obj = build_agent_model()
+
+    first = cache.get_or_build(agent_obj)
+    agent_obj.updated_at = agent_obj.updated_at + timedelta(seconds=1)
+    second = cache.get_or_build(agent_obj)
+
+    assert first is not second
+    assert cache.stats()["misses"] == 2
+
+def test_agent_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(agent_cache_module, "OrchestratorAgent", FakeOrchestratorAgent)
+    cache = AgentCache(max_size=2)
+    agents = [build_agent_model(updated_at=datetime.now()) for _ in range(3)]
+
+    cache.get_or_build(agents[0])
+    cache.get_or_build(agents[1])
+    cache.get_or_build(agents[0])
+    cache.get_or_build(agents[2])
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert AgentCache.build_key(agents[1]) not in cache._entries
+
+def test_agent_cache_invalidate(monkeypatch):
+    monkeypatch.setattr(agent_cache_module, "OrchestratorAgent", FakeOrchestratorAgent)
+    cache = AgentCache(max_size=2)
+    agent_obj = build_agent_model()
+
+    cache.get_or_build(agent_obj)
+    cache.invalidate(str(agent_obj.id))
+
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 1
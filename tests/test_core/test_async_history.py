@@ -0,0 +1,139 @@
+import asyncio
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pydantic_ai.messages import ModelRequest, ModelResponse
+
+from core.database.mongo import async_database_handler
+from core.database.mongo.async_database_handler import AsyncDatabaseHandler
+
+
+def matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict):
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents: list[dict]):
+        self.documents = documents
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.documents = sorted(self.documents, key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    async def to_list(self):
+        return self.documents
+
+    def __aiter__(self):
+        async def documents():
+            for document in self.documents:
+                yield document
+        return documents()
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    def project(self, document: dict, projection: dict | None) -> dict:
+        if not projection:
+            return dict(document)
+        return {key: document[key] for key in projection if projection[key] and key in document}
+
+    async def insert_one(self, document):
+        self.documents.append(dict(document))
+
+    async def update_one(self, query, update, upsert=False):
+        document = next((document for document in self.documents if matches(document, query)), None)
+        if document is None:
+            document = dict(query, **update.get("$setOnInsert", {}))
+            self.documents.append(document)
+        document.update(update.get("$set", {}))
+        for key, value in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + value
+
+    def find(self, query, projection=None):
+        return FakeCursor([self.project(document, projection) for document in self.documents if matches(document, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((self.project(document, projection) for document in self.documents if matches(document, query)), None)
+
+    async def count_documents(self, query):
+        return sum(matches(document, query) for document in self.documents)
+
+
+def build_handler(monkeypatch) -> AsyncDatabaseHandler:
+    database = defaultdict(FakeCollection)
+    monkeypatch.setattr(async_database_handler, "get_async_mongo_client", lambda: defaultdict(lambda: database))
+    monkeypatch.setattr(async_database_handler, "REDIS_HISTORY_CACHE_ENABLED", False)
+    return AsyncDatabaseHandler("history")
+
+def test_insert_history_counts_conversation_turns(monkeypatch):
+    handler = build_handler(monkeypatch)
+
+    async def insert():
+        await handler.insert_history("hi", "hello", "user", "agent", conversation_id="chat")
+        await handler.insert_history("again", "hello again", "user", "agent", conversation_id="chat")
+
+    asyncio.run(insert())
+
+    assert [document["input"] for document in handler.collection_obj.documents] == ["hi", "again"]
+    conversation = handler.conversation_collection_obj.documents[0]
+    assert conversation["turns"] == 2
+    assert conversation["status"] == "open"
+    assert conversation["last_message_at"] == handler.collection_obj.documents[-1]["created_at"]
+
+def test_load_history_json_returns_newest_turns_oldest_first(monkeypatch):
+    handler = build_handler(monkeypatch)
+    started = datetime(2024, 1, 1)
+    handler.collection_obj.documents = [
+        {"runId": str(turn), "user_id": "user", "agent_id": "agent", "conversation_id": None,
+         "input": f"question {turn}", "output": f"answer {turn}", "created_at": started + timedelta(minutes=turn)}
+        for turn in range(5)
+    ]
+
+    messages = asyncio.run(handler.load_history_json("user", "agent", limit=2))
+
+    assert [type(message) for message in messages] == [ModelRequest, ModelResponse] * 2
+    assert messages[0].parts[0].content == "question 3"
+    assert messages[-1].parts[0].content == "answer 4"
+
+def test_save_summary_skips_summarized_turns(monkeypatch):
+    handler = build_handler(monkeypatch)
+    started = datetime(2024, 1, 1)
+    handler.collection_obj.documents = [
+        {"runId": str(turn), "user_id": "user", "agent_id": "agent", "conversation_id": None,
+         "input": f"question {turn}", "output": f"answer {turn}", "created_at": started + timedelta(minutes=turn)}
+        for turn in range(3)
+    ]
+
+    async def summarize():
+        await handler.save_summary("user", "agent", "earlier turns", started + timedelta(minutes=1), 2)
+        return (
+            await handler.load_summary("user", "agent"),
+            await handler.count_history("user", "agent", since=started + timedelta(minutes=1)),
+            await handler.load_history_json("user", "agent"),
+        )
+
+    summary, remaining, messages = asyncio.run(summarize())
+
+    assert summary == {
+        "summary": "earlier turns", "summarized_until": started + timedelta(minutes=1), "summarized_until_run_id": None, "summarized_turns": 2
+    }
+    assert remaining == 1
+    assert messages[0].parts[0].content.endswith("earlier turns")
+    assert [message.parts[0].content for message in messages[1:]] == ["question 2", "answer 2"]
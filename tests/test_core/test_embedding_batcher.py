@@ -0,0 +1,57 @@
+import threading
+
+from core.services.artificial_intelligence.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batches = []
+
+    def embed(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def test_embedding_batcher_coalesces_concurrent_calls():
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model.embed, max_batch_size=32, window_ms=50)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def embed(index):
+        barrier.wait()
+        results[index] = batcher.embed_query("x" * index)
+
+    threads = [threading.Thread(target=embed, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == {index: [float(index)] for index in range(8)}
+    assert len(model.batches) < 8
+    assert sum(len(batch) for batch in model.batches) == 8
+
+
+def test_embedding_batcher_keeps_large_requests_whole():
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model.embed, max_batch_size=2, window_ms=1)
+
+    vectors = batcher.embed_documents(["a", "bb", "ccc"])
+    batcher.close()
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert model.batches == [["a", "bb", "ccc"]]
+
+
+def test_embedding_batcher_propagates_errors():
+    def fail(texts):
+        raise ValueError("model failed")
+
+    batcher = EmbeddingBatcher(fail, window_ms=1)
+    future = batcher.submit(["text"])
+
+    assert isinstance(future.exception(timeout=5), ValueError)
+    assert batcher.submit([]).result() == []
+    batcher.close()
@@ -0,0 +1,89 @@
+import numpy as np
+
+from core.services.artificial_intelligence.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    decode_vector,
+    encode_vector,
+)
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def execute(self):
+        pass
+
+
+def test_cached_embeddings_only_embed_missing_distinct_texts():
+    embedder = CountingEmbedder()
+    embeddings = CachedEmbeddings(embedder, EmbeddingCache("model"))
+
+    assert embeddings.embed_documents(["a", "bb", "a"]) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert embeddings.embed_documents(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert embeddings.embed_query("a") == [1.0, 1.0]
+    assert embedder.calls == [["a", "bb"], ["ccc"]]
+
+    stats = embeddings.cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 4
+
+
+def test_embedding_cache_keys_depend_on_model_name():
+    assert EmbeddingCache("model-a").build_key("text") != EmbeddingCache("model-b").build_key("text")
+
+
+def test_embedding_cache_reads_through_the_persistent_tier():
+    redis_client = DictRedis()
+    EmbeddingCache("model", redis_client=redis_client).put_many(["text"], [[0.5, 0.25]])
+
+    cache = EmbeddingCache("model", redis_client=redis_client)
+    assert cache.get_many(["text", "other"]) == [[0.5, 0.25], None]
+    assert cache.get_many(["text"]) == [[0.5, 0.25]]
+    assert cache.stats()["redis_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_embedding_cache_evicts_least_recently_used():
+    cache = EmbeddingCache("model", max_size=2)
+    cache.put_many(["a", "b"], [[1.0], [2.0]])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [[3.0]])
+
+    assert cache.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_vectors_round_trip_as_float32_bytes():
+    assert decode_vector(encode_vector([0.5, -1.25])).tolist() == [0.5, -1.25]
+
+
+def test_embedding_cache_stores_float32_arrays():
+    cache = EmbeddingCache("model")
+    cache.put_many(["text"], [[0.1, 0.2]])
+
+    assert all(vector.dtype == "float32" for vector in cache._entries.values())
+    assert cache.get_many(["text"]) == [[float(value) for value in np.float32([0.1, 0.2])]]
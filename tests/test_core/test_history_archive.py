@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from core.database.mongo import history_archive
+from core.database.mongo.history_archive import (
+    archive_blocks_query,
+    build_archive_block,
+    check_archive_dependencies,
+    select_archived_turns,
+)
+
+
+def make_turns(days: range) -> list[dict]:
+    return [{"_id": day, "runId": str(day), "created_at": datetime(2024, 1, day)} for day in days]
+
+
+def test_archive_blocks_query_selects_overlapping_blocks():
+    scope = {"user_id": "user", "agent_id": "agent", "conversation_id": None}
+    since = datetime(2024, 1, 1)
+    before = datetime(2024, 2, 1)
+
+    query = archive_blocks_query(scope, since=since, before=before)
+
+    assert query == {**scope, "last_created_at": {"$gt": since}, "first_created_at": {"$lt": before}}
+
+
+def test_archive_block_round_trip_in_order():
+    pytest.importorskip("zstandard")
+
+    older = build_archive_block("user", "agent", None, make_turns(range(1, 4)), datetime(2024, 2, 1))
+    newer = build_archive_block("user", "agent", None, make_turns(range(4, 7)), datetime(2024, 2, 1))
+
+    assert older["turn_count"] == 3
+    assert older["last_created_at"] == datetime(2024, 1, 3)
+
+    newest_first = select_archived_turns([newer, older], limit=4)
+    assert [turn["runId"] for turn in newest_first] == ["6", "5", "4", "3"]
+    assert "_id" not in newest_first[0]
+
+    oldest_first = select_archived_turns([older, newer], before=datetime(2024, 1, 5), ascending=True)
+    assert [turn["runId"] for turn in oldest_first] == ["1", "2", "3", "4"]
+
+
+def test_check_archive_dependencies_fails_when_zstandard_is_missing(monkeypatch):
+    monkeypatch.setattr(history_archive.importlib.util, "find_spec", lambda name: None)
+
+    monkeypatch.setattr(history_archive, "HISTORY_ARCHIVE_ENABLED", False)
+    check_archive_dependencies()
+
+    monkeypatch.setattr(history_archive, "HISTORY_ARCHIVE_ENABLED", True)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        check_archive_dependencies()
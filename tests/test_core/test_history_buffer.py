@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from core.database.mongo.history_buffer import HistoryWriteBuffer
+
+
+class FakeCollection:
+    full_name = "agentic_verse.agent_history"
+
+    def __init__(self, failures: int = 0):
+        self.documents = []
+        self.failures = failures
+
+    def insert_many(self, documents, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Mongo is down")
+        self.documents.extend(documents)
+
+
+def build_document(run_id: str, agent_id: str = "agent") -> dict:
+    return {"runId": run_id, "user_id": "user", "agent_id": agent_id, "created_at": datetime.now()}
+
+def test_history_buffer_pending_reads_buffered_documents():
+    buffer = HistoryWriteBuffer(max_size=10, flush_interval=60)
+    collection = FakeCollection()
+
+    buffer.add(collection, build_document("1"))
+    buffer.add(collection, build_document("2", agent_id="other"))
+
+    assert [document["runId"] for document in buffer.pending(collection, "user", "agent")] == ["1"]
+    buffer.close()
+
+def test_history_buffer_flush_writes_in_one_batch():
+    buffer = HistoryWriteBuffer(max_size=10, flush_interval=60)
+    collection = FakeCollection()
+
+    buffer.add(collection, build_document("1"))
+    buffer.add(collection, build_document("2"))
+    buffer.flush()
+
+    assert len(collection.documents) == 2
+    assert buffer.pending(collection, "user", "agent") == []
+    buffer.close()
+
+def test_history_buffer_keeps_documents_when_flush_fails():
+    buffer = HistoryWriteBuffer(max_size=10, flush_interval=60)
+    collection = FakeCollection(failures=1)
+
+    buffer.add(collection, build_document("1"))
+    buffer.flush()
+
+    assert len(buffer.pending(collection, "user", "agent")) == 1
+
+    buffer.close()
+
+    assert len(collection.documents) == 1
+
+def test_history_buffer_starts_clean_after_fork():
+    buffer = HistoryWriteBuffer(max_size=10, flush_interval=60)
+    collection = FakeCollection(failures=2)
+
+    buffer.add(collection, build_document("1"))
+    buffer.close()
+    assert buffer._closed and buffer._flush_failed
+
+    buffer._reset_after_fork()
+
+    assert buffer.pending(collection, "user", "agent") == []
+    assert not buffer._closed and not buffer._flush_failed
@@ -0,0 +1,170 @@
+from datetime import datetime
+
+from core.database.redis import history_cache
+from core.database.redis.history_cache import (
+    APPEND_SCRIPT,
+    INVALIDATE_SCRIPT,
+    POPULATE_SCRIPT,
+    HistoryCache,
+    history_cache_keys,
+    encode_cached_document,
+    decode_cached_window,
+)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(lambda: self.client.get(key))
+
+    def lrange(self, key, start, end):
+        self.calls.append(lambda: self.client.lrange(key, start, end))
+
+    def execute(self):
+        return [call() for call in self.calls]
+
+
+class FakeRedis:
+    """
+    Runs the cache scripts as Python over in-memory strings and lists.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+
+    def register_script(self, script):
+        handler = {APPEND_SCRIPT: self.append, POPULATE_SCRIPT: self.populate, INVALIDATE_SCRIPT: self.invalidate}[script]
+        return lambda keys, args: handler(*keys, args)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:] if end == -1 else self.lists.get(key, [])[start:end + 1]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, b"0")) + 1).encode()
+
+    def append(self, turns_key, summary_key, version_key, args):
+        self.incr(version_key)
+        if summary_key in self.values:
+            self.lists[turns_key] = (self.lists.get(turns_key, []) + [args[0]])[-int(args[2]):]
+        return 1
+
+    def populate(self, turns_key, summary_key, version_key, args):
+        if self.values.get(version_key, b"0").decode() != args[0]:
+            return 0
+        self.lists[turns_key] = list(args[3:])
+        self.values[summary_key] = args[1]
+        return 1
+
+    def invalidate(self, turns_key, summary_key, version_key, args):
+        self.lists.pop(turns_key, None)
+        self.values.pop(summary_key, None)
+        self.incr(version_key)
+        return 1
+
+
+def build_cache(monkeypatch) -> HistoryCache:
+    monkeypatch.setattr(history_cache, "get_redis_client", FakeRedis)
+    return HistoryCache()
+
+
+def build_turn(index: int) -> dict:
+    return {"runId": str(index), "input": f"question {index}", "output": f"answer {index}", "created_at": datetime(2024, 1, 1, 12, index)}
+
+def test_history_cache_keys_are_scoped_by_user_and_agent():
+    turns_key, summary_key, version_key = history_cache_keys("user", "agent")
+
+    assert turns_key == "agent-history:user:agent:turns"
+    assert summary_key == "agent-history:user:agent:summary"
+    assert version_key == "agent-history:user:agent:version"
+
+def test_decode_cached_window_returns_newest_first():
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    turns = [
+        encode_cached_document({"_id": "ignored", "runId": str(index), "created_at": created_at})
+        for index in range(3)
+    ]
+
+    summary, history = decode_cached_window(b"", turns)
+
+    assert summary is None
+    assert [document["runId"] for document in history] == ["2", "1", "0"]
+    assert "_id" not in history[0]
+    assert history[0]["created_at"] == created_at
+
+def test_decode_cached_window_keeps_summary():
+    summary_data = encode_cached_document({"summary": "earlier turns", "summarized_turns": 4})
+
+    summary, history = decode_cached_window(summary_data, [])
+
+    assert summary["summary"] == "earlier turns"
+    assert history == []
+
+def test_history_cache_keys_are_scoped_by_conversation():
+    turns_key, _, version_key = history_cache_keys("user", "agent", "chat")
+
+    assert turns_key == "agent-history:user:agent:chat:turns"
+    assert version_key == "agent-history:user:agent:chat:version"
+
+def test_history_cache_serves_populated_window(monkeypatch):
+    cache = build_cache(monkeypatch)
+    version = cache.get_version("user", "agent")
+
+    assert cache.load("user", "agent", 2) is None
+
+    cache.populate("user", "agent", version, {"summary": "earlier turns"}, [build_turn(2), build_turn(1), build_turn(0)])
+    summary, history = cache.load("user", "agent", 2)
+
+    assert summary == {"summary": "earlier turns"}
+    assert [document["runId"] for document in history] == ["2", "1"]
+
+def test_history_cache_appends_only_to_cached_windows(monkeypatch):
+    cache = build_cache(monkeypatch)
+
+    cache.append("user", "agent", build_turn(0))
+    assert cache.load("user", "agent", 5) is None
+    assert cache.get_version("user", "agent") == "1"
+
+    cache.populate("user", "agent", "1", None, [build_turn(0)])
+    cache.append("user", "agent", build_turn(1))
+
+    _, history = cache.load("user", "agent", 5)
+    assert [document["runId"] for document in history] == ["1", "0"]
+
+def test_history_cache_append_keeps_max_turns(monkeypatch):
+    monkeypatch.setattr(history_cache, "REDIS_HISTORY_CACHE_MAX_TURNS", 2)
+    cache = build_cache(monkeypatch)
+
+    cache.populate("user", "agent", "0", None, [build_turn(1), build_turn(0)])
+    cache.append("user", "agent", build_turn(2))
+
+    _, history = cache.load("user", "agent", 5)
+    assert [document["runId"] for document in history] == ["2", "1"]
+
+def test_history_cache_rejects_window_loaded_before_an_append(monkeypatch):
+    cache = build_cache(monkeypatch)
+    version = cache.get_version("user", "agent")
+
+    # Another process stores a turn while this one reads Mongo
+    cache.append("user", "agent", build_turn(1))
+    cache.populate("user", "agent", version, None, [build_turn(0)])
+
+    assert cache.load("user", "agent", 5) is None
+
+def test_history_cache_invalidate_drops_window_and_bumps_version(monkeypatch):
+    cache = build_cache(monkeypatch)
+    cache.populate("user", "agent", "0", None, [build_turn(0)], conversation_id="chat")
+
+    cache.invalidate("user", "agent", conversation_id="chat")
+
+    assert cache.load("user", "agent", 5, conversation_id="chat") is None
+    assert cache.get_version("user", "agent", conversation_id="chat") == "1"
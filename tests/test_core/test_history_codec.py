@@ -0,0 +1,89 @@
+import json
+
+from datetime import datetime
+
+from pydantic_ai.messages import (
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+from core.database.mongo.history_codec import HISTORY_MESSAGES_FORMAT, decode_history, encode_messages, encode_export_line
+
+
+def build_document(messages) -> dict:
+    encoded_messages, message_count = encode_messages(messages)
+    return {
+        "input": "input",
+        "output": "output",
+        "messages": encoded_messages,
+        "message_count": message_count,
+        "messages_format": HISTORY_MESSAGES_FORMAT,
+    }
+
+def test_history_codec_keeps_tool_calls():
+    messages = [
+        ModelRequest(parts=[UserPromptPart(content="search ai news")]),
+        ModelResponse(parts=[ToolCallPart(tool_name="web_search", args={"query": "ai news"}, tool_call_id="1")]),
+        ModelRequest(parts=[ToolReturnPart(tool_name="web_search", content="result", tool_call_id="1")]),
+        ModelResponse(parts=[TextPart(content="Here is the news")]),
+    ]
+
+    decoded_messages = decode_history([build_document(messages)])
+
+    assert len(decoded_messages) == 4
+    assert decoded_messages[1].parts[0].tool_name == "web_search"
+    assert decoded_messages[2].parts[0].content == "result"
+
+def test_history_codec_does_not_store_system_prompt():
+    messages = [
+        ModelRequest(parts=[SystemPromptPart(content="system"), UserPromptPart(content="hello")]),
+        ModelResponse(parts=[TextPart(content="hi")]),
+    ]
+
+    decoded_messages = decode_history([build_document(messages)])
+
+    assert [type(part) for part in decoded_messages[0].parts] == [UserPromptPart]
+
+def test_history_codec_mixes_legacy_documents_in_order():
+    messages = [
+        ModelRequest(parts=[UserPromptPart(content="new")]),
+        ModelResponse(parts=[TextPart(content="new answer")]),
+    ]
+    legacy_document = {"input": "old", "output": "old answer"}
+
+    decoded_messages = decode_history([legacy_document, build_document(messages), legacy_document])
+
+    assert [message.parts[0].content for message in decoded_messages] == [
+        "old", "old answer", "new", "new answer", "old", "old answer"
+    ]
+
+
+def test_export_line_splices_stored_messages():
+    messages = [
+        ModelRequest(parts=[UserPromptPart(content="hi")]),
+        ModelResponse(parts=[TextPart(content="hello")]),
+    ]
+    document = {**build_document(messages), "runId": "run", "created_at": datetime(2024, 1, 1)}
+
+    line = encode_export_line(document, include_messages=True)
+    exported = json.loads(line)
+
+    assert line.endswith(b"\n")
+    assert exported["run_id"] == "run"
+    assert exported["created_at"] == "2024-01-01T00:00:00"
+    assert ModelMessagesTypeAdapter.validate_python(exported["messages"])[1].parts[0].content == "hello"
+
+
+def test_export_line_rebuilds_legacy_messages():
+    document = {"runId": "run", "input": "hi", "output": "hello", "created_at": None}
+
+    exported = json.loads(encode_export_line(document, include_messages=True))
+
+    assert len(exported["messages"]) == 2
+    assert "messages" not in json.loads(encode_export_line(document))
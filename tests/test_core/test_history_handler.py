@@ -0,0 +1,141 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.database.mongo import database_handler
+from core.database.mongo.database_handler import DatabaseHandler, parse_history_cursor
+from core.database.mongo.history_archive import build_archive_block
+
+STARTED = datetime(2024, 1, 1)
+
+OPERATORS = {
+    "$gt": lambda value, bound: value > bound,
+    "$gte": lambda value, bound: value >= bound,
+    "$lt": lambda value, bound: value < bound,
+    "$lte": lambda value, bound: value <= bound,
+}
+
+
+def matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$nor":
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(OPERATORS[operator](document.get(key), bound) for operator, bound in condition.items()):
+                return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCursor(list):
+    def sort(self, keys, direction=None):
+        # Like pymongo, a single key and direction or a list of (key, direction)
+        keys = [(keys, direction)] if direction is not None else keys
+        for key, direction in reversed(keys):
+            self[:] = sorted(self, key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, limit):
+        return FakeCursor(self[:limit])
+
+    def batch_size(self, batch_size):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    def find(self, query, projection=None):
+        return FakeCursor(
+            {key: document[key] for key in projection if projection[key] and key in document} if projection else dict(document)
+            for document in self.documents if matches(document, query)
+        )
+
+    def find_one(self, query, projection=None):
+        return None
+
+    def distinct(self, key, query):
+        return list({document.get(key) for document in self.documents if matches(document, query)})
+
+
+def build_handler(monkeypatch, created_at: list[datetime], conversation_ids: list[str | None] | None = None) -> DatabaseHandler:
+    database = defaultdict(FakeCollection)
+    monkeypatch.setattr(database_handler, "get_mongo_client", lambda: defaultdict(lambda: database))
+    monkeypatch.setattr(database_handler, "ensure_history_indexes", lambda collection: None)
+    monkeypatch.setattr(database_handler, "REDIS_HISTORY_CACHE_ENABLED", False)
+
+    handler = DatabaseHandler("history")
+    conversation_ids = conversation_ids or [None] * len(created_at)
+    handler.collection_obj.documents = [
+        {"runId": f"run-{turn}", "user_id": "user", "agent_id": "agent", "conversation_id": conversation_id,
+         "input": f"question {turn}", "output": f"answer {turn}", "created_at": turn_created_at}
+        for turn, (turn_created_at, conversation_id) in enumerate(zip(created_at, conversation_ids))
+    ]
+    return handler
+
+def test_load_history_json_keeps_newest_limit_turns(monkeypatch):
+    handler = build_handler(monkeypatch, [STARTED + timedelta(minutes=turn) for turn in range(5)])
+
+    messages = handler.load_history_json("user", "agent", limit=2)
+
+    assert [message.parts[0].content for message in messages] == ["question 3", "answer 3", "question 4", "answer 4"]
+
+def test_load_history_json_only_loads_turns_after_since(monkeypatch):
+    handler = build_handler(monkeypatch, [STARTED + timedelta(minutes=turn) for turn in range(5)])
+
+    messages = handler.load_history_json("user", "agent", limit=10, since=STARTED + timedelta(minutes=2))
+
+    assert [message.parts[0].content for message in messages] == ["question 3", "answer 3", "question 4", "answer 4"]
+
+def test_history_pages_do_not_skip_turns_sharing_created_at(monkeypatch):
+    # Turns 1 to 3 were stored in the same millisecond, across a page boundary
+    handler = build_handler(monkeypatch, [STARTED, *[STARTED + timedelta(seconds=1)] * 3, STARTED + timedelta(seconds=2)])
+
+    run_ids = []
+    cursor = None
+    while True:
+        cursor_date, cursor_run_id = parse_history_cursor(cursor) if cursor else (None, None)
+        page = handler.get_history_page("user", "agent", limit=2, cursor=cursor_date, cursor_run_id=cursor_run_id)
+        run_ids.extend(item["run_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert run_ids == ["run-4", "run-3", "run-2", "run-1", "run-0"]
+
+def test_iter_history_exports_every_conversation_of_the_agent(monkeypatch):
+    handler = build_handler(
+        monkeypatch, [STARTED + timedelta(minutes=turn) for turn in range(4)], ["chat-b", None, "chat-a", "chat-b"]
+    )
+
+    exported = [(turn["conversation_id"], turn["runId"]) for turn in handler.iter_history("user", "agent")]
+
+    assert exported == [(None, "run-1"), ("chat-a", "run-2"), ("chat-b", "run-0"), ("chat-b", "run-3")]
+
+def test_iter_history_exports_a_single_conversation_on_request(monkeypatch):
+    handler = build_handler(monkeypatch, [STARTED + timedelta(minutes=turn) for turn in range(3)], ["chat", None, "chat"])
+
+    assert [turn["runId"] for turn in handler.iter_history("user", "agent", conversation_id="chat")] == ["run-0", "run-2"]
+    assert [turn["runId"] for turn in handler.iter_history("user", "agent", default_conversation=True)] == ["run-1"]
+
+def test_iter_history_keeps_hot_turns_sharing_the_last_archived_created_at(monkeypatch):
+    pytest.importorskip("zstandard")
+    # run-1 was archived, run-2 was stored in the same millisecond and stayed hot
+    handler = build_handler(monkeypatch, [STARTED, STARTED + timedelta(seconds=1), STARTED + timedelta(seconds=1)])
+    archived = handler.collection_obj.documents[:2]
+    handler.collection_obj.documents = handler.collection_obj.documents[2:]
+    handler.archive_collection_obj.documents = [build_archive_block("user", "agent", None, archived, STARTED)]
+
+    exported = handler.iter_history("user", "agent", include_archived=True)
+
+    assert [turn["runId"] for turn in exported] == ["run-0", "run-1", "run-2"]
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from core.database.mongo.database_handler import (
+    HISTORY_PAGE_PROJECTION,
+    build_history_page,
+    conversations_query,
+    history_query,
+    history_since_summary,
+    merge_pending_history,
+    parse_history_cursor,
+)
+
+
+def test_history_query_bounds_created_at():
+    since = datetime(2024, 1, 1)
+    before = datetime(2024, 2, 1)
+
+    query = history_query("user", 1, since=since, before=before)
+
+    assert query == {
+        "agent_id": "1", "user_id": "user", "conversation_id": None, "created_at": {"$gt": since, "$lt": before}
+    }
+
+
+def test_history_since_summary_uses_latest_bound():
+    summarized_until = datetime(2024, 1, 10)
+    summary = {"summarized_until": summarized_until, "summarized_until_run_id": "b"}
+
+    assert history_since_summary(None) == (None, None)
+    assert history_since_summary(summary) == (summarized_until, "b")
+    assert history_since_summary(summary, datetime(2024, 1, 5)) == (summarized_until, "b")
+    assert history_since_summary(summary, datetime(2024, 1, 20)) == (datetime(2024, 1, 20), None)
+    # Summaries saved before the run id was stored end at their created_at
+    assert history_since_summary({"summarized_until": summarized_until}) == (summarized_until, None)
+
+
+def test_merge_pending_history_dedupes_and_keeps_order():
+    stored = [{"runId": "b", "created_at": datetime(2024, 1, 2)}, {"runId": "a", "created_at": datetime(2024, 1, 1)}]
+    pending = [
+        {"runId": "b", "user_id": "user", "created_at": datetime(2024, 1, 2)},
+        {"runId": "c", "user_id": "user", "created_at": datetime(2024, 1, 3)},
+    ]
+
+    history = merge_pending_history(stored, pending, HISTORY_PAGE_PROJECTION, limit=2)
+
+    assert [message["runId"] for message in history] == ["c", "b"]
+    assert "user_id" not in history[0]
+
+
+def test_build_history_page_sets_cursor_on_full_page():
+    history = [{"runId": "a", "input": "hi", "output": "hello", "created_at": datetime(2024, 1, 1)}]
+
+    assert build_history_page(history, 1)["next_cursor"] == "2024-01-01T00:00:00_a"
+    assert build_history_page(history, 2)["next_cursor"] is None
+
+
+def test_parse_history_cursor_reads_created_at_and_run_id():
+    assert parse_history_cursor("2024-01-01T00:00:00.123000_a1") == (datetime(2024, 1, 1, 0, 0, 0, 123000), "a1")
+    assert parse_history_cursor("2024-01-01T00:00:00") == (datetime(2024, 1, 1), None)
+
+
+def test_history_query_breaks_created_at_ties_by_run_id():
+    before = datetime(2024, 2, 1)
+
+    query = history_query("user", "agent", before=before, before_run_id="b")
+
+    assert query["created_at"] == {"$lte": before}
+    assert query["$nor"] == [{"created_at": before, "runId": {"$gte": "b"}}]
+
+
+def test_history_query_resumes_after_a_since_position():
+    since, before = datetime(2024, 1, 1), datetime(2024, 2, 1)
+
+    query = history_query("user", "agent", since=since, since_run_id="a", before=before, before_run_id="b")
+
+    assert query["created_at"] == {"$gte": since, "$lte": before}
+    assert query["$nor"] == [
+        {"created_at": since, "runId": {"$lte": "a"}},
+        {"created_at": before, "runId": {"$gte": "b"}},
+    ]
+
+
+def test_history_query_scopes_to_conversation():
+    assert history_query("user", "agent", conversation_id="chat")["conversation_id"] == "chat"
+    # Turns without a conversation_id belong to the default conversation
+    assert history_query("user", "agent")["conversation_id"] is None
+
+
+def test_conversations_query_filters_status_and_cursor():
+    before = datetime(2024, 1, 1)
+
+    query = conversations_query("user", "agent", status="open", before=before)
+
+    assert query == {"agent_id": "agent", "user_id": "user", "status": "open", "last_message_at": {"$lt": before}}
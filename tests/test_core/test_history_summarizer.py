@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from core.agents import history_summarizer_agent
+from core.agents.history_summarizer_agent import HistorySummarizerAgent, summary_backlog
+from core.database.mongo.history_archive import turn_after
+
+STARTED = datetime(2024, 1, 1)
+
+
+class FakeHistory:
+    def __init__(self, turns: int, minutes_per_turn: float = 1):
+        self.turns = [
+            {"runId": f"{turn:02}", "input": f"question {turn}", "output": f"answer {turn}",
+             "created_at": STARTED + timedelta(minutes=int(turn * minutes_per_turn))}
+            for turn in range(turns)
+        ]
+        self.summary = None
+        self.saved = []
+
+    def after(self, since, since_run_id):
+        return [turn for turn in self.turns if turn_after(turn, since, since_run_id)]
+
+    def load_summary(self, user_id, agent_id, conversation_id=None):
+        return self.summary
+
+    def count_history(self, user_id, agent_id, since=None, conversation_id=None, since_run_id=None):
+        return len(self.after(since, since_run_id))
+
+    def find_history(self, user_id, agent_id, limit=None, since=None, since_run_id=None, ascending=False, projection=None, conversation_id=None):
+        return self.after(since, since_run_id)[:limit]
+
+    def save_summary(self, user_id, agent_id, summary, summarized_until, summarized_turns, conversation_id=None, summarized_until_run_id=None):
+        self.saved.append(summarized_turns)
+        self.summary = {"summary": summary, "summarized_until": summarized_until, "summarized_until_run_id": summarized_until_run_id}
+
+
+def build_summarizer(history: FakeHistory, prompts: list[str]) -> HistorySummarizerAgent:
+    def summarize(messages, info):
+        prompts.append(messages[-1].parts[-1].content)
+        return ModelResponse(parts=[TextPart(content=f"summary {len(prompts)}")])
+
+    # Skips BaseAgent.__init__, which connects to Mongo
+    summarizer = HistorySummarizerAgent.__new__(HistorySummarizerAgent)
+    summarizer.database_handler = history
+    summarizer.agent = Agent(FunctionModel(summarize))
+    return summarizer
+
+def test_summarize_history_waits_for_threshold(monkeypatch):
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_THRESHOLD", 10)
+    history, prompts = FakeHistory(10), []
+
+    assert build_summarizer(history, prompts).summarize_history("user", "agent") == 0
+    assert prompts == []
+
+def test_summarize_history_keeps_newest_turns_in_batches(monkeypatch):
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_THRESHOLD", 10)
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_KEEP_TURNS", 4)
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_BATCH_TURNS", 5)
+    history, prompts = FakeHistory(12), []
+
+    folded_turns = build_summarizer(history, prompts).summarize_history("user", "agent")
+
+    assert folded_turns == 8
+    assert history.saved == [5, 3]
+    assert history.summary == {"summary": "summary 2", "summarized_until": STARTED + timedelta(minutes=7), "summarized_until_run_id": "07"}
+    # Each batch folds the next turns into the previous summary
+    assert "(empty)" in prompts[0] and "question 4" in prompts[0] and "question 5" not in prompts[0]
+    assert "summary 1" in prompts[1] and "question 7" in prompts[1] and "question 8" not in prompts[1]
+
+def test_summarize_history_folds_turns_sharing_created_at_across_batches(monkeypatch):
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_THRESHOLD", 10)
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_KEEP_TURNS", 4)
+    monkeypatch.setattr(history_summarizer_agent, "HISTORY_SUMMARY_BATCH_TURNS", 5)
+    # Pairs of turns share a created_at, so the first batch ends between turns 4 and 5
+    history, prompts = FakeHistory(12, minutes_per_turn=0.5), []
+
+    build_summarizer(history, prompts).summarize_history("user", "agent")
+
+    assert history.saved == [5, 3]
+    assert "question 5" in prompts[1]
+    # Turn 8 shares turn 7's created_at and is still pending
+    assert summary_backlog(history, "user", "agent")[-1] == 4
+
+def test_build_prompt_lists_turns():
+    summarizer = HistorySummarizerAgent.__new__(HistorySummarizerAgent)
+
+    prompt = summarizer._build_prompt("known facts", [{"input": "hi", "output": "hello"}])
+
+    assert prompt == "**CURRENT_SUMMARY:**\nknown facts\n\n**NEW_TURNS:**\nUSER: hi\nASSISTANT: hello"
@@ -0,0 +1,75 @@
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+from core.agents.history_window import CHARS_PER_TOKEN, split_turns, window_history
+
+
+def build_turn(text: str):
+    return [
+        ModelRequest(parts=[UserPromptPart(content=text)]),
+        ModelResponse(parts=[TextPart(content=text)]),
+    ]
+
+def test_split_turns_keeps_tool_calls_with_their_prompt():
+    messages = [
+        ModelRequest(parts=[UserPromptPart(content="search")]),
+        ModelResponse(parts=[ToolCallPart(tool_name="web_search", args={"query": "ai"}, tool_call_id="1")]),
+        ModelRequest(parts=[ToolReturnPart(tool_name="web_search", content="result", tool_call_id="1")]),
+        ModelResponse(parts=[TextPart(content="done")]),
+        *build_turn("next"),
+    ]
+
+    turns = split_turns(messages)
+
+    assert [len(turn) for turn in turns] == [4, 2]
+
+def test_window_history_keeps_newest_turns_within_budget():
+    text = "a" * CHARS_PER_TOKEN * 10
+    messages = build_turn(text) + build_turn(text) + build_turn(text)
+
+    window = window_history(messages, token_budget=45)
+
+    assert window.messages == messages[2:]
+    assert window.kept_tokens == 40
+    assert window.dropped_tokens == 20
+    assert window.dropped_messages == 2
+
+def test_window_history_always_keeps_system_prompt():
+    text = "a" * CHARS_PER_TOKEN * 10
+    messages = [ModelRequest(parts=[SystemPromptPart(content="system"), UserPromptPart(content=text)])]
+    messages += [ModelResponse(parts=[TextPart(content=text)])] + build_turn(text)
+
+    window = window_history(messages, token_budget=25)
+
+    assert isinstance(window.messages[0].parts[0], SystemPromptPart)
+    assert window.messages[0].parts[1].content == text
+    assert len(window.messages) == 2
+
+def test_window_history_adds_missing_system_prompt():
+    messages = build_turn("hello")
+
+    window = window_history(messages, token_budget=100, system_prompt="You are a test agent")
+
+    assert window.messages[0].parts[0].content == "You are a test agent"
+    assert window.dropped_tokens == 0
+
+def test_window_history_keeps_newest_turn_over_budget():
+    messages = build_turn("a" * CHARS_PER_TOKEN * 100)
+
+    window = window_history(messages, token_budget=10)
+
+    assert window.messages == messages
+
+def test_window_history_puts_system_prompt_before_stored_summary():
+    messages = [ModelRequest(parts=[SystemPromptPart(content="summary")])] + build_turn("hello")
+
+    window = window_history(messages, token_budget=100, system_prompt="You are a test agent")
+
+    assert [part.content for part in window.messages[0].parts[:2]] == ["You are a test agent", "summary"]
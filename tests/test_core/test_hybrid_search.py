@@ -0,0 +1,37 @@
+from core.database.opensearch.hybrid_search import (
+    build_lexical_query,
+    reciprocal_rank_fusion,
+    resolve_retrieval_settings,
+)
+
+
+def hits(*ids):
+    return [{"_id": hit_id, "_source": {"text": hit_id}} for hit_id in ids]
+
+
+def test_reciprocal_rank_fusion_prefers_chunks_found_by_both_queries():
+    fused = reciprocal_rank_fusion([hits("a", "b", "c"), hits("c", "d")], [1.0, 1.0], rank_constant=60)
+
+    assert [hit["_id"] for hit in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["_score"] == 1 / 63 + 1 / 61
+
+
+def test_reciprocal_rank_fusion_applies_weights():
+    fused = reciprocal_rank_fusion([hits("a"), hits("b")], [1.0, 2.0], rank_constant=60)
+
+    assert [hit["_id"] for hit in fused] == ["b", "a"]
+
+
+def test_resolve_retrieval_settings_ignores_unset_agent_values():
+    settings = resolve_retrieval_settings({"mode": "hybrid", "lexical_weight": 2.0, "vector_weight": None})
+
+    assert settings["mode"] == "hybrid"
+    assert settings["lexical_weight"] == 2.0
+    assert settings["vector_weight"] == resolve_retrieval_settings()["vector_weight"]
+
+
+def test_build_lexical_query_keeps_agent_filter():
+    body = build_lexical_query("SKU-123", 10, [{"term": {"agent_id": "agent"}}])
+
+    assert body["query"]["bool"]["filter"] == [{"term": {"agent_id": "agent"}}]
+    assert body["size"] == 10
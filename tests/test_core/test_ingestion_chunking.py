@@ -0,0 +1,57 @@
+from core.services.ingestion.chunking import (
+    batched,
+    chunk_id,
+    content_hash,
+    iter_changed_chunks,
+    iter_chunks,
+    split_text,
+)
+
+
+def test_split_text_overlaps_and_cuts_at_whitespace():
+    text = " ".join(f"word{index}" for index in range(100))
+
+    chunks = list(split_text(text, chunk_size=50, chunk_overlap=10))
+
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert all(not chunk.startswith(" ") and not chunk.endswith(" ") for chunk in chunks)
+    assert chunks[0].split()[-1] in chunks[1]
+    assert chunks[-1].endswith("word99")
+
+
+def test_split_text_skips_blank_pages():
+    assert list(split_text("   \n  ")) == []
+
+
+def test_iter_chunks_numbers_chunks_across_pages():
+    pages = [(1, "first page"), (2, ""), (3, "third page")]
+
+    chunks = list(iter_chunks(pages, chunk_size=100, chunk_overlap=10))
+
+    assert [(chunk["page"], chunk["chunk"]) for chunk in chunks] == [(1, 0), (3, 1)]
+
+
+def test_batched_is_lazy_and_keeps_remainder():
+    batches = batched(iter(range(5)), 2)
+
+    assert next(batches) == [0, 1]
+    assert list(batches) == [[2, 3], [4]]
+
+
+def test_content_hash_ignores_whitespace_changes():
+    assert content_hash("some  text\nhere") == content_hash("some text here")
+    assert content_hash("some text") != content_hash("other text")
+
+
+def test_iter_changed_chunks_skips_indexed_and_repeated_chunks():
+    existing_ids = {chunk_id("doc.pdf", content_hash("unchanged"))}
+    seen_ids = set()
+    progress = {"chunks_skipped": 0}
+    chunks = [{"text": "unchanged"}, {"text": "new"}, {"text": "new"}]
+
+    changed = list(iter_changed_chunks(chunks, "doc.pdf", existing_ids, seen_ids, progress))
+
+    assert [chunk["text"] for chunk in changed] == ["new"]
+    assert changed[0]["id"] == chunk_id("doc.pdf", changed[0]["content_hash"])
+    assert progress["chunks_skipped"] == 2
+    assert seen_ids == existing_ids | {changed[0]["id"]}
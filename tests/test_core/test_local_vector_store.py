@@ -0,0 +1,82 @@
+import numpy as np
+
+from core.database.vector_store import LocalVectorStore, is_local_index
+from core.database.vector_store import local
+from core.database.vector_store.local import top_k_cosine
+
+
+def chunk(chunk_id, vector, source_id="handbook.pdf"):
+    return {"id": chunk_id, "vector": vector, "text": f"text {chunk_id}", "metadata": {"source_id": source_id}}
+
+
+def test_top_k_cosine_returns_best_rows_first():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.7071, 0.7071]], dtype=np.float32)
+
+    ranked = top_k_cosine(vectors, [2.0, 0.1], top_k=2)
+
+    assert [index for index, _ in ranked] == [0, 2]
+    assert ranked[0][1] > ranked[1][1]
+    assert top_k_cosine(vectors[:0], [1.0, 0.0], top_k=2) == []
+
+
+def test_local_vector_store_indexes_and_searches(tmp_path):
+    store = LocalVectorStore("local-agent", root=str(tmp_path))
+    store.create_index()
+
+    store.bulk_index_chunks([chunk("a", [1.0, 0.0]), chunk("b", [0.0, 1.0]), chunk("c", [1.0, 1.0], "faq.md")])
+    assert store.search_by_vector([1.0, 0.0], top_k=1) == []
+
+    store.refresh_index()
+    documents = store.search_by_vector([1.0, 0.1], top_k=2)
+
+    assert [document.page_content for document in documents] == ["text a", "text c"]
+    assert documents[0].metadata["source_id"] == "handbook.pdf"
+    assert store.get_source_chunk_ids("handbook.pdf") == {"a", "b"}
+
+
+def test_local_vector_store_replaces_and_deletes_chunks(tmp_path):
+    store = LocalVectorStore("local-agent", root=str(tmp_path), dtype="float16")
+    store.create_index()
+    store.bulk_index_chunks([chunk("a", [1.0, 0.0]), chunk("b", [0.0, 1.0])])
+    store.refresh_index()
+
+    reader = LocalVectorStore("local-agent", root=str(tmp_path), dtype="float16")
+    store.bulk_index_chunks([chunk("a", [0.0, 1.0])])
+    store.bulk_delete_chunks(["b"])
+    store.refresh_index()
+
+    documents = reader.search_by_vector([0.0, 1.0], top_k=5)
+    assert [document.page_content for document in documents] == ["text a"]
+    assert len(list(tmp_path.joinpath("local-agent").glob("vectors-*.npy"))) == 1
+
+
+def test_local_vector_store_delete_removes_index(tmp_path):
+    store = LocalVectorStore("local-agent", root=str(tmp_path))
+    store.create_index()
+
+    assert is_local_index(store.index_name)
+    assert store.delete_agent_documents() is True
+    assert store.get_source_chunk_ids("handbook.pdf") == set()
+
+
+def test_local_vector_store_spills_batches_until_refresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(local, "WRITE_BATCH_ROWS", 2)
+    store = LocalVectorStore("local-agent", root=str(tmp_path))
+    store.create_index()
+    store.bulk_index_chunks([chunk("a", [1.0, 0.0]), chunk("b", [0.0, 1.0]), chunk("c", [1.0, 1.0])])
+    store.refresh_index()
+
+    store.bulk_index_chunks([chunk("d", [0.0, 1.0]), chunk("a", [0.0, 2.0])])
+    store.bulk_index_chunks([chunk("e", [1.0, 0.0]), chunk("d", [1.0, 0.0])])
+    store.bulk_delete_chunks(["e", "b"])
+
+    # Only the row of each chunk's latest upsert is kept in memory
+    assert store._upserts == {"a": (0, 1), "d": (1, 1)}
+    assert len(list(tmp_path.joinpath("local-agent").glob("staging-*/vectors-*.npy"))) == 2
+
+    store.refresh_index()
+
+    vectors, chunks = store._load()
+    assert [chunk["id"] for chunk in chunks] == ["c", "a", "d"]
+    assert np.allclose(vectors, [[0.7071, 0.7071], [0.0, 1.0], [1.0, 0.0]], atol=1e-4)
+    assert not list(tmp_path.joinpath("local-agent").glob("staging-*"))
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from core.database.mongo import client
+
+
+class FakeMongoClient:
+    def __init__(self, connection_string, **options):
+        self.connection_string = connection_string
+        self.options = options
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncMongoClient(FakeMongoClient):
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_clients(monkeypatch):
+    monkeypatch.setattr(client, "MongoClient", FakeMongoClient)
+    monkeypatch.setattr(client, "AsyncMongoClient", FakeAsyncMongoClient)
+    monkeypatch.setattr(client, "_clients", {})
+    monkeypatch.setattr(client, "_async_clients", {})
+
+def test_clients_are_shared_per_connection_string():
+    first = client.get_mongo_client("mongodb://first")
+
+    assert client.get_mongo_client("mongodb://first") is first
+    assert client.get_mongo_client("mongodb://second") is not first
+    assert first.options["maxPoolSize"] == client.MONGODB_MAX_POOL_SIZE
+
+def test_async_clients_are_shared_per_connection_string():
+    first = client.get_async_mongo_client("mongodb://first")
+
+    assert client.get_async_mongo_client("mongodb://first") is first
+    assert client.get_async_mongo_client("mongodb://second") is not first
+    assert client.get_mongo_client("mongodb://first") is not first
+
+def test_reset_after_fork_drops_the_parent_clients():
+    parent = client.get_mongo_client("mongodb://first")
+    async_parent = client.get_async_mongo_client("mongodb://first")
+
+    client._reset_after_fork()
+
+    assert client.get_mongo_client("mongodb://first") is not parent
+    assert client.get_async_mongo_client("mongodb://first") is not async_parent
+    # The child must not close sockets that still belong to the parent
+    assert not parent.closed and not async_parent.closed
+
+def test_close_clients_empties_the_registries():
+    sync_client = client.get_mongo_client("mongodb://first")
+    async_client = client.get_async_mongo_client("mongodb://first")
+
+    client.close_mongo_clients()
+    asyncio.run(client.close_async_mongo_clients())
+
+    assert sync_client.closed and async_client.closed
+    assert client._clients == {} and client._async_clients == {}
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from core.services.artificial_intelligence import embeddings
+from core.services.artificial_intelligence.embeddings import check_embedding_backend
+from core.services.artificial_intelligence.onnx_embeddings import EMBEDDING_CONFIG_FILE, pool_embeddings
+
+
+def test_pool_embeddings_averages_only_real_tokens():
+    hidden_states = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+    attention_mask = np.array([[1, 1, 0]])
+
+    pooled = pool_embeddings(hidden_states, attention_mask, normalize=False)
+
+    assert pooled.tolist() == [[2.0, 0.0]]
+
+
+def test_pool_embeddings_normalizes_and_supports_cls():
+    hidden_states = np.array([[[3.0, 4.0], [0.0, 1.0]]], dtype=np.float32)
+    attention_mask = np.array([[1, 1]])
+
+    pooled = pool_embeddings(hidden_states, attention_mask, pooling="cls")
+
+    assert np.allclose(pooled, [[0.6, 0.8]])
+
+
+def test_check_embedding_backend_fails_fast_on_a_misconfigured_image(monkeypatch, tmp_path):
+    monkeypatch.setattr(embeddings, "EMBEDDING_ONNX_PATH", str(tmp_path))
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setattr(embeddings.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(RuntimeError, match="onnxruntime"):
+        check_embedding_backend()
+
+    monkeypatch.setattr(embeddings.importlib.util, "find_spec", lambda name: object())
+    with pytest.raises(RuntimeError, match="No exported ONNX model"):
+        check_embedding_backend()
+
+    tmp_path.joinpath(EMBEDDING_CONFIG_FILE).write_text("{}")
+    check_embedding_backend()
+
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "tensorflow")
+    with pytest.raises(RuntimeError, match="Unknown EMBEDDING_BACKEND"):
+        check_embedding_backend()
@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from core.services.artificial_intelligence import reranker
+
+
+class LengthCrossEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.batches.append(batch_size)
+        return [len(text) for _, text in pairs]
+
+
+def test_rerank_documents_keeps_best_top_k(monkeypatch):
+    model = LengthCrossEncoder()
+    monkeypatch.setattr(reranker, "_model", model)
+    documents = [Document(page_content=text) for text in ["aa", "a", "aaaa", "aaa"]]
+
+    ranked = reranker.rerank_documents("query", documents, top_k=2)
+
+    assert [document.page_content for document in ranked] == ["aaaa", "aaa"]
+    assert ranked[0].metadata["rerank_score"] == 4.0
+    assert model.batches == [reranker.RERANKER_BATCH_SIZE]
+
+
+def test_rerank_documents_without_candidates_skips_the_model(monkeypatch):
+    monkeypatch.setattr(reranker, "_model", None)
+
+    assert reranker.rerank_documents("query", [], top_k=3) == []
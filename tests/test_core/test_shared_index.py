@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.database.opensearch import vector_database_handler
+from core.database.opensearch.vector_database_handler import OPENSEARCH_SHARED_INDEX, OpenSearchHandler
+
+CHUNK = {"id": "handbook.pdf:abc", "vector": [0.1, 0.2], "text": "Chunk text", "metadata": {"source_id": "handbook.pdf"}}
+
+
+@pytest.fixture(autouse=True)
+def opensearch_client(monkeypatch):
+    monkeypatch.setattr(vector_database_handler, "OpenSearch", lambda **kwargs: SimpleNamespace())
+
+
+@pytest.fixture
+def bulk_actions(monkeypatch):
+    actions = []
+
+    def bulk(client, batch, **kwargs):
+        actions.extend(batch)
+        return len(batch), []
+
+    def scan(client, **kwargs):
+        actions.append(kwargs)
+        return [{"_id": "agent-1:handbook.pdf:abc"}, {"_id": "agent-1:handbook.pdf:def"}]
+
+    monkeypatch.setattr(vector_database_handler, "helpers", SimpleNamespace(bulk=bulk, scan=scan))
+    return actions
+
+def test_shared_index_prefixes_ids_with_the_agent():
+    handler = OpenSearchHandler(OPENSEARCH_SHARED_INDEX, agent_id="agent-1")
+
+    assert handler._document_id("handbook.pdf:abc") == "agent-1:handbook.pdf:abc"
+    assert handler._chunk_id("agent-1:handbook.pdf:abc") == "handbook.pdf:abc"
+    assert handler._agent_filter({"term": {"metadata.source_id": "handbook.pdf"}}) == [
+        {"term": {"metadata.source_id": "handbook.pdf"}},
+        {"term": {"agent_id": "agent-1"}},
+    ]
+
+def test_per_agent_index_keeps_ids_and_filters():
+    handler = OpenSearchHandler("agent-index")
+
+    assert handler._document_id("handbook.pdf:abc") == "handbook.pdf:abc"
+    assert handler._chunk_id("handbook.pdf:abc") == "handbook.pdf:abc"
+    assert handler._agent_filter({"term": {"metadata.source_id": "handbook.pdf"}}) == [
+        {"term": {"metadata.source_id": "handbook.pdf"}}
+    ]
+
+def test_shared_index_bulk_actions_carry_agent_and_routing(bulk_actions):
+    handler = OpenSearchHandler(OPENSEARCH_SHARED_INDEX, agent_id="agent-1")
+
+    assert handler.bulk_index_chunks([CHUNK]) == 1
+    assert handler.bulk_delete_chunks(["handbook.pdf:abc"]) == 1
+
+    indexed, deleted = bulk_actions
+    assert indexed["_id"] == deleted["_id"] == "agent-1:handbook.pdf:abc"
+    assert indexed["_routing"] == deleted["_routing"] == "agent-1"
+    assert indexed["_source"]["agent_id"] == "agent-1"
+
+def test_per_agent_bulk_actions_are_unchanged(bulk_actions):
+    handler = OpenSearchHandler("agent-index")
+
+    handler.bulk_index_chunks([CHUNK])
+    handler.bulk_delete_chunks(["handbook.pdf:abc"])
+
+    indexed, deleted = bulk_actions
+    assert indexed == {
+        "_op_type": "index",
+        "_index": "agent-index",
+        "_id": "handbook.pdf:abc",
+        "_source": {"vector_field": [0.1, 0.2], "text": "Chunk text", "metadata": {"source_id": "handbook.pdf"}},
+    }
+    assert deleted == {"_op_type": "delete", "_index": "agent-index", "_id": "handbook.pdf:abc"}
+
+def test_shared_index_source_chunk_ids_are_routed_and_unprefixed(bulk_actions, monkeypatch):
+    handler = OpenSearchHandler(OPENSEARCH_SHARED_INDEX, agent_id="agent-1")
+    monkeypatch.setattr(handler, "index_exists", lambda index_name: True)
+
+    assert handler.get_source_chunk_ids("handbook.pdf") == {"handbook.pdf:abc", "handbook.pdf:def"}
+
+    scan = bulk_actions[0]
+    assert scan["routing"] == "agent-1"
+    assert {"term": {"agent_id": "agent-1"}} in scan["query"]["query"]["bool"]["filter"]
@@ -0,0 +1,91 @@
+import json
+import asyncio
+
+from core.database.redis import task_events
+from core.database.redis.task_events import TaskEventPublisher, TaskEventSubscriber
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, data):
+        self.published.append((channel, json.loads(data)))
+
+
+class FakePubSub:
+    def __init__(self, messages: list[dict]):
+        self.messages = messages
+        self.channels = set()
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    async def get_message(self, timeout):
+        if self.messages:
+            return self.messages.pop(0)
+        await asyncio.sleep(timeout)
+        return None
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeAsyncRedis:
+    def __init__(self, pubsub: FakePubSub):
+        self._pubsub = pubsub
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self._pubsub
+
+def test_publisher_sends_deltas_on_the_task_channel(monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(task_events, "get_redis_client", lambda: redis_client)
+
+    TaskEventPublisher("task-1").publish_delta("Hello")
+
+    assert redis_client.published == [("agent-task:task-1", {"type": "delta", "content": "Hello"})]
+
+def test_subscriber_reads_published_events_in_order(monkeypatch):
+    pubsub = FakePubSub([
+        {"type": "subscribe", "data": 1},
+        {"type": "message", "data": json.dumps({"type": "delta", "content": "Hel"})},
+        {"type": "message", "data": json.dumps({"type": "delta", "content": "lo"})},
+    ])
+    monkeypatch.setattr(task_events, "get_async_redis_client", lambda: FakeAsyncRedis(pubsub))
+
+    async def receive():
+        subscriber = TaskEventSubscriber("task-1")
+        await subscriber.subscribe()
+        events = [await subscriber.get_event(timeout=1), await subscriber.get_event(timeout=1)]
+        channels = set(pubsub.channels)
+        await subscriber.close()
+        return events, channels
+
+    events, channels = asyncio.run(receive())
+
+    assert [event["content"] for event in events] == ["Hel", "lo"]
+    assert channels == {"agent-task:task-1"}
+    assert pubsub.channels == set() and pubsub.closed
+
+def test_subscriber_returns_none_after_timeout(monkeypatch):
+    monkeypatch.setattr(task_events, "get_async_redis_client", lambda: FakeAsyncRedis(FakePubSub([])))
+
+    assert asyncio.run(TaskEventSubscriber("task-1").get_event(timeout=0.01)) is None
+
+def test_terminal_events_carry_the_task_result(monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(task_events, "get_redis_client", lambda: redis_client)
+
+    publisher = TaskEventPublisher("task-1")
+    publisher.publish("completed", result={"message": "done"})
+    publisher.publish("failed", result={"message": "Agent cannot process your request."})
+
+    assert [event for _, event in redis_client.published] == [
+        {"type": "completed", "result": {"message": "done"}},
+        {"type": "failed", "result": {"message": "Agent cannot process your request."}},
+    ]
@@ -0,0 +1,117 @@
+import uuid
+import asyncio
+
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+import celery_worker
+from main import app
+from core.api import AgentsAPIView
+from routers import agent as agent_router
+
+client = TestClient(app)
+
+IN_PROGRESS = {"status": "in progress", "result": {"message": "Agent is processing your request..."}}
+
+class StreamingSubscriber:
+    """
+    Stands in for TaskEventSubscriber: returns the given events, then keeps
+    streaming deltas if stream_forever is set, or waits out the timeout.
+    """
+
+    events: list[dict] = []
+    stream_forever = False
+
+    def __init__(self, task_id: str):
+        self.events = list(self.events)
+
+    async def subscribe(self):
+        pass
+
+    async def get_event(self, timeout: float) -> dict | None:
+        if timeout <= 0:
+            return None
+        if self.events:
+            return self.events.pop(0)
+
+        await asyncio.sleep(min(timeout, 0.05))
+        if self.stream_forever and timeout > 0.05:
+            return {"type": "delta", "content": "."}
+        return None
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def websocket_task(monkeypatch):
+    fallback_calls = []
+    subscriber = type("Subscriber", (StreamingSubscriber,), {})
+    task = SimpleNamespace(subscriber=subscriber, backend_result=IN_PROGRESS, fallback_calls=fallback_calls)
+
+    async def validate_api_key_websocket(api_key):
+        return SimpleNamespace(id=uuid.uuid4(), name="User Test")
+
+    def get_task_result(task_id):
+        fallback_calls.append(task_id)
+        return {"task_id": task_id, **task.backend_result}
+
+    monkeypatch.setattr(agent_router, "validate_api_key_websocket", validate_api_key_websocket)
+    monkeypatch.setattr(agent_router, "get_task_result", get_task_result)
+    monkeypatch.setattr(agent_router, "TaskEventSubscriber", subscriber)
+    monkeypatch.setattr(agent_router, "AGENT_TASK_TIMEOUT", 0.3)
+    monkeypatch.setattr(AgentsAPIView, "ensure_conversation_open", lambda self, *args: None)
+    monkeypatch.setattr(
+        celery_worker, "execute_agent_task", SimpleNamespace(apply_async=lambda args, task_id: SimpleNamespace(id=task_id))
+    )
+
+    return task
+
+def run_websocket_task() -> list[dict]:
+    with client.websocket_connect("agent/ws/execute", headers={"x-api-key": str(uuid.uuid4())}) as websocket:
+        websocket.send_json({"agent_id": str(uuid.uuid4()), "message": "Hello"})
+
+        messages = [websocket.receive_json()]
+        while messages[-1]["status"] in ["started", "streaming"]:
+            messages.append(websocket.receive_json())
+
+    return messages
+
+def test_websocket_forwards_deltas_until_completed(websocket_task):
+    websocket_task.subscriber.events = [
+        {"type": "delta", "content": "Hel"},
+        {"type": "delta", "content": "lo"},
+        {"type": "completed", "result": {"message": "Hello"}},
+    ]
+
+    messages = run_websocket_task()
+
+    assert [message["status"] for message in messages] == ["started", "streaming", "streaming", "completed"]
+    assert "".join(message["delta"] for message in messages[1:3]) == "Hello"
+    assert messages[-1]["result"] == {"message": "Hello"}
+    assert websocket_task.fallback_calls == []
+
+def test_websocket_times_out_after_one_result_backend_check(websocket_task):
+    messages = run_websocket_task()
+
+    assert messages[-1]["status"] == "timeout"
+    assert len(websocket_task.fallback_calls) == 1
+
+def test_websocket_deadline_holds_while_deltas_keep_arriving(websocket_task):
+    websocket_task.subscriber.stream_forever = True
+
+    messages = run_websocket_task()
+
+    assert messages[-1]["status"] == "timeout"
+    assert any(message["status"] == "streaming" for message in messages)
+    assert len(websocket_task.fallback_calls) == 1
+
+def test_websocket_uses_result_backend_when_completion_event_is_lost(websocket_task):
+    websocket_task.backend_result = {"status": "completed", "result": {"message": "Hello"}}
+
+    messages = run_websocket_task()
+
+    assert messages[-1] == {"task_id": messages[0]["task_id"], "status": "completed", "result": {"message": "Hello"}}
+    assert websocket_task.fallback_calls == [messages[0]["task_id"]]
@@ -1,9 +1,11 @@
+import os
 import uuid
 import json
 
 from fastapi.testclient import TestClient
 
 from main import app
+from core.database.mongo import DatabaseHandler
 
 client = TestClient(app)
 
@@ -84,4 +86,42 @@ def test_update_agent_unauthorized_with_invalid_api_key(agent_test, agent_data_u
         }
     )
 
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+def test_get_agent_history_pages_turns(user_test, agent_test):
+    database_handler = DatabaseHandler(os.getenv("MONGODB_HISTORY_COLLECTION"))
+    for index in range(3):
+        database_handler.insert_history(f"question {index}", f"answer {index}", user_test.id, agent_test.id)
+
+    response = client.get(
+        f"agent/{str(agent_test.id)}/history",
+        params={"limit": 2},
+        headers={"x-api-key": str(user_test.api_key)}
+    )
+    data = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert [item["input"] for item in data["items"]] == ["question 2", "question 1"]
+    assert data["next_cursor"]
+
+    response = client.get(
+        f"agent/{str(agent_test.id)}/history",
+        params={"limit": 2, "cursor": data["next_cursor"]},
+        headers={"x-api-key": str(user_test.api_key)}
+    )
+    data = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert [item["input"] for item in data["items"]] == ["question 0"]
+    assert data["next_cursor"] is None
+
+def test_get_agent_history_rejects_invalid_cursor(user_test, agent_test):
+    response = client.get(
+        f"agent/{str(agent_test.id)}/history",
+        params={"cursor": "not-a-date"},
+        headers={"x-api-key": str(user_test.api_key)}
+    )
+    assert response.status_code == 400
+
+def test_get_agent_history_unauthorized_with_invalid_api_key(agent_test):
+    response = client.get(f"agent/{str(agent_test.id)}/history", headers={"x-api-key": str(uuid.uuid4())})
+    assert response.status_code == 401